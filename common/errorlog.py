@@ -0,0 +1,131 @@
+"""
+Structured, deduplicated logging of the exceptions `custom_exception_handler` sees.
+
+Each exception is one compact JSON line on the "error" logger with the view,
+the exception class, the status, a short message and the request id. Client
+errors (4xx) are logged at WARNING with nothing more. Server errors (5xx) are
+logged at ERROR with the traceback and the request's method, path, query
+string, user and URL kwargs; request bodies are never logged.
+
+Identical errors (same view, exception class, status and message) are logged
+once per `suppress_window` seconds per process. Repeats in between are only
+counted. The next time an exception is logged after that window has passed, a
+`"suppressed": N` summary line is written for it, so a flood of failed logins
+costs a couple of lines a minute instead of one per request.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from common.middleware.request_id import get_request_id
+
+
+logger = logging.getLogger("error")
+
+
+def get_exception_logging_config():
+    return settings.EXCEPTION_LOGGING
+
+
+def _short(value, length):
+    if isinstance(value, dict) and list(value) == ["detail"]:
+        value = value["detail"]
+    # Validation errors are dicts/lists of ErrorDetail (a str): JSON reads better than their repr.
+    value = _dumps(value) if isinstance(value, (dict, list)) else " ".join(str(value).split())
+    return value if len(value) <= length else value[:length] + "..."
+
+
+class Suppressor:
+    """Decides which occurrences of an error are logged, and tracks how many were not."""
+
+    def __init__(self):
+        # key -> [window_started_at, suppressed, last_entry]
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def admit(self, key, entry, window, max_tracked, now=None):
+        """True if this occurrence should be logged. Returns the summaries that became due as well."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = self._due(now, window)
+            state = self._seen.get(key)
+            if state is not None and now - state[0] < window:
+                state[1] += 1
+                state[2] = entry
+                return False, due
+            self._seen[key] = [now, 0, entry]
+            self._seen.move_to_end(key)
+            while len(self._seen) > max_tracked:
+                _, (_, suppressed, last) = self._seen.popitem(last=False)
+                if suppressed:
+                    due.append((last, suppressed))
+            return True, due
+
+    def _due(self, now, window):
+        # Keys are in window-start order, so expired windows are at the front.
+        due = []
+        while self._seen:
+            key, (started_at, suppressed, last) = next(iter(self._seen.items()))
+            if now - started_at < window:
+                break
+            del self._seen[key]
+            if suppressed:
+                due.append((last, suppressed))
+        return due
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+
+
+_suppressor = Suppressor()
+
+
+def get_suppressor():
+    return _suppressor
+
+
+def _dumps(entry):
+    return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+def log_exception(exc, context, status_code):
+    """Logs an exception handled by DRF; `status_code` is that of the response sent."""
+    cfg = get_exception_logging_config()
+    view = context.get("view")
+    request = context.get("request")
+    match = getattr(request, "resolver_match", None)
+    entry = {
+        "view": match.view_name if match and match.view_name else type(view).__name__ if view else None,
+        "exception": type(exc).__name__,
+        "status": status_code,
+        "message": _short(getattr(exc, "detail", exc), cfg["message_length"]),
+        "request_id": get_request_id(request) if request is not None else None,
+    }
+
+    key = (entry["view"], entry["exception"], status_code, entry["message"])
+    admitted, due = _suppressor.admit(key, entry, cfg["suppress_window"], cfg["max_tracked"])
+    for last, suppressed in due:
+        logger.warning(_dumps({**last, "suppressed": suppressed, "window_seconds": cfg["suppress_window"]}))
+    if not admitted:
+        return
+
+    if status_code < 500:
+        logger.warning(_dumps(entry))
+        return
+
+    if request is not None:
+        # The Django request's user: asking DRF's would re-run a failed authentication.
+        user = getattr(getattr(request, "_request", request), "user", None)
+        entry.update({
+            "method": request.method,
+            "path": request.path,
+            "query": request.META.get("QUERY_STRING", ""),
+            "user": user.pk if user is not None and user.is_authenticated else None,
+            "kwargs": context.get("kwargs") or {},
+        })
+    logger.error(_dumps(entry), exc_info=(type(exc), exc, exc.__traceback__))
@@ -0,0 +1,234 @@
+"""
+IP allow/deny matching for `IPBlockerMixin` and the metrics endpoint.
+
+Static lists (addresses or CIDR ranges, IPv4 and IPv6) are compiled into a
+binary prefix trie once, when the view class or setting is loaded, so a lookup
+walks at most 32 (IPv4) or 128 (IPv6) bits however long the list is.
+IPv4-mapped IPv6 addresses (`::ffff:10.0.0.5`) are matched as IPv4.
+
+On top of the static lists there is a dynamic deny list, shared by all
+workers through Redis:
+
+- `block("203.0.113.0/24", ttl=3600)` adds an entry to the `ip:blocklist`
+  sorted set (scored by expiry) and announces it on the
+  `ip:blocklist:updates` channel;
+- each process keeps its own trie of the entries and a subscriber thread
+  marks it stale when an update is announced; the next check reloads it.
+  It is also reloaded every `sync_interval` seconds in case a message was
+  missed (pub/sub doesn't queue messages for a disconnected subscriber);
+- expired entries stop matching on their own: each trie node keeps its expiry.
+
+If Redis is unreachable the last loaded list keeps being used; with no list
+loaded yet nothing is blocked dynamically.
+"""
+import ipaddress
+import logging
+import math
+import os
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from common import metrics
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("error")
+
+BLOCKLIST_KEY = "ip:blocklist"
+UPDATES_CHANNEL = "ip:blocklist:updates"
+
+IP_DECISIONS = metrics.counter(
+    "ip_filter_decisions_total", "IP filter decisions per view.", ["view", "decision", "reason"]
+)
+
+
+def get_ip_filter_config():
+    return settings.IP_FILTER
+
+
+def parse_address(value):
+    """An `ip_address`, with IPv4-mapped IPv6 addresses unwrapped. None if `value` isn't an IP."""
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+class PrefixTrie:
+    """
+    Binary trie of networks. A node is `[zero, one, expires_at]`; `expires_at` is
+    set on nodes where a network ends (`math.inf` for entries that never expire).
+    """
+
+    def __init__(self):
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+
+    def add(self, network, expires_at=math.inf):
+        network = ipaddress.ip_network(network, strict=False)
+        bits = network.max_prefixlen
+        value = int(network.network_address)
+        node = self._roots[network.version]
+        for i in range(network.prefixlen):
+            bit = (value >> (bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        node[2] = max(node[2] or 0, expires_at)
+
+    def match(self, address, now=None):
+        """True if a live network in the trie contains `address` (an `ip_address`)."""
+        now = time.time() if now is None else now
+        bits = address.max_prefixlen
+        value = int(address)
+        node = self._roots[address.version]
+        i = 0
+        while node is not None:
+            if node[2] is not None and node[2] > now:
+                return True
+            if i == bits:
+                return False
+            node = node[(value >> (bits - 1 - i)) & 1]
+            i += 1
+        return False
+
+
+def compile_networks(networks):
+    """
+    A trie of a static list of addresses/CIDR ranges. Build it once (when the
+    view class or setting is loaded) and pass it to `check()`.
+    """
+    trie = PrefixTrie()
+    for network in networks:
+        try:
+            trie.add(network)
+        except ValueError:
+            # A blank or mistyped entry (e.g. a trailing comma in an env list) never matches.
+            logger.warning("Ignoring invalid IP list entry %r", network)
+    return trie
+
+
+class DynamicBlocklist:
+    def __init__(self):
+        self.trie = PrefixTrie()
+        self._stale = True
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def invalidate(self):
+        self._stale = True
+
+    def sync(self):
+        """Reloads the entries from Redis. Returns False (keeping the current ones) if Redis is unavailable."""
+        now = time.time()
+        try:
+            entries = get_redis().zrangebyscore(BLOCKLIST_KEY, now, "+inf", withscores=True)
+        except redis.RedisError as exc:
+            logger.warning("Could not load the IP blocklist, keeping the last one: %s", exc)
+            return False
+        trie = PrefixTrie()
+        for network, expires_at in entries:
+            try:
+                trie.add(network, expires_at)
+            except ValueError:
+                logger.warning("Ignoring invalid IP blocklist entry %r", network)
+        self.trie = trie
+        return True
+
+    def _ensure_subscribed(self):
+        if not get_ip_filter_config()["subscribe"]:
+            return
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        # A fresh thread per process: threads don't survive gunicorn/celery forks.
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._listen, name="ip-blocklist-subscriber", daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(UPDATES_CHANNEL)
+                # Anything may have changed while we weren't subscribed.
+                self.invalidate()
+                while True:
+                    if pubsub.get_message(timeout=5.0) is not None:
+                        self.invalidate()
+            except redis.RedisError:
+                time.sleep(get_ip_filter_config()["sync_interval"])
+
+    def match(self, address):
+        self._ensure_subscribed()
+        now = time.monotonic()
+        if self._stale or now - self._synced_at >= get_ip_filter_config()["sync_interval"]:
+            with self._lock:
+                if self._stale or now - self._synced_at >= get_ip_filter_config()["sync_interval"]:
+                    # Cleared first: an update announced during the reload marks it stale again.
+                    self._stale = False
+                    self._synced_at = now
+                    self.sync()
+        return self.trie.match(address)
+
+
+_blocklist = DynamicBlocklist()
+
+
+def get_blocklist():
+    return _blocklist
+
+
+def block(network, ttl):
+    """Denies `network` (an address or CIDR range) on every worker for `ttl` seconds."""
+    network = str(ipaddress.ip_network(network, strict=False))
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.zadd(BLOCKLIST_KEY, {network: time.time() + ttl})
+    pipe.zremrangebyscore(BLOCKLIST_KEY, "-inf", time.time())
+    pipe.publish(UPDATES_CHANNEL, f"block {network}")
+    pipe.execute()
+    _blocklist.invalidate()
+    return network
+
+
+def unblock(network):
+    """Lifts a dynamic block. Returns False if there was none."""
+    network = str(ipaddress.ip_network(network, strict=False))
+    client = get_redis()
+    removed = client.zrem(BLOCKLIST_KEY, network)
+    client.publish(UPDATES_CHANNEL, f"unblock {network}")
+    _blocklist.invalidate()
+    return bool(removed)
+
+
+def blocked_networks():
+    """`{network: expires_at}` of the live dynamic blocks."""
+    return dict(get_redis().zrangebyscore(BLOCKLIST_KEY, time.time(), "+inf", withscores=True))
+
+
+def check(client_ip, allow=None, deny=None, view=""):
+    """
+    Decides whether `client_ip` may proceed. `allow` and `deny` are tries from
+    `compile_networks()`; `allow`, when given, is an allowlist; `deny` and the
+    dynamic blocklist always win. Returns `(allowed, reason)`.
+    """
+    address = parse_address(client_ip) if client_ip else None
+    if address is None:
+        allowed, reason = False, "unknown_ip"
+    elif deny is not None and deny.match(address):
+        allowed, reason = False, "denylist"
+    elif _blocklist.match(address):
+        allowed, reason = False, "dynamic_blocklist"
+    elif allow is not None and not allow.match(address):
+        allowed, reason = False, "not_allowlisted"
+    else:
+        allowed, reason = True, "allowlist" if allow is not None else "no_match"
+    IP_DECISIONS.inc(view=view, decision="allowed" if allowed else "blocked", reason=reason)
+    return allowed, reason
@@ -0,0 +1,176 @@
+"""
+Queued file logging.
+
+`QueuedFileHandler` is a drop-in for `logging.FileHandler` in `LOGGING`. The
+thread that logs only puts the record on a bounded queue. A background thread
+per handler formats the records and writes them in batches of up to
+`batch_size`, flushing once per batch.
+
+When the queue is full, `overflow` decides what happens:
+
+* ``"drop_new"`` (default): the new record is dropped;
+* ``"drop_oldest"``: the oldest queued record is dropped to make room;
+* ``"block"``: the caller waits up to `block_timeout` seconds, then drops the
+  record; with `block_timeout=None` it waits for room and nothing is dropped.
+
+Dropped records are counted in `log_records_dropped_total{handler}`. On exit,
+`logging.shutdown()` closes the handler, which drains the queue before closing
+the file. Processes that exit without running atexit hooks (celery prefork
+children end with `os._exit`) call `stop_writers()` instead. The writer
+thread is started lazily, so forked workers (gunicorn, celery prefork) each
+get their own.
+"""
+import logging
+import os
+import queue
+import threading
+import weakref
+
+from common import metrics
+
+
+RECORDS_DROPPED = metrics.counter(
+    "log_records_dropped_total", "Log records dropped because the logging queue was full.", ["handler"]
+)
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+_STOP = object()
+
+_handlers = weakref.WeakSet()
+
+
+class BatchFileHandler(logging.FileHandler):
+    """`FileHandler` that can write a batch of records with a single flush."""
+
+    def emit_batch(self, records):
+        self.acquire()
+        try:
+            for record in records:
+                try:
+                    if self.stream is None:
+                        self.stream = self._open()
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:
+                    self.handleError(record)
+            self.flush()
+        finally:
+            self.release()
+
+
+class QueuedFileHandler(logging.Handler):
+    # Not a logging.handlers.QueueHandler: dictConfig would require a `handlers` list for those.
+
+    def __init__(self, filename, mode="a", encoding=None, delay=True, maxsize=10000, overflow="drop_new",
+                 block_timeout=0.05, batch_size=100):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}, not {overflow!r}")
+        super().__init__()
+        self.queue = queue.Queue(maxsize)
+        self.target = BatchFileHandler(filename, mode=mode, encoding=encoding, delay=delay)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        _handlers.add(self)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the writer thread.
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve the message now so that mutable arguments can't change before
+        # the record is written; the (costlier) formatting stays off the caller.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Forked: the parent's writer thread doesn't exist here.
+                self.queue = queue.Queue(self.queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._write, name=f"log-writer:{self.name}", daemon=True)
+            self._thread.start()
+
+    def _drop(self):
+        self.dropped += 1
+        RECORDS_DROPPED.inc(handler=self.name or self.target.baseFilename)
+
+    def enqueue(self, record):
+        self._ensure_writer()
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.overflow != "drop_oldest":
+                self._drop()
+                return
+
+        try:
+            self.queue.get_nowait()
+            self._drop()
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+
+    def _write(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is _STOP for record in batch)
+            records = [record for record in batch if record is not _STOP]
+            if records:
+                self.target.emit_batch(records)
+            if stop:
+                return
+
+    def flush(self):
+        self.target.flush()
+
+    def stop(self):
+        """Writes out everything queued and stops the writer; a later record starts a new one."""
+        with self._start_lock:
+            thread = self._thread
+            if thread is not None and self._pid == os.getpid() and thread.is_alive():
+                self.queue.put(_STOP)
+                thread.join(timeout=5)
+            self._thread = None
+        self.target.flush()
+
+    def close(self):
+        """Writes out everything queued, then closes the file."""
+        self.stop()
+        self.target.close()
+        super().close()
+
+
+def stop_writers():
+    """Drains every queued handler of this process, for exits that skip `logging.shutdown()`."""
+    for handler in list(_handlers):
+        handler.stop()
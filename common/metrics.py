@@ -0,0 +1,146 @@
+"""
+Lightweight in-process metrics registry.
+
+Metrics are declared once at import time and updated from anywhere in the code:
+
+    PROVIDER_REJECTIONS = metrics.counter(
+        "provider_rejections_total", "Calls rejected before reaching a provider.", ["provider", "reason"]
+    )
+    PROVIDER_REJECTIONS.inc(provider="bulkclix", reason="circuit_open")
+
+Values are kept per process and are safe to update from multiple threads.
+`common.metrics_exporter` merges the values of every gunicorn/celery process
+for the metrics endpoint. Gauges declare how they are merged: per-process
+values (in-flight calls) are summed, while values every process reads from the
+same shared state (circuit state, table sizes) use `multiprocess_mode="max"`.
+"""
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Returns a snapshot of `{label_values: value}`."""
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    type = "gauge"
+    MULTIPROCESS_MODES = ("sum", "max", "min")
+
+    def __init__(self, name, documentation, labelnames=(), multiprocess_mode="sum"):
+        if multiprocess_mode not in self.MULTIPROCESS_MODES:
+            raise ValueError(f"{name}: multiprocess_mode must be one of {self.MULTIPROCESS_MODES}")
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram. Each sample is stored as
+    `[bucket_counts..., +Inf count, sum]` so that it can be merged across processes.
+    """
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = [0] * (len(self.buckets) + 2)
+            sample[index] += 1
+            sample[-1] += value
+
+    def count(self, **labels):
+        sample = self._values.get(self._key(labels))
+        return sum(sample[:-1]) if sample else 0
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=(), multiprocess_mode="sum"):
+        return self._get_or_create(Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def collect(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+
+registry = Registry()
+
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
@@ -0,0 +1,193 @@
+"""
+Prometheus exposition of `common.metrics`, aggregated across processes.
+
+Every gunicorn worker and celery process keeps its own registry. Each one
+periodically publishes a JSON snapshot of it to Redis (`maybe_publish()` is
+called after every request and every task; at most one write per
+`publish_interval`). The metrics endpoint publishes its own snapshot, reads
+everyone else's and merges them:
+
+- counters and histograms are summed, so restarting one worker doesn't hide
+  what the others counted;
+- gauges are merged with their `multiprocess_mode` and only taken from
+  processes that published within `live_window`, so a dead worker's in-flight
+  count doesn't linger.
+
+A process that stops publishing is dropped after `process_ttl`. If Redis is
+unreachable the endpoint falls back to the values of the process serving it.
+"""
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from common import metrics
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("error")
+
+PROCESSES_KEY = "metrics:processes"
+PROCESS_KEY = "metrics:process:{}"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_last_published = 0.0
+_publish_lock = threading.Lock()
+
+
+def get_metrics_config():
+    return settings.METRICS
+
+
+def process_id():
+    # Read on every call: gunicorn workers fork after this module is imported.
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def snapshot(registry=metrics.registry):
+    """The registry as a JSON-serializable dict."""
+    data = {}
+    for metric in registry.collect():
+        entry = {
+            "type": metric.type,
+            "help": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "samples": [[list(key), value] for key, value in metric.samples().items()],
+        }
+        if metric.type == "histogram":
+            entry["buckets"] = list(metric.buckets)
+        elif metric.type == "gauge":
+            entry["mode"] = metric.multiprocess_mode
+        data[metric.name] = entry
+    return {"published_at": time.time(), "metrics": data}
+
+
+def publish():
+    """Writes this process's snapshot to Redis. Returns False if Redis is unavailable."""
+    cfg = get_metrics_config()
+    pid = process_id()
+    data = snapshot()
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(PROCESS_KEY.format(pid), json.dumps(data), ex=cfg["process_ttl"])
+        pipe.zadd(PROCESSES_KEY, {pid: data["published_at"]})
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not publish metrics for %s: %s", pid, exc)
+        return False
+    return True
+
+
+def maybe_publish():
+    """Publishes the snapshot unless this process did so within `publish_interval`."""
+    global _last_published
+    cfg = get_metrics_config()
+    if not cfg["enabled"]:
+        return
+    now = time.monotonic()
+    if now - _last_published < cfg["publish_interval"]:
+        return
+    if not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        _last_published = now
+        publish()
+    finally:
+        _publish_lock.release()
+
+
+def load_snapshots():
+    """Snapshots of every process that published within `process_ttl`, this one included."""
+    cfg = get_metrics_config()
+    now = time.time()
+    try:
+        client = get_redis()
+        client.zremrangebyscore(PROCESSES_KEY, "-inf", now - cfg["process_ttl"])
+        pids = client.zrange(PROCESSES_KEY, 0, -1)
+        raw = client.mget([PROCESS_KEY.format(pid) for pid in pids]) if pids else []
+    except redis.RedisError as exc:
+        logger.warning("Could not load metrics snapshots, serving this process only: %s", exc)
+        return [snapshot()]
+    return [json.loads(value) for value in raw if value]
+
+
+def merge(snapshots, live_window, now=None):
+    """Merges process snapshots into `{name: entry}` with summed/merged samples."""
+    now = time.time() if now is None else now
+    merged = {}
+    for snap in snapshots:
+        live = now - snap["published_at"] <= live_window
+        for name, entry in snap["metrics"].items():
+            if entry["type"] == "gauge" and not live:
+                continue
+            target = merged.setdefault(name, {**entry, "samples": {}})
+            samples = target["samples"]
+            for labels, value in entry["samples"]:
+                key = tuple(labels)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = list(value) if isinstance(value, list) else value
+                elif entry["type"] == "histogram":
+                    samples[key] = [a + b for a, b in zip(current, value)]
+                elif entry["type"] == "gauge" and entry.get("mode") == "max":
+                    samples[key] = max(current, value)
+                elif entry["type"] == "gauge" and entry.get("mode") == "min":
+                    samples[key] = min(current, value)
+                else:
+                    samples[key] = current + value
+    return merged
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render(merged):
+    """Prometheus text exposition format (0.0.4) of merged metrics."""
+    lines = []
+    for name in sorted(merged):
+        entry = merged[name]
+        names = entry["labelnames"]
+        lines.append(f"# HELP {name} {entry['help']}".replace("\n", " "))
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for key in sorted(entry["samples"]):
+            value = entry["samples"][key]
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*entry["buckets"], math.inf], value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, key, [('le', _format_value(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def export():
+    """The text served by the metrics endpoint."""
+    cfg = get_metrics_config()
+    if not publish():
+        return render(merge([snapshot()], cfg["live_window"]))
+    return render(merge(load_snapshots(), cfg["live_window"]))
@@ -0,0 +1,76 @@
+"""
+Per-request latency and database metrics.
+
+Requests are labelled with the resolved URL name (`main:transactions`), never
+the raw path, so ids in URLs don't create a new series per object. Queries are
+counted with `connection.execute_wrapper`, which sees every query the view runs
+on the request thread without turning on `DEBUG` query logging. Queries an
+async view hands to `sync_to_async` run on another thread and aren't counted.
+"""
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from common import metrics, metrics_exporter
+
+
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from the request reaching Django to the response leaving it.",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = metrics.histogram(
+    "http_request_db_queries",
+    "Database queries run while handling a request.",
+    ["view", "method"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = metrics.histogram(
+    "http_request_db_seconds",
+    "Time spent in database queries while handling a request.",
+    ["view", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class QueryTimer:
+    """`execute_wrapper` that counts queries and the time spent running them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_LATENCY.observe(elapsed, view=view, method=method, status=f"{response.status_code // 100}xx")
+        REQUEST_DB_QUERIES.observe(timer.count, view=view, method=method)
+        REQUEST_DB_TIME.observe(timer.seconds, view=view, method=method)
+
+        metrics_exporter.maybe_publish()
+        return response
@@ -0,0 +1,59 @@
+"""
+Reports the queries of each request while developing and testing.
+
+Only installed when `QUERY_INSPECTOR['enabled']` is set (the dev settings turn
+it on), so production requests don't pay for recording SQL. For each request it:
+
+- logs every query shape repeated `repeat_threshold` times or more (an N+1);
+- in DEBUG, adds an `X-DB-Queries: count=..; time_ms=..; repeated=..` header;
+- checks the view's `@query_budget`, raising `QueryBudgetExceeded` when
+  `enforce_budgets` is on and logging otherwise.
+"""
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from common.queryinspector import QueryBudgetExceeded, QueryRecorder, get_query_budget
+
+
+logger = logging.getLogger("error")
+
+
+def get_query_inspector_config():
+    return settings.QUERY_INSPECTOR
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        if not get_query_inspector_config()["enabled"]:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cfg = get_query_inspector_config()
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        route = request.resolver_match.view_name if getattr(request, "resolver_match", None) else request.path
+        for query_shape, times in recorder.repeated(cfg["repeat_threshold"]):
+            logger.warning("Possible N+1 in %s %s: %d x %s", request.method, route, times, query_shape)
+
+        if settings.DEBUG:
+            response["X-DB-Queries"] = recorder.summary(cfg["repeat_threshold"])
+
+        budget = get_query_budget(request)
+        if budget is not None and recorder.count > budget:
+            message = f"{request.method} {route} ran {recorder.count} queries, over its budget of {budget}"
+            if cfg["enforce_budgets"]:
+                raise QueryBudgetExceeded(
+                    message + ":\n" + "\n".join(sql for sql, _, _ in recorder.queries)
+                )
+            logger.warning(message)
+
+        return response
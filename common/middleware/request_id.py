@@ -0,0 +1,38 @@
+"""
+Gives every request an id, so that its request log line, error log lines and
+the response can be matched up.
+
+An `X-Request-ID` set by the load balancer is kept when it looks like an id
+(letters, digits, `-`, `_`, `.`; at most 64 characters); otherwise one is
+generated. It is stored as `request.request_id` and echoed in the response's
+`X-Request-ID` header.
+"""
+import re
+import uuid
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_VALID_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def get_request_id(request):
+    """The id of `request` (a Django or DRF request), assigning one if the middleware hasn't."""
+    request = getattr(request, "_request", request)
+    request_id = getattr(request, "request_id", None)
+    if request_id is None:
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        request_id = incoming if _VALID_ID.match(incoming) else uuid.uuid4().hex
+        request.request_id = request_id
+    return request_id
+
+
+class RequestIDMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = get_request_id(request)
+        response = self.get_response(request)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
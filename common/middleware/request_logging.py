@@ -1,13 +1,22 @@
 import logging
+import random
 import time
 import json
+from django.conf import settings
+from django.core.files import File
 from django.utils.deprecation import MiddlewareMixin
 from django.http import QueryDict
+from rest_framework.request import Empty
+
+from common.middleware.request_id import get_request_id
 
 logger = logging.getLogger("request_logger")
 
 REDACT_HEADERS = {'authorization', 'cookie', 'set-cookie'}
-REDACT_FIELDS = {'password', 'token', 'secret', 'file'}
+REDACT_FIELDS = {'password', 'token', 'secret', 'file', 'code', 'otp', 'refresh', 'access'}
+
+def get_request_logging_config():
+    return settings.REQUEST_LOGGING
 
 def flatten_querydict(qdict):
     return {
@@ -15,9 +24,30 @@ def flatten_querydict(qdict):
         for k, v in qdict.lists()
     }
 
+def redact(value, max_length, max_items):
+    """Copy of `value` with sensitive fields redacted and long strings and lists cut, in one walk."""
+    if isinstance(value, QueryDict):
+        value = flatten_querydict(value)
+    if isinstance(value, dict):
+        return {
+            k: "[REDACTED]" if str(k).lower() in REDACT_FIELDS else redact(v, max_length, max_items)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(v, max_length, max_items) for v in value[:max_items]]
+    if isinstance(value, File):
+        return '[Uploaded File]'
+    if isinstance(value, str) and len(value) > max_length:
+        return value[:max_length] + '...'
+    return value
+
 class RequestLoggingMiddleware(MiddlewareMixin):
     def process_request(self, request):
         request._start_time = time.time()
+        if get_request_logging_config()['format'] == 'json':
+            # The body is taken from DRF's parsed data once the view has run.
+            return
+
         request._logged_data = {}
 
         if request.method in ['POST', 'PUT', 'PATCH']:
@@ -40,6 +70,11 @@ class RequestLoggingMiddleware(MiddlewareMixin):
     
     def process_response(self, request, response):
         duration = time.time() - getattr(request, '_start_time', time.time())
+        conf = get_request_logging_config()
+        if conf['format'] == 'json':
+            self.log_json(request, response, duration, conf)
+            return response
+
         user = getattr(request, 'user', None)
         ip = self.get_client_ip(request)
 
@@ -72,6 +107,59 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         logger.info(" | ".join(log_parts))
         return response
 
+    def log_json(self, request, response, duration, conf):
+        """
+        One compact JSON line per request. Requests that failed or move money
+        (`always_log`) are always logged; others are sampled per route.
+        """
+        match = request.resolver_match
+        route = match.view_name if match else None
+
+        rate = 1.0
+        if response.status_code < 400 and route not in conf['always_log']:
+            rate = conf['sample_rates'].get(route, conf['sample_rate'])
+            if rate < 1 and random.random() >= rate:
+                return
+
+        user = getattr(request, 'user', None)
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "user": user.pk if user and user.is_authenticated else None,
+            "ip": self.get_client_ip(request),
+            "request_id": get_request_id(request),
+        }
+        if rate < 1:
+            entry["sample_rate"] = rate
+        headers = {name: request.headers[name] for name in conf['headers'] if name in request.headers}
+        if headers:
+            entry["headers"] = headers
+
+        line = json.dumps(entry, separators=(',', ':'), default=str)
+        body = self.get_parsed_body(request, response)
+        if body is not None:
+            body = json.dumps(redact(body, conf['max_value_length'], conf['max_items']), separators=(',', ':'), default=str)
+            if len(body) > conf['max_body_bytes']:
+                body = json.dumps(body[:conf['max_body_bytes']]) + f',"body_size":{len(body)}'
+            line = f'{line[:-1]},"body":{body}}}'
+
+        logger.info(line)
+
+    def get_parsed_body(self, request, response):
+        """The body as already parsed by DRF (or Django, for forms). Never parses it again."""
+        if request.method not in ('POST', 'PUT', 'PATCH'):
+            return None
+        drf_request = (getattr(response, 'renderer_context', None) or {}).get('request')
+        data = getattr(drf_request, '_full_data', Empty)
+        if data is not Empty:
+            return data
+        if hasattr(request, '_post'):
+            return request._post
+        return None
+
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
         return x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get("REMOTE_ADDR")
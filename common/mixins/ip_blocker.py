@@ -1,30 +1,38 @@
 from rest_framework.exceptions import PermissionDenied
 from ipware import get_client_ip
 
+from common import ipfilter
+
 class IPBlockerMixin:
     """
     A DRF mixin for IP whitelisting and blacklisting.
     Add this mixin to any APIView or ViewSet to restrict access based on client IP.
+
+    Both lists take addresses or CIDR ranges (IPv4 or IPv6) and are compiled once,
+    when the view class is defined. Addresses blocked at runtime with
+    `common.ipfilter.block()` are denied on every view using the mixin.
     """
 
     WHITELIST_IPS = []
     BLACKLIST_IPS = [] 
     ENFORCE_WHITELIST = True  # If True, only allow IPs in whitelist
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._whitelist = ipfilter.compile_networks(cls.WHITELIST_IPS) if cls.WHITELIST_IPS else None
+        cls._blacklist = ipfilter.compile_networks(cls.BLACKLIST_IPS) if cls.BLACKLIST_IPS else None
+
     def initial(self, request, *args, **kwargs):
         client_ip, is_routable = get_client_ip(request)
 
-        if not client_ip:
+        allowed, _ = ipfilter.check(
+            client_ip,
+            allow=self._whitelist if self.ENFORCE_WHITELIST else None,
+            deny=self._blacklist,
+            view=type(self).__name__,
+        )
+        if not allowed:
             raise PermissionDenied({"detail":"Unathorized"})
 
-        # --- Blacklist logic ---
-        if client_ip in self.BLACKLIST_IPS:
-            raise PermissionDenied({"detail":"Unathorized"})
-
-        # --- Whitelist logic ---
-        if self.ENFORCE_WHITELIST and self.WHITELIST_IPS:
-            if client_ip not in self.WHITELIST_IPS:
-                raise PermissionDenied({"detail":"Unathorized"})
-
         # Proceed normally
         return super().initial(request, *args, **kwargs)
@@ -13,17 +13,14 @@ class StandardResponseView(APIView):
     def get_success_message(self, request):
         return getattr(self, "success_message", self.default_success_messages.get(request.method, "Success"))
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        if isinstance(response.data, dict) and {"status", "message", "data"} <= response.data.keys():
-            return super().finalize_response(request, response, *args, **kwargs)
+    def wrap_response_data(self, request, response, data):
+        """Called by `common.renderers.JSONRenderer` when the response is rendered."""
+        if isinstance(data, dict) and {"status", "message", "data"} <= data.keys():
+            return data
 
-        # message = self.get_success_message(request) if response.status_code < 400 else response.data.get("detail","Error")
         message = self.get_success_message(request) if response.status_code < 400 else None
-        print(message)
-        response.data = {
+        return {
             "status": response.status_code < 400,
             "message": message,
-            "data": response.data,
+            "data": data,
         }
-
-        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,6 +1,18 @@
 # pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 # Option A: Standard Page Numbers (e.g., ?page=3)
@@ -15,3 +27,242 @@ class LimitOffsetResultsSetPagination(LimitOffsetPagination):
     limit_query_param = 'limit'
     offset_query_param = 'offset'
     max_limit = 50
+
+# Option C: Page numbers with estimated counts (admin lists over large tables)
+def estimate_count(queryset):
+    """
+    The planner's row estimate for `queryset` (PostgreSQL only, else None): the
+    table's `pg_class.reltuples` when it isn't filtered, the `EXPLAIN` estimate
+    when it is. Costs a catalog lookup or a plan, never a scan.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # -1 until the table is first analyzed.
+            if row and row[0] >= 0:
+                return row[0]
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedPage(Page):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """
+    Uses the planner's estimate as `count` when it is at least `exact_count_threshold`,
+    an exact COUNT(*) below it. With an estimate, pages past the estimated last one
+    still load and `has_next()` checks for a following row instead of trusting the count.
+    """
+    exact_count_threshold = 10_000
+
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        self.count_is_approximate = True
+        return estimate
+
+    def validate_number(self, number):
+        # Evaluating `count` is what decides whether it is approximate.
+        if not (self.count and self.count_is_approximate):
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class EstimatedCountPagination(StandardResultsSetPagination):
+    """
+    `StandardResultsSetPagination` without an exact COUNT(*) over large result sets.
+    Responses carry `count_is_approximate`.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_approximate'] = self.page.paginator.count_is_approximate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_is_approximate'] = {'type': 'boolean'}
+        return schema
+
+
+# Option D: Keyset / cursor (e.g., ?cursor=eyJ...)
+class KeysetPagination(BasePagination):
+    """
+    Pages by position instead of by offset: the next page is "rows after the
+    last (created_at, id) of this one", so it is one indexed range scan and no
+    COUNT(*), however deep the page. `id` breaks ties between rows created in
+    the same instant.
+
+    Cursors are opaque to clients; the response only has `next`, `previous`
+    and `results`. Views over models without `created_at` set `keyset_ordering`
+    (a timestamp, then a unique field).
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        position, reverse = self.decode_cursor(encoded) if encoded else (None, False)
+
+        ordering = [self._flip(name) for name in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def encode_cursor(self, obj, reverse):
+        values = [field.value_to_string(obj) for field in self.fields]
+        raw = json.dumps([values, 'p' if reverse else 'n'], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, encoded):
+        try:
+            values, direction = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, direction == 'p'
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    @staticmethod
+    def _after(ordering, position):
+        """Rows strictly after `position` in `ordering`: (a < x) OR (a = x AND b < y) for descending fields."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+
+class HistoryPagination(StandardResultsSetPagination):
+    """
+    Page numbers by default, keyset pages on request: `?pagination=cursor` for the
+    first page, then follow `next`/`previous` (their `cursor` keeps keyset mode).
+    """
+    keyset_class = KeysetPagination
+    mode_query_param = 'pagination'
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.keyset_class() if self.use_keyset(request) else None
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class EstimatedHistoryPagination(HistoryPagination, EstimatedCountPagination):
+    """`HistoryPagination` whose page-number mode uses estimated counts."""
@@ -0,0 +1,94 @@
+"""
+Development and test instrumentation for the queries a request runs.
+
+`QueryRecorder` is a `connection.execute_wrapper` that keeps every query of a
+request together with its "shape": the SQL with literals and IN lists folded,
+so that `... WHERE "id" = %s` run fifty times for fifty rows shows up as one
+shape repeated fifty times. A shape repeated `repeat_threshold` times or more
+is almost always a serializer touching a relation that wasn't
+`select_related`/`prefetch_related` (an N+1).
+
+Views declare how many queries they may run with `@query_budget`:
+
+    @query_budget(4)
+    class RedeemedGiftCardListView(StandardResponseView, generics.ListAPIView):
+        ...
+
+The budget can also be put on a single handler or viewset action. With
+`QUERY_INSPECTOR['enforce_budgets']` (on in the test suite) a request over its
+budget raises `QueryBudgetExceeded`, failing the test that made it.
+"""
+import re
+import time
+from collections import Counter
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit):
+    """Declares the most queries a view, handler or viewset action may run per request."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget(request):
+    """The budget declared for the view that handled `request`, or None."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    func = match.func
+    cls = getattr(func, "cls", None)
+    if cls is None:
+        return getattr(func, "query_budget", None)
+    method = request.method.lower()
+    handler = getattr(cls, (getattr(func, "actions", None) or {}).get(method, method), None)
+    return getattr(handler, "query_budget", getattr(cls, "query_budget", None))
+
+
+def shape(sql):
+    """`sql` with literals and parameter lists folded, for grouping repeated queries."""
+    sql = _STRING.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """`execute_wrapper` that records each query's SQL, shape and duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, shape(sql), time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def repeated(self, threshold):
+        """`[(shape, times)]` for shapes run at least `threshold` times, most repeated first."""
+        shapes = Counter(query_shape for _, query_shape, _ in self.queries)
+        return [(query_shape, times) for query_shape, times in shapes.most_common() if times >= threshold]
+
+    def summary(self, threshold):
+        repeated = self.repeated(threshold)
+        return f"count={self.count}; time_ms={self.seconds * 1000:.1f}; repeated={len(repeated)}"
@@ -0,0 +1,69 @@
+import logging
+import time
+
+import redis
+
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("error")
+
+# Returns {allowed, seconds_to_wait}. Floats are returned as strings because Redis
+# truncates Lua numbers to integers.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every worker through Redis.
+
+    `rate` tokens are added per second up to `capacity`. If Redis is unreachable
+    the bucket fails open.
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.key = f"bucket:{name}"
+        self.rate = rate
+        self.capacity = capacity
+
+    def consume(self, tokens=1):
+        """Takes `tokens` if available. Returns `(allowed, seconds_until_available)`."""
+        try:
+            allowed, wait = get_redis().eval(
+                TOKEN_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, time.time(), tokens
+            )
+        except redis.RedisError as e:
+            logger.warning("Token bucket %s unavailable, failing open: %s", self.key, str(e))
+            return True, 0.0
+        return bool(allowed), float(wait)
+
+    def acquire(self, tokens=1, timeout=10.0):
+        """Blocks until `tokens` are available or `timeout` seconds have passed. Returns True on success."""
+        deadline = time.monotonic() + timeout
+        while True:
+            allowed, wait = self.consume(tokens)
+            if allowed:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
@@ -0,0 +1,20 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Returns the process-wide Redis client used for state shared between workers.
+    The connection pool is created lazily on first use.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+    return _client
@@ -0,0 +1,72 @@
+"""
+JSON rendering and parsing with orjson, falling back to DRF's stdlib-based
+classes when orjson isn't installed.
+
+orjson serializes str, numbers, dicts, lists and UUIDs itself. Anything else
+(datetimes, Decimal, lazy strings, querysets, ...) goes through DRF's
+`JSONEncoder.default`, so the output matches the stdlib renderer; datetimes
+keep DRF's format (`Z` for UTC) rather than orjson's `+00:00`.
+
+Views that opt into the `{status, message, data}` envelope (see
+`common.mixins.response.StandardResponseView`) get it added here, at render
+time, instead of having `response.data` rewritten.
+"""
+import json
+
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by the stdlib fallback tests
+    orjson = None
+
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, like DRF's `JSONRenderer` output."""
+    if orjson is None:
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        view = renderer_context.get("view")
+        response = renderer_context.get("response")
+        if response is not None and hasattr(view, "wrap_response_data"):
+            data = view.wrap_response_data(renderer_context.get("request"), response, data)
+
+        if data is None:
+            return b""
+        if orjson is None or self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = dumps(data)
+        if not ret.isascii():
+            # Same escaping as DRF: keep the output safe to embed in JavaScript.
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class JSONParser(parsers.JSONParser):
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects some documents the stdlib accepts (e.g. unpaired surrogates).
+            try:
+                return json.loads(raw, parse_constant=strict_constant)
+            except ValueError as exc:
+                raise ParseError(f"JSON parse error - {exc}")
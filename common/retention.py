@@ -0,0 +1,147 @@
+"""
+Retention: chunked purging of rows that only ever accumulate.
+
+Each policy in `settings.RETENTION["policies"]` names a model, the timestamp
+field that ages its rows and how many days to keep them (plus optional extra
+filters). Expired rows are deleted by primary key in chunks, each in its own
+short transaction. The chunk size adapts so a single delete stays under
+`lock_budget` seconds, and the purger sleeps `pause` seconds between chunks so
+the auth path can get at the tables. A run stops after `max_seconds` per
+policy; the next scheduled run picks up where it left off.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common import metrics
+
+
+logger = logging.getLogger("error")
+
+ROWS_PURGED = metrics.counter("retention_rows_purged_total", "Rows deleted by retention policies.", ["policy"])
+TABLE_ROWS = metrics.gauge(
+    "retention_table_rows", "Rows in tables governed by a retention policy.", ["table"], multiprocess_mode="max"
+)
+TABLE_SIZE = metrics.gauge(
+    "retention_table_size_bytes", "On-disk size (with indexes) of tables governed by a retention policy.", ["table"],
+    multiprocess_mode="max",
+)
+
+
+class RetentionPolicy:
+    def __init__(self, name, model, field, days, filters=None):
+        self.name = name
+        self.model = apps.get_model(model)
+        self.field = field
+        self.days = days
+        self.filters = filters or {}
+
+    @classmethod
+    def from_settings(cls, name, conf):
+        return cls(name, conf["model"], conf["field"], conf["days"], conf.get("filters"))
+
+    def expired(self, now=None):
+        cutoff = (now or timezone.now()) - timedelta(days=self.days)
+        return self.model._default_manager.filter(**{f"{self.field}__lt": cutoff}, **self.filters)
+
+
+def get_retention_config():
+    return settings.RETENTION
+
+
+def get_policies(names=None):
+    conf = get_retention_config()["policies"]
+    unknown = set(names or ()) - set(conf)
+    if unknown:
+        raise ValueError(f"Unknown retention policies: {', '.join(sorted(unknown))}.")
+    return [RetentionPolicy.from_settings(name, conf[name]) for name in conf if not names or name in names]
+
+
+def table_stats(model):
+    """Returns `{"rows", "size_bytes"}`. PostgreSQL rows are the planner's estimate; other databases count."""
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            rows, size = cursor.fetchone()
+        stats = {"rows": max(rows, 0), "size_bytes": size}
+    else:
+        stats = {"rows": model._default_manager.count(), "size_bytes": None}
+
+    TABLE_ROWS.set(stats["rows"], table=table)
+    if stats["size_bytes"] is not None:
+        TABLE_SIZE.set(stats["size_bytes"], table=table)
+    return stats
+
+
+def purge(policy, chunk_size=None, lock_budget=None, pause=None, max_seconds=None, dry_run=False):
+    """Deletes `policy`'s expired rows in adaptive chunks. Returns a report for the policy."""
+    conf = get_retention_config()
+    chunk_size = chunk_size or conf["chunk_size"]
+    lock_budget = conf["lock_budget"] if lock_budget is None else lock_budget
+    pause = conf["pause"] if pause is None else pause
+    max_seconds = conf["max_seconds"] if max_seconds is None else max_seconds
+
+    report = {
+        "policy": policy.name,
+        "table": policy.model._meta.db_table,
+        "purged": 0,
+        "chunks": 0,
+        "complete": True,
+    }
+    started = time.monotonic()
+    now = timezone.now()
+
+    if dry_run:
+        report["purged"] = policy.expired(now).count()
+    else:
+        while True:
+            pks = list(policy.expired(now).order_by("pk").values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                break
+
+            chunk_started = time.monotonic()
+            with transaction.atomic():
+                deleted = policy.model._default_manager.filter(pk__in=pks).delete()[1].get(policy.model._meta.label, 0)
+            elapsed = time.monotonic() - chunk_started
+
+            report["purged"] += deleted
+            report["chunks"] += 1
+            ROWS_PURGED.inc(deleted, policy=policy.name)
+
+            # Keep each delete (and the locks it holds) within budget.
+            if elapsed > lock_budget:
+                chunk_size = max(1, chunk_size // 2)
+            elif elapsed < lock_budget / 4:
+                chunk_size = min(conf["max_chunk_size"], chunk_size * 2)
+
+            if time.monotonic() - started > max_seconds:
+                report["complete"] = False
+                break
+            if pause:
+                time.sleep(pause)
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    report.update(table_stats(policy.model))
+    return report
+
+
+def run_retention(names=None, dry_run=False, **options):
+    """Applies every (or the named) retention policy in order and returns their reports."""
+    reports = []
+    for policy in get_policies(names):
+        try:
+            report = purge(policy, dry_run=dry_run, **options)
+        except Exception as e:
+            logger.error("Retention policy %s failed: %s", policy.name, str(e), exc_info=True)
+            report = {"policy": policy.name, "table": policy.model._meta.db_table, "error": str(e)}
+        reports.append(report)
+    return reports
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from celery import shared_task
+
+from config import celery as celery_config
+from config.celery import TASK_QUEUE_WAIT, TASK_RUNTIME, app
+
+
+@shared_task(name="common.tests.noop")
+def noop():
+    return "ok"
+
+
+def route(task_name):
+    return app.amqp.router.route({}, task_name)["queue"].name
+
+
+class TestTaskRouting:
+    def test_latency_sensitive_tasks_use_the_otp_queue(self):
+        assert route("services.services.send_email") == "otp"
+        assert route("notifications.tasks.flush_sms_queue") == "otp"
+
+    def test_bulk_and_financial_tasks_are_separated(self):
+        assert route("notifications.tasks.flush_email_queue") == "bulk"
+        assert route("notifications.tasks.sweep_sms_queue") == "bulk"
+        assert route("main.tasks.process_webhook") == "financial"
+
+    def test_unrouted_tasks_use_the_default_queue(self):
+        assert route("common.tests.noop") == "default"
+
+
+class TestWorkerProfiles:
+    def apply(self, monkeypatch, profile, **options):
+        monkeypatch.setenv("CELERY_WORKER_PROFILE", profile)
+        conf = SimpleNamespace()
+        selected = []
+        instance = SimpleNamespace(app=SimpleNamespace(amqp=SimpleNamespace(queues=SimpleNamespace(select=selected.extend))))
+        celery_config.apply_worker_profile(instance=instance, conf=conf, options=options)
+        return conf, selected
+
+    def test_profile_sets_concurrency_prefetch_and_queues(self, monkeypatch):
+        conf, selected = self.apply(monkeypatch, "financial")
+        assert conf.worker_concurrency == 2
+        assert conf.worker_prefetch_multiplier == 1
+        assert conf.task_acks_late is True
+        assert selected == ["financial"]
+
+    def test_command_line_options_win(self, monkeypatch):
+        conf, selected = self.apply(monkeypatch, "otp", concurrency=3, queues=["otp", "bulk"])
+        assert not hasattr(conf, "worker_concurrency")
+        assert selected == []
+
+    def test_unknown_profile_is_rejected(self, monkeypatch):
+        with pytest.raises(ValueError):
+            self.apply(monkeypatch, "fast")
+
+
+class TestTaskMetrics:
+    def run(self, **request):
+        noop.push_request(delivery_info={"routing_key": "default"}, **request)
+        try:
+            celery_config.record_queue_wait(task=noop)
+            celery_config.record_runtime(task=noop, state="SUCCESS")
+        finally:
+            noop.pop_request()
+
+    def test_queue_wait_and_runtime_are_observed(self):
+        TASK_QUEUE_WAIT.clear()
+        TASK_RUNTIME.clear()
+
+        self.run(enqueued_at=time.time() - 2)
+
+        assert TASK_QUEUE_WAIT.count(task="common.tests.noop", queue="default") == 1
+        assert TASK_QUEUE_WAIT.samples()[("common.tests.noop", "default")][-1] >= 2
+        assert TASK_RUNTIME.count(task="common.tests.noop", queue="default", state="SUCCESS") == 1
+
+    def test_countdown_is_not_counted_as_waiting(self):
+        TASK_QUEUE_WAIT.clear()
+
+        now = time.time()
+        self.run(enqueued_at=now - 60, eta=datetime.fromtimestamp(now - 1, tz=timezone.utc).isoformat())
+
+        assert TASK_QUEUE_WAIT.samples()[("common.tests.noop", "default")][-1] < 30
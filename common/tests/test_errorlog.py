@@ -0,0 +1,107 @@
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from common import errorlog
+from services.resilience import ProviderUnavailableError
+from utils.exceptions import custom_exception_handler
+
+
+class RecordHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def logged(fake_redis):
+    errorlog.get_suppressor().clear()
+    handler = RecordHandler()
+    errorlog.logger.addHandler(handler)
+    yield handler.records
+    errorlog.logger.removeHandler(handler)
+    errorlog.get_suppressor().clear()
+
+
+def entries(records):
+    return [json.loads(record.getMessage()) for record in records]
+
+
+def failed_login(client):
+    return client.post(reverse("oauth:login"), {"email": "nobody@example.com", "password": "x"}, format="json")
+
+
+@pytest.mark.django_db
+class TestExceptionLogging:
+    def test_client_errors_are_one_short_line(self, logged):
+        response = failed_login(APIClient(HTTP_X_REQUEST_ID="req-123"))
+
+        assert response["X-Request-ID"] == "req-123"
+        [record] = logged
+        assert record.levelno == logging.WARNING
+        assert record.exc_info is None
+        assert json.loads(record.getMessage()) == {
+            "view": "oauth:login",
+            "exception": "AuthenticationFailed",
+            "status": 401,
+            "message": "Invalid credentials",
+            "request_id": "req-123",
+        }
+
+    def test_repeats_are_suppressed_and_summarised(self, logged, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(errorlog.time, "monotonic", lambda: clock[0])
+        client = APIClient()
+
+        for _ in range(4):  # the login throttle allows 5 a minute
+            failed_login(client)
+        assert len(logged) == 1
+
+        clock[0] += 61
+        failed_login(client)
+
+        summary, again = entries(logged[1:])
+        assert summary["suppressed"] == 3
+        assert summary["window_seconds"] == 60
+        assert again["exception"] == "AuthenticationFailed"
+        assert "suppressed" not in again
+
+    def test_server_errors_get_full_context(self, logged):
+        request = Request(APIRequestFactory().get("/api/v1/accounts/deposit?x=1"))
+        context = {"view": None, "request": request, "kwargs": {"pk": 7}}
+
+        response = custom_exception_handler(ProviderUnavailableError(), context)
+
+        assert response.status_code == 503
+        [record] = logged
+        assert record.levelno == logging.ERROR
+        assert record.exc_info[0] is ProviderUnavailableError
+        entry = json.loads(record.getMessage())
+        assert entry["exception"] == "ProviderUnavailableError"
+        assert entry["path"] == "/api/v1/accounts/deposit"
+        assert entry["query"] == "x=1"
+        assert entry["kwargs"] == {"pk": 7}
+        assert len(entry["request_id"]) == 32
+
+    def test_validation_errors_are_truncated_json(self, logged, settings):
+        settings.EXCEPTION_LOGGING = {**settings.EXCEPTION_LOGGING, "message_length": 30}
+        request = Request(APIRequestFactory().post("/"))
+
+        custom_exception_handler(ValidationError({"email": ["This field is required."] * 3}), {"request": request})
+
+        [entry] = entries(logged)
+        assert entry["message"] == '{"email":["This field is requi...'
+
+    def test_request_ids_are_generated_when_missing_or_invalid(self, logged):
+        response = failed_login(APIClient(HTTP_X_REQUEST_ID="not valid!"))
+
+        assert response["X-Request-ID"] != "not valid!"
+        assert entries(logged)[0]["request_id"] == response["X-Request-ID"]
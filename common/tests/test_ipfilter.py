@@ -0,0 +1,128 @@
+import io
+import ipaddress
+
+import pytest
+import redis
+from django.core.management import call_command
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common import ipfilter
+from common.ipfilter import IP_DECISIONS, PrefixTrie
+from common.mixins.ip_blocker import IPBlockerMixin
+
+
+def ip(value):
+    return ipaddress.ip_address(value)
+
+
+def nets(*networks):
+    return ipfilter.compile_networks(networks)
+
+
+@pytest.fixture
+def blocklist(settings, fake_redis):
+    settings.IP_FILTER = {**settings.IP_FILTER, "subscribe": False}
+    ipfilter.get_blocklist().invalidate()
+    yield ipfilter.get_blocklist()
+    ipfilter.get_blocklist().invalidate()
+
+
+class TestPrefixTrie:
+    def test_matches_cidr_ranges_and_single_addresses(self):
+        trie = PrefixTrie()
+        trie.add("196.43.0.0/16")
+        trie.add("10.0.0.5")
+        trie.add("2001:db8::/32")
+
+        assert trie.match(ip("196.43.250.1"))
+        assert not trie.match(ip("196.44.0.1"))
+        assert trie.match(ip("10.0.0.5"))
+        assert not trie.match(ip("10.0.0.6"))
+        assert trie.match(ip("2001:db8:1::1"))
+        assert not trie.match(ip("2001:db9::1"))
+
+    def test_expired_entries_stop_matching(self):
+        trie = PrefixTrie()
+        trie.add("203.0.113.0/24", expires_at=100.0)
+
+        assert trie.match(ip("203.0.113.9"), now=99.0)
+        assert not trie.match(ip("203.0.113.9"), now=100.0)
+
+    def test_catch_all(self):
+        trie = PrefixTrie()
+        trie.add("0.0.0.0/0")
+
+        assert trie.match(ip("8.8.8.8"))
+        assert not trie.match(ip("::1"))
+
+
+class TestCheck:
+    def test_ipv4_mapped_addresses_match_ipv4_ranges(self, blocklist):
+        assert ipfilter.check("::ffff:196.43.1.1", allow=nets("196.43.0.0/16")) == (True, "allowlist")
+
+    def test_denylist_wins_over_allowlist(self, blocklist):
+        assert ipfilter.check("10.0.0.5", allow=nets("10.0.0.0/8"), deny=nets("10.0.0.5")) == (False, "denylist")
+
+    def test_invalid_list_entries_are_ignored(self, blocklist):
+        assert ipfilter.check("41.66.0.1", allow=nets("41.66.0.1", "")) == (True, "allowlist")
+        assert ipfilter.check("41.66.0.2", allow=nets("41.66.0.1", "41.66.0.x")) == (False, "not_allowlisted")
+        assert ipfilter.check("41.66.0.2", deny=nets("", "10.0.0.0/8")) == (True, "no_match")
+
+    def test_views_compile_their_lists_once(self, blocklist, monkeypatch, rf):
+        class Hook(IPBlockerMixin, APIView):
+            WHITELIST_IPS = ["41.66.0.1", ""]
+
+            def get(self, request):
+                return Response({})
+
+        monkeypatch.setattr(ipfilter, "compile_networks", None)  # fails if a request compiles a list
+
+        assert Hook.as_view()(rf.get("/", REMOTE_ADDR="41.66.0.1")).status_code == 200
+        assert Hook.as_view()(rf.get("/", REMOTE_ADDR="41.66.0.2")).status_code == 403
+
+    def test_invalid_addresses_are_denied(self, blocklist):
+        assert ipfilter.check("not-an-ip") == (False, "unknown_ip")
+
+    def test_decisions_are_counted(self, blocklist):
+        IP_DECISIONS.clear()
+        ipfilter.check("10.1.1.1", allow=nets("10.0.0.0/8"), view="Hook")
+        ipfilter.check("11.1.1.1", allow=nets("10.0.0.0/8"), view="Hook")
+
+        assert IP_DECISIONS.value(view="Hook", decision="allowed", reason="allowlist") == 1
+        assert IP_DECISIONS.value(view="Hook", decision="blocked", reason="not_allowlisted") == 1
+
+
+class TestDynamicBlocklist:
+    def test_block_and_unblock(self, blocklist):
+        assert ipfilter.check("198.51.100.7")[0]
+
+        ipfilter.block("198.51.100.0/24", ttl=60)
+        assert ipfilter.check("198.51.100.7") == (False, "dynamic_blocklist")
+
+        assert ipfilter.unblock("198.51.100.0/24")
+        assert ipfilter.check("198.51.100.7")[0]
+
+    def test_updates_from_other_workers_are_picked_up(self, blocklist, fake_redis):
+        assert ipfilter.check("198.51.100.7")[0]
+        fake_redis.zadd(ipfilter.BLOCKLIST_KEY, {"198.51.100.7/32": 4102444800})
+
+        assert ipfilter.check("198.51.100.7")[0]  # not announced yet
+        blocklist.invalidate()  # what the subscriber does on a pub/sub message
+        assert not ipfilter.check("198.51.100.7")[0]
+
+    def test_keeps_the_last_list_when_redis_is_down(self, blocklist, monkeypatch):
+        ipfilter.block("198.51.100.0/24", ttl=60)
+        assert not ipfilter.check("198.51.100.7")[0]
+
+        monkeypatch.setattr(ipfilter, "get_redis", lambda: redis.Redis(port=1, socket_connect_timeout=0.1))
+        blocklist.invalidate()
+        assert not ipfilter.check("198.51.100.7")[0]
+
+    def test_command(self, blocklist):
+        out = io.StringIO()
+        call_command("ip_blocklist", "block", "203.0.113.0/24", "--ttl", "60", stdout=out)
+        call_command("ip_blocklist", "list", stdout=out)
+
+        assert "Blocked 203.0.113.0/24 for 60s" in out.getvalue()
+        assert "203.0.113.0/24\tuntil" in out.getvalue()
@@ -0,0 +1,144 @@
+import logging
+import threading
+
+import pytest
+
+from common import logqueue
+from common.logqueue import RECORDS_DROPPED, QueuedFileHandler
+
+
+def make_logger(handler, name):
+    handler.name = name
+    handler.setFormatter(logging.Formatter("{levelname} {message}", style="{"))
+    logger = logging.getLogger(f"test.logqueue.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    RECORDS_DROPPED.clear()
+    yield
+    RECORDS_DROPPED.clear()
+
+
+class TestQueuedFileHandler:
+    def test_writes_records_in_order(self, tmp_path):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path)
+        logger = make_logger(handler, "ordered")
+
+        for i in range(250):
+            logger.info("line %s", i)
+        handler.close()
+
+        assert path.read_text().splitlines() == [f"INFO line {i}" for i in range(250)]
+
+    def test_message_is_resolved_when_logged(self, tmp_path):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path)
+        logger = make_logger(handler, "args")
+
+        payload = {"status": "pending"}
+        logger.info("state %s", payload)
+        payload["status"] = "changed"
+        handler.close()
+
+        assert path.read_text() == "INFO state {'status': 'pending'}\n"
+
+    @pytest.mark.parametrize("overflow,expected", [
+        ("drop_new", ["first", "a", "b"]),
+        ("drop_oldest", ["first", "c", "d"]),
+    ])
+    def test_overflow(self, tmp_path, monkeypatch, overflow, expected):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path, maxsize=2, overflow=overflow)
+        logger = make_logger(handler, overflow)
+
+        # Stall the writer on its first batch so the queue fills up.
+        release, writing = threading.Event(), threading.Event()
+        emit_batch = handler.target.emit_batch
+
+        def stalled(records):
+            writing.set()
+            release.wait(5)
+            emit_batch(records)
+
+        monkeypatch.setattr(handler.target, "emit_batch", stalled)
+        logger.info("first")
+        assert writing.wait(5)
+        for message in ("a", "b", "c", "d"):
+            logger.info(message)
+        release.set()
+        handler.close()
+
+        assert [line.split(" ", 1)[1] for line in path.read_text().splitlines()] == expected
+        assert handler.dropped == 2
+        assert RECORDS_DROPPED.value(handler=overflow) == 2
+
+    def test_block_gives_up_after_the_timeout(self, tmp_path, monkeypatch):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path, maxsize=1, overflow="block", block_timeout=0.01)
+        logger = make_logger(handler, "block")
+
+        release, writing = threading.Event(), threading.Event()
+        emit_batch = handler.target.emit_batch
+
+        def stalled(records):
+            writing.set()
+            release.wait(5)
+            emit_batch(records)
+
+        monkeypatch.setattr(handler.target, "emit_batch", stalled)
+        logger.info("first")
+        assert writing.wait(5)
+        logger.info("queued")
+        logger.info("dropped")
+        release.set()
+        handler.close()
+
+        assert path.read_text().splitlines() == ["INFO first", "INFO queued"]
+        assert handler.dropped == 1
+
+    def test_block_without_timeout_waits_for_room(self, tmp_path, monkeypatch):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path, maxsize=1, overflow="block", block_timeout=None)
+        logger = make_logger(handler, "block_forever")
+
+        release, writing = threading.Event(), threading.Event()
+        emit_batch = handler.target.emit_batch
+
+        def stalled(records):
+            writing.set()
+            release.wait(5)
+            emit_batch(records)
+
+        monkeypatch.setattr(handler.target, "emit_batch", stalled)
+        logger.info("first")
+        assert writing.wait(5)
+        logger.info("queued")
+        threading.Timer(0.1, release.set).start()
+        logger.info("waited")
+        handler.close()
+
+        assert path.read_text().splitlines() == ["INFO first", "INFO queued", "INFO waited"]
+        assert handler.dropped == 0
+
+    def test_stop_writers_drains_without_closing(self, tmp_path):
+        path = tmp_path / "app.log"
+        handler = QueuedFileHandler(path)
+        logger = make_logger(handler, "stopped")
+
+        logger.info("before")
+        logqueue.stop_writers()
+        assert path.read_text() == "INFO before\n"
+
+        logger.info("after")
+        handler.close()
+        assert path.read_text().splitlines() == ["INFO before", "INFO after"]
+
+    def test_invalid_overflow_policy(self, tmp_path):
+        with pytest.raises(ValueError):
+            QueuedFileHandler(tmp_path / "app.log", overflow="spill")
@@ -0,0 +1,103 @@
+import json
+import time
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common import metrics, metrics_exporter
+from common.middleware.metrics import REQUEST_DB_QUERIES, REQUEST_LATENCY
+from oauth.models.user import User
+
+
+def other_process(client, pid, published_at, **metrics):
+    snap = {"published_at": published_at, "metrics": metrics}
+    client.set(metrics_exporter.PROCESS_KEY.format(pid), json.dumps(snap))
+    client.zadd(metrics_exporter.PROCESSES_KEY, {pid: published_at})
+
+
+@pytest.fixture
+def scraper(settings, fake_redis):
+    settings.METRICS = {**settings.METRICS, "allowed_ips": ["10.0.0.0/8"]}
+    return APIClient(REMOTE_ADDR="10.1.2.3")
+
+
+class TestMerge:
+    def snapshot(self, published_at=100.0):
+        registry = metrics.Registry()
+        registry.counter("jobs_total", "Jobs.", ["kind"]).inc(2, kind="a")
+        registry.gauge("in_flight", "In flight.").set(3)
+        registry.gauge("state", "State.", multiprocess_mode="max").set(2)
+        registry.histogram("latency", "Latency.", buckets=(0.1, 1.0)).observe(0.5)
+        return {**metrics_exporter.snapshot(registry), "published_at": published_at}
+
+    def test_sums_counters_histograms_and_gauges(self):
+        merged = metrics_exporter.merge([self.snapshot(), self.snapshot()], live_window=60, now=100.0)
+
+        assert merged["jobs_total"]["samples"] == {("a",): 4}
+        assert merged["in_flight"]["samples"] == {(): 6}
+        assert merged["state"]["samples"] == {(): 2}
+        assert merged["latency"]["samples"] == {(): [0, 2, 0, 1.0]}
+
+    def test_dead_processes_keep_counters_but_not_gauges(self):
+        merged = metrics_exporter.merge([self.snapshot(100.0), self.snapshot(10.0)], live_window=60, now=100.0)
+
+        assert merged["jobs_total"]["samples"] == {("a",): 4}
+        assert merged["in_flight"]["samples"] == {(): 3}
+
+    def test_renders_prometheus_text(self):
+        text = metrics_exporter.render(metrics_exporter.merge([self.snapshot()], live_window=60, now=100.0))
+
+        assert "# TYPE jobs_total counter\njobs_total{kind=\"a\"} 2\n" in text
+        assert 'latency_bucket{le="0.1"} 0\nlatency_bucket{le="1.0"} 1\nlatency_bucket{le="+Inf"} 1\n' in text
+        assert "latency_sum 0.5\nlatency_count 1\n" in text
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_aggregates_every_process(self, scraper, fake_redis):
+        other_process(
+            fake_redis, "web-2:42", time.time(),
+            provider_rejections_total={
+                "type": "counter", "help": "Calls rejected before reaching the provider.",
+                "labelnames": ["provider", "endpoint", "reason"],
+                "samples": [[["bulkclix", "momopay", "circuit_open"], 7]],
+            },
+        )
+
+        response = scraper.get(reverse("metrics"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.content.decode()
+        assert 'provider_rejections_total{provider="bulkclix",endpoint="momopay",reason="circuit_open"} 7' in body
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert fake_redis.zscore(metrics_exporter.PROCESSES_KEY, metrics_exporter.process_id())
+
+    def test_rejects_other_ips(self, scraper):
+        assert APIClient(REMOTE_ADDR="192.168.0.5").get(reverse("metrics")).status_code in (401, 403)
+
+    def test_admins_may_scrape_from_anywhere(self, scraper):
+        client = APIClient(REMOTE_ADDR="192.168.0.5")
+        client.force_authenticate(
+            User.objects.create_user(email="m@example.com", password="x", phone_number="0240000000", role="admin")
+        )
+
+        assert client.get(reverse("metrics")).status_code == 200
+
+
+@pytest.mark.django_db
+class TestMetricsMiddleware:
+    def test_records_latency_and_queries_per_view(self, fake_redis):
+        REQUEST_LATENCY.clear()
+        REQUEST_DB_QUERIES.clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email="q@example.com", password="x", phone_number="0240000000"))
+
+        client.get(reverse("main:transactions"))
+        client.get("/api/v1/does-not-exist")
+
+        assert REQUEST_LATENCY.count(view="main:transactions", method="GET", status="2xx") == 1
+        assert REQUEST_LATENCY.count(view="unresolved", method="GET", status="4xx") == 1
+        [queries] = REQUEST_DB_QUERIES.samples()[("main:transactions", "GET")][-1:]
+        assert queries >= 1
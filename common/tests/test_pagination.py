@@ -0,0 +1,157 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common import pagination
+from giftcards.models import GiftCardType, RedeemedGiftCard
+from main.models import AccountTransaction, FiatAccount
+from oauth.models.user import User
+
+
+@pytest.fixture
+def history(fake_redis):
+    """A user with 25 transactions; pairs of them share a `created_at`."""
+    user = User.objects.create_user(email="h@example.com", password="x", phone_number="0240000000")
+    account = FiatAccount.objects.create(owner=user, currency="USD", account_role="user")
+    now = timezone.now()
+    for i in range(25):
+        tx = AccountTransaction.objects.create(
+            account=account, transaction_type="deposit", amount=Decimal(i), status="success", currency="USD",
+        )
+        AccountTransaction.objects.filter(pk=tx.pk).update(created_at=now - timedelta(seconds=i // 2))
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def expected_order():
+    return list(AccountTransaction.objects.order_by("-created_at", "-id").values_list("reference_id", flat=True))
+
+
+def walk(client, url, key):
+    seen, pages = [], 0
+    while url:
+        data = client.get(url).json()["data"]
+        seen += [row["reference_id"] for row in data["results"]]
+        url = data[key]
+        pages += 1
+    return seen, pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_pages_forward_through_ties_without_gaps(self, history):
+        seen, pages = walk(history, reverse("main:transactions") + "?pagination=cursor&page_size=4", "next")
+
+        assert seen == expected_order()
+        assert pages == 7
+
+    def test_pages_backward(self, history):
+        url = reverse("main:transactions") + "?pagination=cursor&page_size=4"
+        for _ in range(3):
+            url = history.get(url).json()["data"]["next"]
+        last_page = history.get(url).json()["data"]
+
+        seen, _ = walk(history, last_page["previous"], "previous")
+
+        assert seen == [ref for chunk in [expected_order()[i:i + 4] for i in (8, 4, 0)] for ref in chunk]
+
+    def test_response_has_no_count(self, history):
+        data = history.get(reverse("main:transactions") + "?pagination=cursor").json()["data"]
+
+        assert set(data) == {"next", "previous", "results"}
+        assert data["previous"] is None
+        assert len(data["results"]) == 10
+
+    def test_deep_pages_run_one_query_without_offset(self, history):
+        url = reverse("main:transactions") + "?pagination=cursor&page_size=4"
+        for _ in range(4):
+            url = history.get(url).json()["data"]["next"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            history.get(url)
+
+        selects = [q["sql"] for q in ctx.captured_queries if 'FROM "main_accounttransaction"' in q["sql"]]
+        assert len(selects) == 1
+        assert "OFFSET" not in selects[0] and "COUNT(" not in selects[0]
+
+    def test_invalid_cursor(self, history):
+        response = history.get(reverse("main:transactions") + "?cursor=bm9wZQ")
+
+        assert response.status_code == 404
+
+    def test_page_numbers_stay_the_default(self, history):
+        data = history.get(reverse("main:transactions")).json()["data"]
+
+        assert data["count"] == 25
+        assert "page=2" in data["next"]
+
+
+@pytest.mark.django_db
+def test_views_can_key_on_another_timestamp(fake_redis):
+    user = User.objects.create_user(email="g@example.com", password="x", phone_number="0240000000")
+    gc_type = GiftCardType.objects.create(name="Type", desc="d", category="FASHION", denominations=[10])
+    for i in range(3):
+        RedeemedGiftCard.objects.create(
+            giftcard_type=gc_type, code=f"R{i}", amount_claimed=10, amount_confirmed=0, redeemed_by=user,
+            redeemed_at=timezone.now() - timedelta(minutes=i), exchange_rate=1, status="pending",
+        )
+    client = APIClient()
+    client.force_authenticate(user)
+
+    first = client.get(reverse("giftcards:redeemed-gift-card") + "?pagination=cursor&page_size=2").json()["data"]
+    second = client.get(first["next"]).json()["data"]
+
+    assert [row["code"] for row in first["results"] + second["results"]] == ["R0", "R1", "R2"]
+    assert second["next"] is None
+
+
+@pytest.fixture
+def admin_client(fake_redis, settings):
+    settings.PASSWORD_HASHING = {**settings.PASSWORD_HASHING, "iterations": 1000}
+    client = APIClient()
+    client.force_authenticate(
+        User.objects.create_user(email="admin@example.com", password="x", phone_number="0240000001", role="admin")
+    )
+    for i in range(12):
+        User.objects.create_user(email=f"u{i}@example.com", password="x", phone_number="0240000000")
+    return client
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPagination:
+    def test_no_estimates_without_postgres(self):
+        assert pagination.estimate_count(User.objects.all()) is None
+
+    def test_small_estimates_use_the_exact_count(self, admin_client, monkeypatch):
+        monkeypatch.setattr(pagination, "estimate_count", lambda queryset: 50)
+
+        data = admin_client.get("/api/v1/admin/users/").json()
+
+        assert data["count"] == 13
+        assert data["count_is_approximate"] is False
+
+    def test_large_estimates_are_flagged(self, admin_client, monkeypatch):
+        monkeypatch.setattr(pagination, "estimate_count", lambda queryset: 2_000_000)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = admin_client.get("/api/v1/admin/users/").json()
+
+        assert data["count"] == 2_000_000
+        assert data["count_is_approximate"] is True
+        assert not [q for q in ctx.captured_queries if "COUNT(" in q["sql"]]
+
+    def test_pages_follow_the_rows_not_the_estimate(self, admin_client, monkeypatch):
+        monkeypatch.setattr(pagination, "estimate_count", lambda queryset: 2_000_000)
+
+        last = admin_client.get("/api/v1/admin/users/?page=2").json()
+
+        assert len(last["results"]) == 3
+        assert last["next"] is None
+        assert admin_client.get("/api/v1/admin/users/?page=3").status_code == 404
@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.queryinspector import QueryBudgetExceeded, query_budget, shape
+from giftcards.models import GiftCard, GiftCardType, RedeemedGiftCard
+from giftcards.views import RedeemedGiftCardListView
+from oauth.models.user import User
+
+
+def make_types(n):
+    types = [
+        GiftCardType.objects.create(name=f"Type {i}", desc="d", category="FASHION", denominations=[10])
+        for i in range(n)
+    ]
+    for i, gc_type in enumerate(types):
+        GiftCard.objects.create(giftcard_type=gc_type, code=f"A{i}", amount=Decimal("10"), is_redeemed=True)
+        GiftCard.objects.create(giftcard_type=gc_type, code=f"B{i}", amount=Decimal("20"))
+    return types
+
+
+@pytest.fixture
+def user(fake_redis):
+    return User.objects.create_user(email="q@example.com", password="x", phone_number="0240000000")
+
+
+class TestShape:
+    def test_folds_literals_and_in_lists(self):
+        assert shape('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "n" = 5 AND "s" = \'a\'') == (
+            'SELECT * FROM "t" WHERE "id" IN (...) AND "n" = ? AND "s" = ?'
+        )
+
+
+@pytest.mark.django_db
+class TestQueryInspector:
+    def test_debug_header_reports_repeated_queries(self, user, settings, monkeypatch):
+        settings.DEBUG = True
+        gc_type = make_types(1)[0]
+        for i in range(4):
+            RedeemedGiftCard.objects.create(
+                giftcard_type=gc_type, code=f"R{i}", amount_claimed=10, amount_confirmed=0,
+                redeemed_by=user, redeemed_at=timezone.now(), exchange_rate=1, status="pending",
+            )
+        # Undo the view's select_related to reintroduce the N+1.
+        monkeypatch.setattr(
+            RedeemedGiftCardListView, "get_queryset",
+            lambda self: RedeemedGiftCard.objects.filter(redeemed_by=self.request.user).order_by("-redeemed_at"),
+        )
+        monkeypatch.setattr(RedeemedGiftCardListView, "query_budget", None)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get(reverse("giftcards:redeemed-gift-card"))
+
+        assert response.status_code == 200
+        assert "repeated=1" in response["X-DB-Queries"]
+
+    def test_no_header_outside_debug(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        assert "X-DB-Queries" not in client.get(reverse("giftcards:redeemed-gift-card"))
+
+    def test_exceeding_a_budget_fails(self, user, monkeypatch):
+        monkeypatch.setattr(RedeemedGiftCardListView, "query_budget", 0)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with pytest.raises(QueryBudgetExceeded, match="over its budget of 0"):
+            client.get(reverse("giftcards:redeemed-gift-card"))
+
+    def test_budget_is_logged_when_not_enforced(self, user, settings, monkeypatch):
+        settings.QUERY_INSPECTOR = {**settings.QUERY_INSPECTOR, "enforce_budgets": False}
+        monkeypatch.setattr(RedeemedGiftCardListView, "query_budget", 0)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        assert client.get(reverse("giftcards:redeemed-gift-card")).status_code == 200
+
+
+def test_decorator_marks_views_and_handlers():
+    @query_budget(5)
+    class View:
+        @query_budget(1)
+        def get(self):
+            pass
+
+    assert View.query_budget == 5
+    assert View.get.query_budget == 1
+
+
+@pytest.mark.django_db
+class TestViewBudgets:
+    """The budgets hold regardless of how many rows are listed."""
+
+    def test_admin_gift_card_types(self, fake_redis):
+        make_types(5)
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(email="a@example.com", password="x", phone_number="0240000001", role="admin")
+        )
+
+        response = client.get("/api/v1/admin/giftcard-types/")
+
+        assert response.status_code == 200
+        assert sorted((t["revenue"], t["codes_available"], t["codes_redeemed"]) for t in response.json()) == (
+            [(10.0, 1, 1)] * 5
+        )
+
+    def test_admin_gift_cards(self, fake_redis):
+        make_types(5)
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(email="a@example.com", password="x", phone_number="0240000001", role="admin")
+        )
+
+        assert client.get("/api/v1/admin/giftcards/").status_code == 200
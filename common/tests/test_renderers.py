@@ -0,0 +1,88 @@
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers as drf_renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from common import renderers
+from oauth.models.user import User
+
+
+PAYLOAD = {
+    "amount": Decimal("1234.567890123456789012"),
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "at": datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+    "label": gettext_lazy("Deposit"),
+    1: "non-string key",
+    "note": "line separator",
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(renderers, "orjson", None)
+    return request.param
+
+
+class TestJSONRenderer:
+    def test_matches_drf_output(self, backend):
+        expected = json.loads(drf_renderers.JSONRenderer().render(PAYLOAD))
+        rendered = renderers.JSONRenderer().render(PAYLOAD)
+
+        assert json.loads(rendered) == expected
+        assert json.loads(rendered)["at"] == "2025-01-02T03:04:05.123456Z"
+        assert b"\\u2028" in rendered
+
+    def test_none_renders_empty(self, backend):
+        assert renderers.JSONRenderer().render(None) == b""
+
+
+class TestJSONParser:
+    def test_parses(self, backend):
+        assert renderers.JSONParser().parse(io.BytesIO(b'{"amount": "1.50", "n": [1, 2]}')) == {"amount": "1.50", "n": [1, 2]}
+
+    def test_accepts_what_the_stdlib_accepts(self, backend):
+        assert renderers.JSONParser().parse(io.BytesIO(b'{"s": "\\ud800"}')) == {"s": "\ud800"}
+
+    def test_invalid_json(self, backend):
+        with pytest.raises(ParseError):
+            renderers.JSONParser().parse(io.BytesIO(b'{"n": NaN}'))
+
+
+@pytest.mark.django_db
+class TestResponseEnvelope:
+    def test_envelope_is_added_at_render_time(self, fake_redis):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email="r@example.com", password="x", phone_number="0240000000"))
+
+        response = client.get(reverse("main:transactions"))
+
+        assert "results" in response.data
+        assert response.json() == {
+            "status": True,
+            "message": "Fetched successfully",
+            "data": {"count": 0, "next": None, "previous": None, "results": []},
+        }
+
+    def test_errors_keep_their_envelope(self, fake_redis):
+        response = APIClient().post(reverse("oauth:login"), {"email": "x@example.com", "password": "x"}, format="json")
+
+        assert response.json() == {"status": False, "message": "Invalid credentials", "data": None}
+
+
+def test_benchmark_command():
+    out = io.StringIO()
+    call_command("benchmark_json", "--rows", "5", "--iterations", "2", "--json", stdout=out)
+
+    results = json.loads(out.getvalue())
+    assert results["rows"] == 5
+    assert results["render"]["fast_us"] > 0
@@ -0,0 +1,97 @@
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common.middleware import request_logging
+from common.middleware.request_logging import redact
+from oauth.models.user import User
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+@pytest.fixture
+def logged(settings, fake_redis):
+    settings.REQUEST_LOGGING = {**settings.REQUEST_LOGGING, "format": "json", "sample_rate": 1.0, "sample_rates": {}}
+    handler = ListHandler()
+    request_logging.logger.addHandler(handler)
+    yield handler.lines
+    request_logging.logger.removeHandler(handler)
+
+
+def entries(lines):
+    return [json.loads(line) for line in lines]
+
+
+class TestRedact:
+    def test_redacts_nested_fields_in_one_walk(self):
+        data = {"email": "a@b.c", "password": "x", "payment": {"pin": "1", "Token": "t", "items": [{"secret": "s"}]}}
+
+        assert redact(data, 100, 10) == {
+            "email": "a@b.c",
+            "password": "[REDACTED]",
+            "payment": {"pin": "1", "Token": "[REDACTED]", "items": [{"secret": "[REDACTED]"}]},
+        }
+
+    def test_caps_strings_and_lists(self):
+        assert redact({"note": "x" * 10, "ids": list(range(5))}, 4, 2) == {"note": "xxxx...", "ids": [0, 1]}
+
+
+@pytest.mark.django_db
+class TestJSONRequestLogging:
+    def test_logs_compact_json_with_drf_parsed_body(self, logged):
+        APIClient().post(reverse("oauth:login"), {"email": "nobody@example.com", "password": "hunter2"}, format="json")
+
+        [entry] = entries(logged)
+        assert entry["method"] == "POST"
+        assert entry["route"] == "oauth:login"
+        assert entry["status"] == 401
+        assert entry["body"] == {"email": "nobody@example.com", "password": "[REDACTED]"}
+        assert "Cookie" not in entry.get("headers", {})
+        assert "hunter2" not in logged[0]
+
+    def test_sampling_skips_successful_requests(self, logged, settings):
+        settings.REQUEST_LOGGING = {**settings.REQUEST_LOGGING, "sample_rates": {"main:transactions": 0.0}}
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email="log@example.com", password="x", phone_number="0240000000"))
+
+        assert client.get(reverse("main:transactions")).status_code == 200
+        client.get("/api/v1/does-not-exist")
+
+        routes = [entry["route"] for entry in entries(logged)]
+        assert routes == [None]  # only the 404
+
+    def test_errors_and_money_movement_are_always_logged(self, logged, settings):
+        settings.REQUEST_LOGGING = {**settings.REQUEST_LOGGING, "sample_rate": 0.0}
+        client = APIClient()
+
+        client.post(reverse("oauth:login"), {"email": "nobody@example.com", "password": "x"}, format="json")
+        client.post(reverse("main:withdraw"), {}, format="json")
+
+        assert [entry["route"] for entry in entries(logged)] == ["oauth:login", "main:withdraw"]
+
+    def test_large_bodies_are_truncated(self, logged, settings):
+        settings.REQUEST_LOGGING = {**settings.REQUEST_LOGGING, "max_body_bytes": 64, "max_value_length": 1000}
+
+        APIClient().post(reverse("oauth:login"), {"email": "a" * 500 + "@example.com", "password": "x"}, format="json")
+
+        [entry] = entries(logged)
+        assert isinstance(entry["body"], str)
+        assert len(entry["body"]) == 64
+        assert entry["body_size"] > 500
+
+    def test_text_format_is_still_available(self, logged, settings):
+        settings.REQUEST_LOGGING = {**settings.REQUEST_LOGGING, "format": "text"}
+
+        APIClient().post(reverse("oauth:login"), {"email": "nobody@example.com", "password": "x"}, format="json")
+
+        assert logged[0].startswith("POST /api/v1/auth/login/ | Status: 401")
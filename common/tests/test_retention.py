@@ -0,0 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from common import retention
+from main.models import AccountTransaction
+from oauth.models.otp import OTP, hash_otp
+from oauth.models.user import User
+
+
+def make_otps(count, age):
+    otps = OTP.objects.bulk_create([
+        OTP(user=f"user{i}@example.com", code_hash=hash_otp("123456"), purpose="signup") for i in range(count)
+    ])
+    # updated_at is auto_now; age the rows directly
+    OTP.objects.filter(pk__in=[o.pk for o in otps]).update(updated_at=timezone.now() - age)
+
+
+def make_tokens(user, count, expires_in, blacklisted=False):
+    for i in range(count):
+        token = OutstandingToken.objects.create(
+            user=user, jti=f"{expires_in.total_seconds()}-{i}", token="x",
+            created_at=timezone.now(), expires_at=timezone.now() + expires_in,
+        )
+        if blacklisted:
+            BlacklistedToken.objects.create(token=token)
+
+
+@pytest.mark.django_db
+class TestRetention:
+    @pytest.fixture(autouse=True)
+    def fast(self, settings):
+        settings.RETENTION = {**settings.RETENTION, "pause": 0}
+
+    def test_expired_rows_are_purged_in_chunks(self):
+        make_otps(5, timedelta(days=2))
+        make_otps(2, timedelta(minutes=1))
+
+        [report] = retention.run_retention(["otp"], chunk_size=2, lock_budget=60)
+
+        assert report["purged"] == 5
+        assert report["chunks"] == 2  # 2 rows, then the other 3 in a chunk grown to 4
+        assert report["rows"] == 2
+        assert report["complete"] is True
+        assert OTP.objects.count() == 2
+
+    def test_chunks_shrink_when_over_lock_budget(self):
+        make_otps(4, timedelta(days=2))
+
+        [report] = retention.run_retention(["otp"], chunk_size=4, lock_budget=0)
+
+        assert report["purged"] == 4
+        assert report["chunks"] == 1
+        assert OTP.objects.count() == 0
+
+    def test_time_limit_leaves_the_rest_for_the_next_run(self):
+        make_otps(3, timedelta(days=2))
+
+        [report] = retention.run_retention(["otp"], chunk_size=1, max_seconds=0)
+
+        assert report == {**report, "purged": 1, "complete": False}
+        assert OTP.objects.count() == 2
+
+    def test_expired_jwt_blacklist_rows_are_purged(self):
+        user = User.objects.create_user(email="a@example.com", password="x", phone_number="1")
+        make_tokens(user, 3, timedelta(hours=-1), blacklisted=True)
+        make_tokens(user, 2, timedelta(hours=1), blacklisted=True)
+
+        reports = retention.run_retention(["blacklisted_tokens", "outstanding_tokens"])
+
+        assert [r["purged"] for r in reports] == [3, 3]
+        assert BlacklistedToken.objects.count() == 2
+        assert OutstandingToken.objects.count() == 2
+
+    def test_only_old_failed_transactions_without_ledger_entries_are_purged(self):
+        old = timezone.now() - timedelta(days=365)
+        for status, created_at in [("failed", old), ("failed", timezone.now()), ("success", old)]:
+            tx = AccountTransaction.objects.create(
+                transaction_type="withdrawal", amount=Decimal("1.00"), status=status, currency="USD",
+            )
+            AccountTransaction.objects.filter(pk=tx.pk).update(created_at=created_at)
+
+        [report] = retention.run_retention(["failed_transactions"])
+
+        assert report["purged"] == 1
+        assert AccountTransaction.objects.count() == 2
+
+    def test_dry_run_counts_without_deleting(self):
+        make_otps(3, timedelta(days=2))
+
+        [report] = retention.run_retention(["otp"], dry_run=True)
+
+        assert report["purged"] == 3
+        assert OTP.objects.count() == 3
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            retention.run_retention(["sessions"])
+
+    def test_command_reports_rows_and_sizes(self, capsys):
+        make_otps(2, timedelta(days=2))
+        call_command("purge_expired", "otp")
+        out = capsys.readouterr().out
+        assert "oauth_otp" in out
+        assert OTP.objects.count() == 0
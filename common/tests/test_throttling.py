@@ -0,0 +1,54 @@
+import pytest
+import redis
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common import ratelimit
+from common.throttling import THROTTLE_REQUESTS
+
+
+@pytest.fixture
+def metrics_reset():
+    THROTTLE_REQUESTS.clear()
+    yield
+    THROTTLE_REQUESTS.clear()
+
+
+def failed_login(client):
+    return client.post(reverse("oauth:login"), {"email": "nobody@example.com", "password": "wrong"}, format="json")
+
+
+@pytest.mark.django_db
+class TestRedisThrottles:
+    def test_login_scope_limits_attempts(self, fake_redis, metrics_reset):
+        client = APIClient()
+        statuses = [failed_login(client).status_code for _ in range(6)]
+
+        assert statuses[:5] == [401] * 5
+        assert statuses[5] == 429
+        assert THROTTLE_REQUESTS.value(scope="login", result="throttled") == 1
+
+    def test_limit_is_shared_across_clients_of_the_same_ip(self, fake_redis):
+        for _ in range(5):
+            failed_login(APIClient())
+
+        # A fresh client (e.g. served by another worker) draws from the same bucket.
+        response = failed_login(APIClient())
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+
+    def test_scopes_are_independent(self, fake_redis):
+        client = APIClient()
+        for _ in range(5):
+            failed_login(client)
+
+        response = client.post(reverse("oauth:resend-otp"), {}, format="json")
+        assert response.status_code != 429
+
+    def test_fails_open_without_redis(self, monkeypatch):
+        def unavailable():
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(ratelimit, "get_redis", unavailable)
+        client = APIClient()
+        assert all(failed_login(client).status_code == 401 for _ in range(7))
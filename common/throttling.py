@@ -0,0 +1,51 @@
+"""
+DRF throttles backed by the shared Redis token buckets in `common.ratelimit`.
+
+DRF's own throttles keep a request history list per client in the default
+cache, which is per worker process, so limits multiplied with the worker count.
+Here a rate of `N/period` is a token bucket of capacity N refilled at N per
+period. The bucket is shared by every worker and updated atomically. Like the
+buckets themselves, throttling fails open when Redis is unreachable.
+
+Views opt into a dedicated limit with `throttle_scope`, for example
+`throttle_scope = "withdraw"`; the rates live in `DEFAULT_THROTTLE_RATES`.
+"""
+from rest_framework import throttling
+
+from common import metrics
+from common.ratelimit import TokenBucket
+
+
+THROTTLE_REQUESTS = metrics.counter(
+    "throttle_requests_total", "Requests checked by a throttle, by scope and outcome.", ["scope", "result"]
+)
+
+
+class RedisRateThrottle(throttling.SimpleRateThrottle):
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        bucket = TokenBucket(key, rate=self.num_requests / self.duration, capacity=self.num_requests)
+        allowed, self.wait_seconds = bucket.consume()
+        THROTTLE_REQUESTS.inc(scope=self.scope, result="allowed" if allowed else "throttled")
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, RedisRateThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, RedisRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, RedisRateThrottle):
+    pass
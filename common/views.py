@@ -1,3 +1,44 @@
-from django.shortcuts import render
+from functools import lru_cache
 
-# Create your views here.
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from ipware import get_client_ip
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+
+from common import ipfilter, metrics_exporter
+from oauth.permissions import IsAdmin
+
+
+@lru_cache(maxsize=None)
+def get_scraper_networks():
+    """`METRICS['allowed_ips']` compiled once per process."""
+    return ipfilter.compile_networks(metrics_exporter.get_metrics_config()["allowed_ips"])
+
+
+@receiver(setting_changed, dispatch_uid="common.views.clear_scraper_networks")
+def clear_scraper_networks(sender, setting, **kwargs):
+    if setting == "METRICS":
+        get_scraper_networks.cache_clear()
+
+
+class IsMetricsScraper(BasePermission):
+    """Allows clients whose IP is in `METRICS['allowed_ips']` (addresses or CIDR ranges)."""
+
+    def has_permission(self, request, view):
+        client_ip, _ = get_client_ip(request)
+        address = ipfilter.parse_address(client_ip) if client_ip else None
+        if address is None:
+            return False
+        return get_scraper_networks().match(address)
+
+
+class MetricsView(APIView):
+    """Prometheus scrape target. Open to admins and to the scraper's IP allowlist."""
+
+    permission_classes = [IsMetricsScraper | IsAdmin]
+    throttle_classes = []
+
+    def get(self, request):
+        return HttpResponse(metrics_exporter.export(), content_type=metrics_exporter.CONTENT_TYPE)
@@ -1,9 +1,13 @@
-
 from __future__ import absolute_import, unicode_literals
 import os
+import time
+from datetime import datetime
 from celery import Celery
+from celery.signals import before_task_publish, celeryd_init, task_postrun, task_prerun, worker_process_shutdown
 from decouple import config
 
+from common import logqueue, metrics, metrics_exporter
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev' if config('DEBUG', default=False, cast=bool) else 'config.settings.prod')
 
 app = Celery('reachvault')
@@ -11,3 +15,99 @@ app = Celery('reachvault')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
+
+
+# Worker settings per task class, selected with CELERY_WORKER_PROFILE.
+# Short latency-sensitive tasks get many slots and no prefetch so a slow task never
+# holds an OTP hostage; bulk work prefetches for throughput; money movement runs
+# few at a time and is only acknowledged once it has finished.
+WORKER_PROFILES = {
+    'otp': {'queues': ['otp'], 'concurrency': 8, 'prefetch_multiplier': 1, 'acks_late': False},
+    'bulk': {'queues': ['bulk', 'default'], 'concurrency': 4, 'prefetch_multiplier': 8, 'acks_late': False},
+    'financial': {'queues': ['financial'], 'concurrency': 2, 'prefetch_multiplier': 1, 'acks_late': True},
+}
+
+TASK_QUEUE_WAIT = metrics.histogram(
+    'celery_task_queue_wait_seconds', 'Time between a task being published (or its ETA) and a worker starting it.',
+    ['task', 'queue'], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+TASK_RUNTIME = metrics.histogram(
+    'celery_task_runtime_seconds', 'Task execution time.', ['task', 'queue', 'state'],
+)
+
+
+def get_worker_profile(name=None):
+    name = name if name is not None else os.environ.get('CELERY_WORKER_PROFILE', '')
+    if not name:
+        return None
+    try:
+        return WORKER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown CELERY_WORKER_PROFILE '{name}'. Expected one of {', '.join(WORKER_PROFILES)}.")
+
+
+@celeryd_init.connect
+def apply_worker_profile(sender=None, instance=None, conf=None, options=None, **kwargs):
+    """Applies the worker profile. Explicit command line options (-Q, -c, ...) still win."""
+    profile = get_worker_profile()
+    if profile is None:
+        return
+
+    options = options or {}
+    if not options.get('concurrency'):
+        conf.worker_concurrency = profile['concurrency']
+    if not options.get('prefetch_multiplier'):
+        conf.worker_prefetch_multiplier = profile['prefetch_multiplier']
+    conf.task_acks_late = profile['acks_late']
+    conf.task_reject_on_worker_lost = profile['acks_late']
+    if not options.get('queues'):
+        instance.app.amqp.queues.select(profile['queues'])
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('enqueued_at', time.time())
+
+
+def _queue_name(task):
+    return (task.request.delivery_info or {}).get('routing_key') or ''
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    request = task.request
+    request.started_at = time.perf_counter()
+
+    enqueued_at = getattr(request, 'enqueued_at', None)
+    if not enqueued_at:
+        return
+    ready_at = enqueued_at
+    if request.eta:
+        # Don't count a deliberate countdown as queueing delay.
+        eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+        ready_at = max(enqueued_at, eta.timestamp())
+    TASK_QUEUE_WAIT.observe(max(0.0, time.time() - ready_at), task=task.name, queue=_queue_name(task))
+
+
+@task_postrun.connect
+def record_runtime(task=None, state=None, **kwargs):
+    started_at = getattr(task.request, 'started_at', None)
+    if started_at is None:
+        return
+    TASK_RUNTIME.observe(
+        time.perf_counter() - started_at, task=task.name, queue=_queue_name(task), state=state or 'UNKNOWN'
+    )
+    metrics_exporter.maybe_publish()
+
+
+@worker_process_shutdown.connect
+def publish_final_metrics(**kwargs):
+    """Pushes the last snapshot so counts since the previous publish aren't lost."""
+    metrics_exporter.publish()
+
+
+@worker_process_shutdown.connect
+def stop_log_writers(**kwargs):
+    """Prefork children exit with os._exit, skipping logging.shutdown(): write out what is queued."""
+    logqueue.stop_writers()
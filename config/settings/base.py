@@ -14,6 +14,8 @@ from pathlib import Path
 from decouple import config, Csv
 # import dj_database_url
 from datetime import timedelta
+from celery.schedules import crontab
+from kombu import Queue
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,9 +49,13 @@ INSTALLED_APPS = [
     'giftcards',
     'main',
     'django_filters',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'common.middleware.metrics.MetricsMiddleware',  # Request latency and DB query metrics, outermost so it times everything
+    'common.middleware.request_id.RequestIDMiddleware',  # X-Request-ID for matching request and error log lines
+    'common.middleware.query_inspector.QueryInspectorMiddleware',  # N+1 detection and query budgets (dev/test only)
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -144,17 +150,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Config
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'oauth.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.JSONRenderer',     # orjson, applies the response envelope
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'common.renderers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'common.throttling.AnonRateThrottle',
+        'common.throttling.UserRateThrottle',
+        'common.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '10/minute',     # anonymous users
-        'user': '100/minute',    # logged-in users (organizers)
+        'anon': '10/minute',       # anonymous users
+        'user': '100/minute',      # logged-in users (organizers)
+        'login': '5/minute',       # password logins, per IP
+        'otp_verify': '10/minute', # OTP guesses, per IP
+        'otp_resend': '3/minute',  # OTP emails, per IP
+        'deposit': '10/minute',    # per user
+        'withdraw': '5/minute',    # per user
+        'redeem': '10/minute',     # gift card redemptions, per user
+        'name_enquiry': '20/hour', # wallet holder names, per user
     },
     'EXCEPTION_HANDLER': 'utils.exceptions.custom_exception_handler',
 }
@@ -179,6 +202,60 @@ SIMPLE_JWT = {
 }
 
 
+# Prometheus metrics aggregated across processes (common.metrics_exporter)
+METRICS = {
+    'enabled': config('METRICS_ENABLED', default=True, cast=bool),  # publish per-process snapshots to Redis
+    'allowed_ips': config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv()),  # scrapers; CIDR ranges allowed
+    'publish_interval': 15,          # seconds between a process's snapshots to Redis
+    'live_window': 60,               # gauges only come from processes that published this recently
+    'process_ttl': 86400,            # snapshots of processes that stopped publishing are dropped after this
+}
+
+# Dynamic IP blocklist shared through Redis (common.ipfilter)
+IP_FILTER = {
+    'sync_interval': 30,             # seconds between reloads of the dynamic blocklist, on top of pub/sub updates
+    'subscribe': True,               # listen for blocklist updates on Redis pub/sub
+}
+
+# N+1 detection and per-view query budgets (common.middleware.query_inspector)
+QUERY_INSPECTOR = {
+    'enabled': config('QUERY_INSPECTOR', default=False, cast=bool),  # record every query of a request
+    'repeat_threshold': 3,           # same query shape this many times in one request is reported as an N+1
+    'enforce_budgets': False,        # raise instead of log when a view exceeds its @query_budget
+}
+
+# Structured, deduplicated exception logging (common.errorlog)
+EXCEPTION_LOGGING = {
+    'suppress_window': 60,           # seconds an identical error is logged once; repeats are counted
+    'max_tracked': 1000,             # distinct errors remembered per process
+    'message_length': 200,           # exception messages are cut to this many characters
+}
+
+# Request logging (common.middleware.request_logging). 'json' writes one compact,
+# redacted line per request and samples successful requests; 'text' logs every request.
+REQUEST_LOGGING = {
+    'format': config('REQUEST_LOG_FORMAT', default='json'),
+    'sample_rate': 1.0,              # share of successful requests logged
+    'sample_rates': {                # per URL name, e.g. 'main:transactions': 0.1
+        'main:dashboard': 0.1,
+        'main:transactions': 0.1,
+        'giftcards:gift-card-types-list': 0.1,
+    },
+    'always_log': [                  # money movement: logged whatever the sample rate
+        'main:deposit',
+        'main:withdraw',
+        'main:confirm-deposit-wh',
+        'giftcards:redeem-gift-card',
+        'giftcards:buy-gift-card',
+    ],
+    'headers': ['User-Agent', 'Content-Type', 'Content-Length'],
+    'max_body_bytes': 2048,          # longer bodies are logged truncated, with their size
+    'max_value_length': 256,         # per string value
+    'max_items': 20,                 # per list
+}
+
+# File handlers only enqueue; a writer thread per handler formats and writes in
+# batches (common.logqueue). Queues hold `maxsize` records (default 10000).
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -191,27 +268,30 @@ LOGGING = {
     'handlers': {
         'request_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'common.logqueue.QueuedFileHandler',
             'filename': BASE_DIR / '../logs/requests.log',
             'formatter': 'verbose',
+            'overflow': 'drop_oldest',     # request lines are the most expendable
         },
         'bulkclix_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'common.logqueue.QueuedFileHandler',
             'filename': BASE_DIR / '../logs/services.log',
             'formatter': 'verbose',
         },
         'error_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'common.logqueue.QueuedFileHandler',
             'filename': BASE_DIR / '../logs/error.log',
             'formatter': 'verbose',
         },
         'transaction_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'common.logqueue.QueuedFileHandler',
             'filename': BASE_DIR / '../logs/transactions.log',
             'formatter': 'verbose',
+            'overflow': 'block',           # wait for room rather than lose ledger lines
+            'block_timeout': None,
         },
     },
     'loggers': {
@@ -238,12 +318,12 @@ LOGGING = {
     },
 }
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = config("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 EMAIL_HOST = config("EMAIL_HOST", default="smtp.hostinger.com")
 EMAIL_PORT = config("EMAIL_PORT", default=465, cast=int)
 EMAIL_USE_TLS = False
-EMAIL_USE_SSL = True
+EMAIL_USE_SSL = config("EMAIL_USE_SSL", default=True, cast=bool)
 EMAIL_HOST_USER = config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = "reach <no-reply@reachvault.io>"
@@ -270,3 +350,181 @@ TEST_RUNNER = "django.test.runner.DiscoverRunner"
 CELERY_BROKER_URL = f'redis://{config('REDIS_HOST')}:{config('REDIS_PORT')}/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+
+# Tasks are split by latency class so an OTP never waits behind a bulk fan-out.
+# Each class gets its own worker (see WORKER_PROFILES in config/celery.py):
+#   celery -A config worker -Q otp        (CELERY_WORKER_PROFILE=otp)
+#   celery -A config worker -Q bulk       (CELERY_WORKER_PROFILE=bulk)
+#   celery -A config worker -Q financial  (CELERY_WORKER_PROFILE=financial)
+# A worker started without a profile or -Q consumes every queue.
+CELERY_TASK_QUEUES = [Queue(name) for name in ('otp', 'financial', 'bulk', 'default')]
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = {
+    # OTP / MFA
+    'services.services.send_email': {'queue': 'otp', 'priority': 0},
+    'notifications.tasks.flush_sms_queue': {'queue': 'otp', 'priority': 0},
+    # notifications, statements, sweeps
+    'notifications.tasks.*': {'queue': 'bulk'},
+    'main.tasks.purge_expired_rows': {'queue': 'bulk'},
+    # payouts, webhooks, reconciliation
+    'main.tasks.*': {'queue': 'financial'},
+}
+# Honour task priorities within a queue on the Redis broker (0 is highest)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': [0, 3, 5, 9],
+    'sep': ':',
+}
+
+# Shared application state (circuit breakers, bulkheads, ...) lives in its own Redis DB
+REDIS_URL = config('REDIS_URL', default=f'redis://{config('REDIS_HOST')}:{config('REDIS_PORT')}/1')
+
+# Users resolved for JWT requests (oauth.user_cache). Changes to a user reach every
+# worker within `local_ttl` seconds.
+AUTH_USER_CACHE = {
+    'local_ttl': 5,
+    'redis_ttl': 300,
+    'version_ttl': 86400,            # version stamps expire this long after their last bump; must exceed redis_ttl
+    'max_entries': 10000,            # users kept per worker; the least recently used are evicted
+}
+
+# Password hashing (oauth.hashers). Changing 'iterations' re-hashes each password on
+# its owner's next login.
+PASSWORD_HASHERS = [
+    'oauth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'iterations': config('PASSWORD_HASH_ITERATIONS', default=1_000_000, cast=int),  # PBKDF2-SHA256 rounds
+    'max_workers': config('PASSWORD_HASH_WORKERS', default=4, cast=int),             # Hash threads for async logins
+}
+
+# Blacklisted refresh-token JTIs are kept in a per-worker Bloom filter (oauth.tokens);
+# only filter hits are checked against the blacklist table.
+JWT_BLACKLIST_FILTER = {
+    'capacity': 100_000,       # Expected live blacklisted tokens (grows on rebuild if exceeded)
+    'error_rate': 0.001,       # False positives that cost a database check
+    'rebuild_interval': 300,   # Seconds between rebuilds from the database
+    'clock_skew': 5,           # Seconds of overlap when resuming the Redis feed after a rebuild
+}
+
+# OTPs live in Redis with native expiry ('redis') or in the OTP table ('database').
+# The table is also used whenever Redis is unreachable.
+OTP_BACKEND = config('OTP_BACKEND', default='redis')
+OTP_TTL = 300                        # seconds an OTP stays valid; a resend restarts it
+
+# Per-provider resilience settings used by services.resilience
+PROVIDER_RESILIENCE = {
+    'bulkclix': {
+        'timeout': 15,               # seconds before a single HTTP call is abandoned
+        'failure_threshold': 5,      # failures within the window that open the circuit
+        'failure_window': 60,        # seconds
+        'reset_timeout': 30,         # seconds an open circuit waits before a half-open probe
+        'max_concurrent': 20,        # bulkhead: in-flight calls across all workers
+    },
+    'arkesel': {
+        'timeout': 10,
+        'failure_threshold': 5,
+        'failure_window': 60,
+        'reset_timeout': 30,
+        'max_concurrent': 10,
+    },
+}
+
+# SMS dispatch (notifications.sms)
+SMS_DISPATCH = {
+    'coalesce_window': 2,            # seconds bulk messages wait so identical bodies share a call
+    'batch_size': 1000,              # messages drained per flush
+    'max_recipients_per_call': 100,
+    'rate': 5,                       # Arkesel send calls per second across all workers
+    'burst': 10,
+    'rate_limit_wait': 5,            # seconds to wait for a token before re-queueing
+    'max_attempts': 3,
+    'stale_after': 300,              # seconds before an undispatched message is re-queued
+}
+
+# Batched email delivery (notifications.email)
+EMAIL_DISPATCH = {
+    'coalesce_window': 5,            # seconds queued emails wait to share an SMTP connection
+    'batch_size': 500,               # emails sent per connection/flush
+    'max_attempts': 3,
+    'stale_after': 600,              # seconds before emails claimed by an unfinished flush are re-queued
+}
+
+# Deposit webhook inbox (main.webhooks)
+WEBHOOK_INBOX = {
+    'max_attempts': 5,               # transient failures before an event is marked failed
+    'stale_after': 60,               # seconds before a pending event is re-scheduled
+}
+
+# Mobile-money name enquiry (main.beneficiaries)
+NAME_ENQUIRY = {
+    'cache_ttl': 86400,              # seconds a resolved name is reused for any user
+    'negative_ttl': 300,             # seconds a "no wallet" answer is remembered
+    'beneficiary_ttl': 30 * 86400,   # seconds a saved beneficiary's name is trusted without a lookup
+}
+
+# Reconciliation of pending mobile-money transactions (main.reconciliation)
+RECONCILIATION = {
+    'older_than': 900,               # seconds a transaction must have been pending
+    'chunk_size': 200,               # transactions loaded and looked up per page
+    'max_workers': 5,                # concurrent status calls to Bulkclix
+}
+
+# Bulk onboarding of partner users (main.onboarding)
+ONBOARDING = {
+    'chunk_size': 1000,              # users hashed and inserted per transaction
+    'workers': 4,                    # password-hashing processes for the command (1 = in-line)
+    'endpoint_workers': 1,           # same, for the admin upload endpoint
+    'max_upload_rows': 20,           # hashed within the request; larger imports go through `manage.py onboard_users`
+    'max_errors': 100,               # invalid rows listed in a report
+}
+
+# Retention (common.retention): rows older than `days` by `field` are purged in chunks
+RETENTION = {
+    'chunk_size': 1000,              # initial rows per delete; adapts to the lock budget
+    'max_chunk_size': 10000,
+    'lock_budget': 0.5,              # seconds a single chunk delete may take
+    'pause': 0.05,                   # seconds between chunks
+    'max_seconds': 300,              # per policy per run
+    'policies': {
+        'otp': {'model': 'oauth.OTP', 'field': 'updated_at', 'days': 1},
+        'blacklisted_tokens': {'model': 'token_blacklist.BlacklistedToken', 'field': 'token__expires_at', 'days': 0},
+        'outstanding_tokens': {'model': 'token_blacklist.OutstandingToken', 'field': 'expires_at', 'days': 0},
+        # Failed attempts never reached the ledger; anything that did is kept.
+        'failed_transactions': {
+            'model': 'main.AccountTransaction',
+            'field': 'created_at',
+            'days': 180,
+            'filters': {'status': 'failed', 'entries__isnull': True},
+        },
+    },
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'sweep-sms-queue': {
+        'task': 'notifications.tasks.sweep_sms_queue',
+        'schedule': 60.0,
+    },
+    'sweep-email-queue': {
+        'task': 'notifications.tasks.sweep_email_queue',
+        'schedule': 60.0,
+    },
+    'sweep-webhook-inbox': {
+        'task': 'main.tasks.sweep_webhook_inbox',
+        'schedule': 60.0,
+    },
+    'reconcile-pending-transactions': {
+        'task': 'main.tasks.reconcile_pending_transactions',
+        'schedule': 900.0,
+    },
+    'purge-expired-rows': {
+        'task': 'main.tasks.purge_expired_rows',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
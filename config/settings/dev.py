@@ -9,4 +9,9 @@ ALLOWED_HOSTS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Fake payment/SMS/email providers: `python manage.py simulate_providers`
+INSTALLED_APPS += ['simulator']
+
+QUERY_INSPECTOR = {**QUERY_INSPECTOR, 'enabled': True}
+
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
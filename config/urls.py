@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from common.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/v1/', include('oauth.urls', namespace='oauth')),
     path('api/v1/admin/', include('superadmin.urls', namespace='superadmin')),
     path('api/v1/giftcards/', include('giftcards.urls', namespace='giftcards')),
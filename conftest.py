@@ -0,0 +1,19 @@
+import fakeredis
+import pytest
+
+from common import redis_client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Points `common.redis_client.get_redis()` at an in-memory Redis for the test."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_client", client)
+    yield client
+    client.flushall()
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Fails any test whose request runs more queries than its view's `@query_budget`."""
+    settings.QUERY_INSPECTOR = {**settings.QUERY_INSPECTOR, "enabled": True, "enforce_budgets": True}
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('giftcards', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='redeemedgiftcard',
+            index=models.Index(fields=['redeemed_at', 'id'], name='giftcards_redeemed_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='redeemedgiftcard',
+            index=models.Index(fields=['redeemed_by', 'redeemed_at', 'id'], name='giftcards_user_keyset_idx'),
+        ),
+    ]
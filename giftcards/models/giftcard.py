@@ -59,5 +59,12 @@ class RedeemedGiftCard(models.Model): # To track redeemed gift cards and commiss
     exchange_rate = models.DecimalField(max_digits=5, decimal_places=2)
     status = models.CharField(choices=STATUS_CHOICES, max_length=10, default='pending')
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of redemption history (common.pagination.KeysetPagination)
+            models.Index(fields=["redeemed_at", "id"], name="giftcards_redeemed_keyset_idx"),
+            models.Index(fields=["redeemed_by", "redeemed_at", "id"], name="giftcards_user_keyset_idx"),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.amount_confirmed}"
@@ -1,5 +1,5 @@
 from django.shortcuts import render
-from common.pagination import StandardResultsSetPagination
+from common.pagination import HistoryPagination, StandardResultsSetPagination
 from giftcards.models.giftcard import GiftCard, GiftCardType, RedeemedGiftCard
 from giftcards.serializers import GiftCardTypeSerializer, GiftCardsSerializer, RedeemedGiftCardSerializer
 from main.models.account import Account
@@ -8,9 +8,10 @@ from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework.exceptions import ValidationError
 from common.mixins.response import StandardResponseView
+from common.queryinspector import query_budget
 from django.utils import timezone
 import logging
-from services.services import send_email
+from notifications.email import queue_email
 from decouple import config
 from django.shortcuts import get_object_or_404
 
@@ -22,6 +23,7 @@ class RedeemGiftCardView(StandardResponseView):
     API view to redeem a gift card.
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = "redeem"
     success_message = "Gift card redemption initiated successfully. Please wait while we verify your gift card."
 
     def post(self, request, *args, **kwargs):
@@ -56,7 +58,7 @@ class RedeemGiftCardView(StandardResponseView):
 
         # Send email notification to user about order being processed
         try:
-            send_email.delay(
+            queue_email(
                 subject="Processing Order",
                 template_name="emails/giftcard_redemption_order_placed.html",
                 context={"order_id": card.id, "type": gc_type.name, "amount_claim":amount},
@@ -67,7 +69,7 @@ class RedeemGiftCardView(StandardResponseView):
 
         #nofity admin for manual verification
         try:
-            send_email.delay(
+            queue_email(
                 subject="New Gift Card Redemption Request",
                 template_name="emails/admin_giftcardredemption.html",
                 context={"order_id": card.id, "type": gc_type.name},
@@ -78,18 +80,21 @@ class RedeemGiftCardView(StandardResponseView):
 
         return Response('Please wait, the gift card is being verified.', status=status.HTTP_200_OK)
 
+@query_budget(2)
 class RedeemedGiftCardListView(StandardResponseView, generics.ListAPIView):
     """
     API view to list all redeemed gift cards for the authenticated user.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = RedeemedGiftCardSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = HistoryPagination
+    keyset_ordering = ('-redeemed_at', '-id')
 
     def get_queryset(self):
-        return RedeemedGiftCard.objects.filter(redeemed_by=self.request.user).order_by('-redeemed_at')
+        return RedeemedGiftCard.objects.filter(redeemed_by=self.request.user).select_related('redeemed_by').order_by('-redeemed_at')
 
 
+@query_budget(2)
 class GiftCardsListView(StandardResponseView, generics.ListAPIView):
     """
     API view to list all active gift card types.
@@ -99,7 +104,7 @@ class GiftCardsListView(StandardResponseView, generics.ListAPIView):
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        return GiftCard.objects.filter(redeemed_by=self.request.user.email).order_by('redeemed_at')
+        return GiftCard.objects.filter(redeemed_by=self.request.user.email).select_related('giftcard_type').order_by('redeemed_at')
 
 
 class GiftCardTypesListView(StandardResponseView, generics.ListAPIView):
@@ -0,0 +1,112 @@
+"""
+Mobile-money name enquiry and saved beneficiaries.
+
+`resolve_account_name()` answers from, in order:
+
+1. the user's saved beneficiary, while its verification is younger than `beneficiary_ttl`;
+2. a Redis cache keyed by network and number, for `cache_ttl` seconds
+   (numbers without a wallet are remembered for `negative_ttl`);
+3. a Bulkclix name-enquiry call.
+
+Withdrawals record the wallet as a beneficiary, so repeat payouts to the same
+wallet skip the provider call entirely.
+"""
+import logging
+import re
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from common import metrics
+from common.redis_client import get_redis
+from main.models import Beneficiary
+from services.services import get_account_name
+
+
+logger = logging.getLogger("error")
+
+NAME_LOOKUPS = metrics.counter(
+    "name_enquiry_lookups_total", "Account name lookups by where the answer came from.", ["source"]
+)
+
+
+def get_name_enquiry_config():
+    return settings.NAME_ENQUIRY
+
+
+def normalize_number(account_number):
+    """Local format (0XXXXXXXXX) so that 233... and 0... numbers share a cache entry."""
+    digits = re.sub(r"\D", "", account_number or "")
+    if digits.startswith("233") and len(digits) == 12:
+        digits = "0" + digits[3:]
+    return digits
+
+
+def cache_key(network, account_number):
+    return f"name_enquiry:{network}:{account_number}"
+
+
+def resolve_account_name(network, account_number, user=None):
+    """
+    Returns `(account_name, source)` for a wallet, where source is "beneficiary",
+    "cache" or "provider". `account_name` is None when the number has no wallet.
+
+    Provider errors (`requests.RequestException`, `ProviderUnavailableError`) propagate.
+    """
+    conf = get_name_enquiry_config()
+    account_number = normalize_number(account_number)
+
+    if user is not None:
+        beneficiary = Beneficiary.objects.filter(
+            owner=user,
+            network=network,
+            account_number=account_number,
+            verified_at__gte=timezone.now() - timedelta(seconds=conf["beneficiary_ttl"]),
+        ).only("account_name").first()
+        if beneficiary:
+            NAME_LOOKUPS.inc(source="beneficiary")
+            return beneficiary.account_name, "beneficiary"
+
+    key = cache_key(network, account_number)
+    try:
+        cached = get_redis().get(key)
+    except redis.RedisError as e:
+        logger.warning("Name enquiry cache unavailable: %s", str(e))
+        cached = None
+    if cached is not None:
+        NAME_LOOKUPS.inc(source="cache")
+        return cached or None, "cache"
+
+    name = get_account_name(account_number, network)
+    NAME_LOOKUPS.inc(source="provider")
+    try:
+        get_redis().set(key, name or "", ex=conf["cache_ttl"] if name else conf["negative_ttl"])
+    except redis.RedisError:
+        pass
+    return name, "provider"
+
+
+def record_beneficiary(user, network, account_number, account_name, verified=True):
+    """
+    Saves or bumps the wallet in the user's beneficiaries after a withdrawal.
+    `verified` means the provider was asked for `account_name` just now; a name
+    from the cache counts as verified `cache_ttl` ago, the oldest it can be.
+    """
+    now = timezone.now()
+    verified_at = now if verified else now - timedelta(seconds=get_name_enquiry_config()["cache_ttl"])
+    account_number = normalize_number(account_number)
+    beneficiary, created = Beneficiary.objects.get_or_create(
+        owner=user,
+        network=network,
+        account_number=account_number,
+        defaults={"account_name": account_name, "verified_at": verified_at, "use_count": 1, "last_used_at": now},
+    )
+    if not created:
+        changes = {"use_count": F("use_count") + 1, "last_used_at": now, "updated_at": now}
+        if verified:
+            changes.update(account_name=account_name, verified_at=now)
+        Beneficiary.objects.filter(pk=beneficiary.pk).update(**changes)
+    return beneficiary
@@ -0,0 +1,94 @@
+import io
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import parsers, renderers
+
+from common import renderers as fast
+from main.models import AccountTransaction
+from main.serializers import TransactionSerializer
+
+
+def transaction_page(rows):
+    """A `transactions/` response body: one page of `rows` transactions in the envelope."""
+    now = timezone.now()
+    transactions = [
+        AccountTransaction(
+            transaction_type="deposit",
+            direction="mobile_money_to_account",
+            amount=Decimal("1234.567890123456789012"),
+            status="success",
+            currency="USD",
+            description=f"Mobile money deposit {i}",
+            created_at=now,
+        )
+        for i in range(rows)
+    ]
+    return {
+        "status": True,
+        "message": "Fetched successfully",
+        "data": {
+            "count": rows * 10,
+            "next": "https://api.example.com/api/v1/transactions/?page=2",
+            "previous": None,
+            "results": TransactionSerializer(transactions, many=True).data,
+        },
+    }
+
+
+def best_of(func, iterations, repeat=5):
+    """Best average seconds per call over `repeat` runs of `iterations` calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - started) / iterations)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's stdlib JSON renderer/parser with common.renderers on the transaction list payload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Transactions in the payload (max page size is 100).")
+        parser.add_argument("--iterations", type=int, default=500, help="Calls per timing run.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        payload = transaction_page(options["rows"])
+        iterations = options["iterations"]
+        body = renderers.JSONRenderer().render(payload)
+
+        candidates = {
+            "render": (
+                lambda: renderers.JSONRenderer().render(payload),
+                lambda: fast.JSONRenderer().render(payload),
+            ),
+            "parse": (
+                lambda: parsers.JSONParser().parse(io.BytesIO(body)),
+                lambda: fast.JSONParser().parse(io.BytesIO(body)),
+            ),
+        }
+
+        results = {"backend": "orjson" if fast.orjson else "stdlib", "rows": options["rows"], "bytes": len(body)}
+        for name, (baseline, candidate) in candidates.items():
+            before = best_of(baseline, iterations)
+            after = best_of(candidate, iterations)
+            results[name] = {
+                "stdlib_us": round(before * 1e6, 1),
+                "fast_us": round(after * 1e6, 1),
+                "speedup": round(before / after, 1),
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['rows']} transactions, {results['bytes']} bytes, backend: {results['backend']}")
+        for name in candidates:
+            r = results[name]
+            self.stdout.write(f"  {name:7} stdlib {r['stdlib_us']:>9} us   fast {r['fast_us']:>9} us   x{r['speedup']}")
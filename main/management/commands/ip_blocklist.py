@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import ipfilter
+
+
+class Command(BaseCommand):
+    help = "List, add or remove dynamic IP blocks. Changes reach every worker without a redeploy."
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest="action", required=True)
+        block = subcommands.add_parser("block", help="Deny an address or CIDR range.")
+        block.add_argument("network")
+        block.add_argument("--ttl", type=int, default=3600, help="Seconds until the block expires.")
+        unblock = subcommands.add_parser("unblock", help="Lift a block.")
+        unblock.add_argument("network")
+        subcommands.add_parser("list", help="Show the live blocks.")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        try:
+            if action == "block":
+                if options["ttl"] <= 0:
+                    raise CommandError("--ttl must be positive.")
+                network = ipfilter.block(options["network"], options["ttl"])
+                self.stdout.write(f"Blocked {network} for {options['ttl']}s")
+            elif action == "unblock":
+                if not ipfilter.unblock(options["network"]):
+                    raise CommandError(f"{options['network']} is not blocked.")
+                self.stdout.write(f"Unblocked {options['network']}")
+            else:
+                for network, expires_at in sorted(ipfilter.blocked_networks().items()):
+                    until = datetime.fromtimestamp(expires_at, timezone.utc).isoformat(timespec="seconds")
+                    self.stdout.write(f"{network}\tuntil {until}")
+        except ValueError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = "Purge expired OTPs, JWT blacklist rows and old failed transactions per settings.RETENTION, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("policies", nargs="*", help="Policies to run (default: all).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the expired rows.")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Initial rows per delete.")
+        parser.add_argument("--lock-budget", type=float, default=None, help="Seconds a single chunk delete may take.")
+        parser.add_argument("--max-seconds", type=float, default=None, help="Time limit per policy.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            reports = run_retention(
+                options["policies"],
+                dry_run=options["dry_run"],
+                chunk_size=options["chunk_size"],
+                lock_budget=options["lock_budget"],
+                max_seconds=options["max_seconds"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2))
+            return
+
+        verb = "expired" if options["dry_run"] else "purged"
+        self.stdout.write(f"{'policy':22} {'table':36} {verb:>10} {'rows':>12} {'size':>12}")
+        for report in reports:
+            if "error" in report:
+                self.stdout.write(f"{report['policy']:22} {report['table']:36} error: {report['error']}")
+                continue
+            size = report["size_bytes"]
+            self.stdout.write(
+                f"{report['policy']:22} {report['table']:36} {report['purged']:>10} {report['rows']:>12} "
+                f"{(f'{size / 1024 / 1024:.1f} MB' if size is not None else '-'):>12}"
+                f"{'' if report['complete'] else '  (time limit reached)'}"
+            )
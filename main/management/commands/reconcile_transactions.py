@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from main.reconciliation import reconcile_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Check pending mobile-money deposits and withdrawals against Bulkclix, confirm the settled ones "
+        "and print a discrepancy report. Set BULKCLIX_BASE_URL to run against `simulate_providers`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=None, help="Only transactions pending for at least this many seconds.")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Transactions loaded and looked up per page.")
+        parser.add_argument("--concurrency", type=int, default=None, help="Concurrent status calls to Bulkclix.")
+        parser.add_argument("--dry-run", action="store_true", help="Report only, don't confirm anything.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        report = reconcile_pending(
+            older_than=options["older_than"],
+            chunk_size=options["chunk_size"],
+            max_workers=options["concurrency"],
+            dry_run=options["dry_run"],
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"checked {report['checked']}, resolved {report['resolved']}, still pending {report['pending']}, "
+            f"discrepancies {len(report['discrepancies'])}"
+        )
+        for issue in report["discrepancies"]:
+            self.stdout.write(
+                f"  {issue['transaction_id']}  {issue['transaction_type']:10} ref={issue['reference']}  {issue['issue']}"
+                f"  local={issue['local_status']}/{issue['local_amount']}"
+                f"  provider={issue['provider_status']}/{issue['provider_amount']}  {issue['detail']}"
+            )
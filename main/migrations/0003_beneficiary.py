@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_webhookevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Beneficiary',
+            fields=[
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('network', models.CharField(max_length=20)),
+                ('account_number', models.CharField(max_length=15)),
+                ('account_name', models.CharField(max_length=255)),
+                ('verified_at', models.DateTimeField()),
+                ('use_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='beneficiaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-use_count', '-last_used_at'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'network', 'account_number'), name='unique_beneficiary_per_owner')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_beneficiary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['created_at', 'id'], name='main_tx_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['account', 'created_at', 'id'], name='main_tx_account_keyset_idx'),
+        ),
+    ]
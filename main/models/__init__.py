@@ -1 +1,3 @@
-from .account import Account, AccountTransaction, FiatAccount, CryptoAccount, Ledger
\ No newline at end of file
+from .account import Account, AccountTransaction, FiatAccount, CryptoAccount, Ledger
+from .beneficiary import Beneficiary
+from .webhook import WebhookEvent
\ No newline at end of file
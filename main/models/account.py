@@ -911,6 +911,9 @@ class AccountTransaction(TimeStampedModel):
     class Meta:
         indexes = [
             models.Index(fields=["reference_id"]),
+            # Keyset pagination of transaction history (common.pagination.KeysetPagination)
+            models.Index(fields=["created_at", "id"], name="main_tx_created_keyset_idx"),
+            models.Index(fields=["account", "created_at", "id"], name="main_tx_account_keyset_idx"),
         ]
 
     
@@ -0,0 +1,27 @@
+import uuid
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from common.models.common import TimeStampedModel
+
+
+class Beneficiary(TimeStampedModel):
+    """A mobile-money wallet a user has withdrawn to, with its verified account name."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="beneficiaries")
+    network = models.CharField(max_length=20)
+    account_number = models.CharField(max_length=15)
+    account_name = models.CharField(max_length=255)
+    verified_at = models.DateTimeField()
+    use_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "network", "account_number"], name="unique_beneficiary_per_owner"),
+        ]
+        ordering = ["-use_count", "-last_used_at"]
+
+    def __str__(self):
+        return f"{self.account_name} ({self.network} {self.account_number})"
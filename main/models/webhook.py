@@ -0,0 +1,39 @@
+import uuid
+from django.db import models
+
+from common.models.common import TimeStampedModel
+
+
+class WebhookEvent(TimeStampedModel):
+    """
+    Raw provider callback stored before any processing.
+
+    The unique `ext_transaction_id` makes provider retries a no-op insert; the
+    event is then applied to its transaction by `main.webhooks.process_transaction_events`.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),  # transaction already settled or unknown
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    provider = models.CharField(max_length=20, default='bulkclix')
+    ext_transaction_id = models.CharField(max_length=100, unique=True)
+    # Not a foreign key: the webhook is acknowledged without touching the transaction table.
+    transaction_id = models.UUIDField(db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} webhook {self.ext_transaction_id} ({self.status})"
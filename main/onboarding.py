@@ -0,0 +1,177 @@
+"""
+Bulk onboarding of users migrated from partner platforms.
+
+`onboard(rows)` takes an iterable of dicts (usually a `csv.DictReader` over the
+uploaded file, so the input is streamed) with the columns `email`,
+`first_name`, `last_name`, `phone_number` and, optionally, `password`. Rows
+are processed in chunks of `chunk_size`:
+
+1. rows without an email, repeated in the input or already registered are
+   skipped (so are rows whose email is registered by a signup while the chunk
+   is being hashed);
+2. passwords are hashed in a process pool of `workers` processes (one process
+   hashes in-line), since PBKDF2 is CPU-bound;
+3. the users, their `Account` rows and the `FiatAccount` rows are inserted with
+   three bulk inserts in one transaction, using account numbers allocated up
+   front instead of `Account.save()`'s retry-on-collision loop.
+
+Onboarded users are marked verified and get their fiat account straight away,
+as they would after confirming their signup OTP. Users without a password get
+an unusable one and can set it through a password reset.
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+
+from main.models.account import Account, FiatAccount, generate_account_number
+from oauth.models.user import User
+
+
+logger = logging.getLogger("transactions")
+
+FIELDS = ("email", "first_name", "last_name", "phone_number")
+
+
+def get_onboarding_config():
+    return settings.ONBOARDING
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def allocate_account_numbers(count):
+    """Returns `count` account numbers that are unused at the time of the call."""
+    numbers = set()
+    while len(numbers) < count:
+        candidates = {generate_account_number() for _ in range(count - len(numbers))}
+        taken = set(Account.objects.filter(account_number__in=candidates).values_list("account_number", flat=True))
+        numbers |= candidates - taken
+    return list(numbers)
+
+
+def _insert_children(model, parents):
+    """`bulk_create()` refuses multi-table children; their rows only hold the parent link."""
+    ptr = model._meta.pk
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {qn(model._meta.db_table)} ({qn(ptr.column)}) VALUES (%s)",
+            [(ptr.get_db_prep_value(parent.pk, connection),) for parent in parents],
+        )
+
+
+def _registered(emails):
+    """The (lowercased) emails among `emails` that already have a user."""
+    return {email.lower() for email in User.objects.filter(email__in=emails).values_list("email", flat=True)}
+
+
+def _insert(users, currency):
+    """Inserts `users` with their accounts. Returns the users skipped because their email got registered meanwhile."""
+    skipped = []
+    collisions = 0
+    while users:
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                accounts = [
+                    Account(owner=user, account_number=number, currency=currency)
+                    for user, number in zip(users, allocate_account_numbers(len(users)))
+                ]
+                Account.objects.bulk_create(accounts)
+                _insert_children(FiatAccount, accounts)
+            return skipped
+        except IntegrityError:
+            registered = _registered([user.email for user in users])
+            if registered:
+                # A signup took some of the emails since they were checked; insert the rest.
+                skipped += [user for user in users if user.email.lower() in registered]
+                users = [user for user in users if user.email.lower() not in registered]
+            else:
+                # An account number was taken by a concurrent signup; allocate again.
+                collisions += 1
+                if collisions == 3:
+                    raise
+            for user in users:
+                user.pk = None
+                user._state.adding = True
+    return skipped
+
+
+def _validate(row, seen):
+    email = User.objects.normalize_email((row.get("email") or "").strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None, "invalid email"
+    if email.lower() in seen:
+        return None, "duplicate email"
+    seen.add(email.lower())
+    return {field: (row.get(field) or "").strip() for field in FIELDS} | {"email": email}, None
+
+
+def onboard(rows, chunk_size=None, workers=None, currency="USD"):
+    """Creates users with fiat accounts from `rows`. Returns a report with throughput."""
+    if currency not in dict(Account.CURRENCY_CHOICES):
+        raise ValueError(f"Unknown currency {currency}.")
+
+    conf = get_onboarding_config()
+    chunk_size = chunk_size or conf["chunk_size"]
+    workers = conf["workers"] if workers is None else workers
+
+    report = {"rows": 0, "created": 0, "skipped": 0, "invalid": 0, "errors": []}
+    started = time.monotonic()
+    seen = set()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers > 1 else None
+
+    try:
+        for number, chunk in enumerate(_chunks(rows, chunk_size)):
+            offset = number * chunk_size
+            valid = []
+            for index, row in enumerate(chunk, start=offset + 1):
+                data, error = _validate(row, seen)
+                if error:
+                    report["invalid"] += 1
+                    if len(report["errors"]) < conf["max_errors"]:
+                        report["errors"].append({"row": index, "error": error})
+                    continue
+                valid.append((data, row.get("password") or None))
+            report["rows"] += len(chunk)
+
+            existing = _registered([data["email"] for data, _ in valid])
+            valid = [(data, password) for data, password in valid if data["email"].lower() not in existing]
+            report["skipped"] += len(existing)
+            if not valid:
+                continue
+
+            passwords = [password for _, password in valid]
+            if pool:
+                hashes = list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+            else:
+                hashes = [make_password(password) for password in passwords]
+
+            users = [
+                User(**data, password=hashed, role="user", email_verified=True)
+                for (data, _), hashed in zip(valid, hashes)
+            ]
+            skipped = _insert(users, currency)
+            report["skipped"] += len(skipped)
+            report["created"] += len(users) - len(skipped)
+            logger.info("Onboarded %s users (%s rows read)", report["created"], report["rows"])
+    finally:
+        if pool:
+            pool.shutdown()
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    report["users_per_second"] = round(report["created"] / report["seconds"], 1) if report["seconds"] else None
+    return report
@@ -0,0 +1,175 @@
+"""
+Reconciliation of pending mobile-money transactions against Bulkclix.
+
+Pending deposits and withdrawals older than `older_than` seconds are paged
+through in primary-key order, `chunk_size` rows at a time. Each chunk is looked
+up at Bulkclix with at most `max_workers` concurrent status calls. The provider
+bulkhead still caps the calls across workers.
+
+A settled deposit is fed into the webhook inbox as if its callback had arrived
+and goes through the normal `deposit_confirm` path. Anything that cannot be
+resolved that way ends up in the report's `discrepancies`.
+"""
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from common import metrics
+from main import webhooks
+from main.models import AccountTransaction
+from services.resilience import ProviderUnavailableError
+from services.services import check_transaction_status
+
+
+logger = logging.getLogger("transactions")
+
+MOBILE_MONEY_DIRECTIONS = ("mobile_money_to_account", "account_to_mobile_money")
+
+RECONCILED = metrics.counter(
+    "reconciliation_transactions_total", "Pending transactions checked by reconciliation, by outcome.",
+    ["transaction_type", "outcome"],
+)
+
+
+def get_reconciliation_config():
+    return settings.RECONCILIATION
+
+
+def provider_reference(tx):
+    """The reference Bulkclix knows the transaction by, as `(reference_type, reference)`."""
+    if tx.transaction_type == "deposit":
+        return "transaction_id", tx.reference_id
+    return "client_reference", (tx.metadata or {}).get("client_reference")
+
+
+def pending_transactions(older_than, chunk_size):
+    """Yields lists of pending mobile-money transactions created more than `older_than` seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    queryset = AccountTransaction.objects.filter(
+        status="pending",
+        transaction_type__in=("deposit", "withdrawal"),
+        direction__in=MOBILE_MONEY_DIRECTIONS,
+        created_at__lt=cutoff,
+    ).order_by("id")
+
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def lookup(tx):
+    """Returns `(tx, provider_record, error)` for one transaction."""
+    reference_type, reference = provider_reference(tx)
+    if not reference:
+        return tx, None, "no provider reference"
+    try:
+        return tx, check_transaction_status(reference, reference_type), None
+    except (requests.RequestException, ProviderUnavailableError, ValueError) as e:
+        return tx, None, str(e) or e.__class__.__name__
+
+
+def amounts_match(tx, record):
+    try:
+        return Decimal(str(record.get("amount"))) >= tx.amount
+    except (InvalidOperation, TypeError):
+        return False
+
+
+def discrepancy(tx, issue, record=None, detail=""):
+    record = record or {}
+    return {
+        "transaction_id": str(tx.id),
+        "transaction_type": tx.transaction_type,
+        "reference": provider_reference(tx)[1],
+        "issue": issue,
+        "local_status": tx.status,
+        "local_amount": str(tx.amount),
+        "provider_status": record.get("status"),
+        "provider_amount": record.get("amount"),
+        "detail": detail,
+    }
+
+
+def resolve(tx, record, error, dry_run=False):
+    """
+    Applies one provider lookup. Returns `(outcome, discrepancy_or_None)` where
+    outcome is "resolved", "pending" or "discrepancy".
+    """
+    if error:
+        return "discrepancy", discrepancy(tx, "lookup_failed", detail=error)
+    if record is None:
+        return "discrepancy", discrepancy(tx, "missing_at_provider")
+
+    provider_status = record.get("status")
+    if provider_status not in ("success", "failed"):
+        return "pending", None
+    if provider_status == "success" and not amounts_match(tx, record):
+        return "discrepancy", discrepancy(tx, "amount_mismatch", record)
+
+    if tx.transaction_type != "deposit":
+        # Payouts are settled when they are sent; a pending one needs a person to look at it.
+        return "discrepancy", discrepancy(tx, f"withdrawal_{provider_status}_at_provider", record)
+    if dry_run:
+        return "resolved", None
+
+    webhooks.record_webhook(
+        tx.id,
+        {
+            "status": provider_status,
+            "amount": str(record.get("amount")),
+            "transaction_id": tx.reference_id,
+            "ext_transaction_id": record.get("ext_transaction_id") or f"reconciliation:{tx.reference_id}",
+            "source": "reconciliation",
+        },
+        schedule=False,
+    )
+    webhooks.process_transaction_events(tx.id)
+
+    tx.refresh_from_db(fields=["status"])
+    if tx.status == "pending":
+        return "discrepancy", discrepancy(tx, "confirm_failed", record, detail="See the webhook event for the error.")
+    return "resolved", None
+
+
+def reconcile_pending(older_than=None, chunk_size=None, max_workers=None, dry_run=False) -> dict:
+    """
+    Reconciles pending mobile-money transactions with Bulkclix and returns a report:
+
+        {"checked", "resolved", "pending", "discrepancies": [...]}
+    """
+    conf = get_reconciliation_config()
+    older_than = conf["older_than"] if older_than is None else older_than
+    chunk_size = chunk_size or conf["chunk_size"]
+    max_workers = max_workers or conf["max_workers"]
+
+    outcomes = Counter()
+    discrepancies = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for chunk in pending_transactions(older_than, chunk_size):
+            for tx, record, error in pool.map(lookup, chunk):
+                outcome, issue = resolve(tx, record, error, dry_run=dry_run)
+                outcomes[outcome] += 1
+                RECONCILED.inc(transaction_type=tx.transaction_type, outcome=outcome)
+                if issue:
+                    discrepancies.append(issue)
+
+    for issue in discrepancies:
+        logger.warning("Reconciliation discrepancy for %s: %s", issue["transaction_id"], issue["issue"])
+
+    return {
+        "checked": sum(outcomes.values()),
+        "resolved": outcomes["resolved"],
+        "pending": outcomes["pending"],
+        "discrepancies": discrepancies,
+    }
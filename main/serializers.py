@@ -2,7 +2,7 @@ from decimal import Decimal
 import secrets
 from rest_framework import serializers
 from django.db import transaction
-from .models import FiatAccount, AccountTransaction
+from .models import FiatAccount, AccountTransaction, Beneficiary
 
 
 NETWORK_CHOICES = (
@@ -80,11 +80,38 @@ class WithdrawFundsSerializer(serializers.Serializer):
         choices=NETWORK_CHOICES
     )
     account_name = serializers.CharField(
-        required=True,
+        required=False,
         max_length=255,
+        help_text="Ignored for payouts; the registered name from the provider is used."
+    )
+
+
+class NameEnquirySerializer(serializers.Serializer):
+    account_number = serializers.CharField(
+        required=True,
+        max_length=15,
+    )
+    network = serializers.ChoiceField(
+        required=True,
+        choices=NETWORK_CHOICES
     )
 
 
+class BeneficiarySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Beneficiary
+        fields = [
+            'id',
+            'network',
+            'account_number',
+            'account_name',
+            'use_count',
+            'last_used_at',
+        ]
+        read_only_fields = fields
+
+
 class TransactionSerializer(serializers.ModelSerializer):
 
     class Meta:
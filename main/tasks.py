@@ -0,0 +1,29 @@
+from celery import shared_task
+from django.conf import settings
+
+from common.retention import run_retention
+from main import reconciliation, webhooks
+
+
+@shared_task
+def process_webhook_events(transaction_id):
+    """Applies the pending provider webhooks of one transaction."""
+    return webhooks.process_transaction_events(transaction_id)
+
+
+@shared_task
+def sweep_webhook_inbox():
+    """Re-schedules webhook events whose processing task was lost."""
+    return webhooks.requeue_pending(settings.WEBHOOK_INBOX["stale_after"])
+
+
+@shared_task
+def reconcile_pending_transactions():
+    """Resolves mobile-money transactions whose webhook never arrived. Returns the discrepancy report."""
+    return reconciliation.reconcile_pending()
+
+
+@shared_task
+def purge_expired_rows():
+    """Applies the retention policies. Returns rows purged and table sizes per policy."""
+    return run_retention()
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from main import beneficiaries
+from main.models import Beneficiary
+from main.tests.test_account import setup_users_and_accounts  # noqa: F401
+from main.views import account as account_views
+
+
+@pytest.fixture
+def provider(fake_redis, monkeypatch):
+    """Counts Bulkclix name enquiries; numbers starting with 000 have no wallet."""
+    calls = []
+
+    def get_account_name(phone_number, provider):
+        calls.append((phone_number, provider))
+        return None if phone_number.startswith("000") else f"AMA MENSAH {phone_number[-4:]}"
+
+    monkeypatch.setattr(beneficiaries, "get_account_name", get_account_name)
+    return calls
+
+
+@pytest.mark.django_db
+class TestNameEnquiry:
+    def test_names_are_cached_per_network_and_number(self, provider):
+        assert beneficiaries.resolve_account_name("MTN", "0241234567") == ("AMA MENSAH 4567", "provider")
+        assert beneficiaries.resolve_account_name("MTN", "233241234567") == ("AMA MENSAH 4567", "cache")
+        assert beneficiaries.resolve_account_name("TELECEL", "0241234567")[1] == "provider"
+        assert len(provider) == 2
+
+    def test_unknown_wallets_are_cached_briefly(self, provider, fake_redis, settings):
+        assert beneficiaries.resolve_account_name("MTN", "0001234567") == (None, "provider")
+        assert beneficiaries.resolve_account_name("MTN", "0001234567") == (None, "cache")
+        assert fake_redis.ttl("name_enquiry:MTN:0001234567") <= settings.NAME_ENQUIRY["negative_ttl"]
+
+    def test_saved_beneficiary_skips_the_lookup(self, provider, fake_redis, setup_users_and_accounts):
+        user = setup_users_and_accounts["regular_user_a"]
+        beneficiaries.record_beneficiary(user, "MTN", "0241234567", "AMA MENSAH")
+        fake_redis.flushall()
+
+        assert beneficiaries.resolve_account_name("MTN", "0241234567", user=user) == ("AMA MENSAH", "beneficiary")
+        assert provider == []
+
+    def test_stale_beneficiary_is_verified_again(self, provider, setup_users_and_accounts, settings):
+        user = setup_users_and_accounts["regular_user_a"]
+        beneficiaries.record_beneficiary(user, "MTN", "0241234567", "OLD NAME")
+        Beneficiary.objects.update(
+            verified_at=timezone.now() - timedelta(seconds=settings.NAME_ENQUIRY["beneficiary_ttl"] + 1)
+        )
+
+        assert beneficiaries.resolve_account_name("MTN", "0241234567", user=user) == ("AMA MENSAH 4567", "provider")
+
+    def test_enquiry_endpoint(self, provider, setup_users_and_accounts):
+        client = APIClient()
+        client.force_authenticate(setup_users_and_accounts["regular_user_a"])
+        url = reverse("main:name-enquiry")
+
+        response = client.get(url, {"network": "MTN", "account_number": "0241234567"})
+        assert response.status_code == 200
+        assert response.json()["data"]["account_name"] == "AMA MENSAH 4567"
+
+        assert client.get(url, {"network": "MTN", "account_number": "0001234567"}).status_code == 404
+
+    def test_enquiry_endpoint_is_throttled(self, provider, setup_users_and_accounts):
+        client = APIClient()
+        client.force_authenticate(setup_users_and_accounts["regular_user_a"])
+        url = reverse("main:name-enquiry")
+
+        statuses = [client.get(url, {"network": "MTN", "account_number": f"02400000{i:02}"}).status_code for i in range(21)]
+
+        assert statuses[:20] == [200] * 20
+        assert statuses[20] == 429
+
+
+@pytest.mark.django_db
+class TestWithdrawalBeneficiaries:
+    @pytest.fixture
+    def payouts(self, monkeypatch):
+        sent = []
+
+        def send_mobile_money(**kwargs):
+            sent.append(kwargs)
+            return {"transaction_id": "ext-1"}
+
+        monkeypatch.setattr(account_views, "send_mobile_money", send_mobile_money)
+        return sent
+
+    def withdraw(self, user, account_number="0241234567"):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(reverse("main:withdraw"), {
+            "channel": "mobile_money",
+            "amount": "10.00",
+            "account_number": account_number,
+            "network": "MTN",
+            "account_name": "whatever the client says",
+        }, format="json")
+
+    def test_payout_uses_registered_name_and_saves_beneficiary(self, provider, payouts, setup_users_and_accounts):
+        user = setup_users_and_accounts["regular_user_a"]
+
+        assert self.withdraw(user).status_code == 201
+        assert self.withdraw(user).status_code == 201
+
+        assert [p["account_name"] for p in payouts] == ["AMA MENSAH 4567"] * 2
+        assert len(provider) == 1
+        beneficiary = Beneficiary.objects.get(owner=user)
+        assert beneficiary.use_count == 2
+        assert beneficiary.account_name == "AMA MENSAH 4567"
+
+    def test_cached_names_do_not_count_as_verified(self, provider, payouts, setup_users_and_accounts, settings):
+        user = setup_users_and_accounts["regular_user_a"]
+        beneficiaries.resolve_account_name("MTN", "0241234567")  # another user's lookup fills the cache
+
+        assert self.withdraw(user).status_code == 201
+
+        beneficiary = Beneficiary.objects.get(owner=user)
+        assert beneficiary.verified_at <= timezone.now() - timedelta(seconds=settings.NAME_ENQUIRY["cache_ttl"])
+
+    def test_unregistered_wallet_is_rejected_before_payout(self, provider, payouts, setup_users_and_accounts):
+        response = self.withdraw(setup_users_and_accounts["regular_user_a"], account_number="0001234567")
+        assert response.status_code == 400
+        assert payouts == []
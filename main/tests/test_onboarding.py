@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from main.models.account import Account, FiatAccount
+from main import onboarding
+from main.onboarding import onboard
+from oauth.models.user import User
+
+
+CSV = """email,first_name,last_name,phone_number,password
+ama@example.com,Ama,Mensah,0240000001,secret123
+kofi@example.com,Kofi,Boateng,0240000002,
+not-an-email,Bad,Row,0240000003,x
+AMA@example.com,Ama,Again,0240000004,secret123
+existing@example.com,Esi,Owusu,0240000005,secret123
+yaw@example.com,Yaw,Asante,0240000006,secret456
+"""
+
+
+@pytest.fixture
+def cheap_hashing(settings):
+    settings.PASSWORD_HASHING = {**settings.PASSWORD_HASHING, "iterations": 1000}
+
+
+@pytest.fixture
+def existing(cheap_hashing):
+    return User.objects.create_user(email="existing@example.com", password="secret123", phone_number="0240000000")
+
+
+def rows():
+    return csv.DictReader(io.StringIO(CSV))
+
+
+@pytest.mark.django_db
+class TestOnboarding:
+    def test_creates_users_with_fiat_accounts(self, existing):
+        report = onboard(rows(), chunk_size=2, workers=1)
+
+        assert report["rows"] == 6
+        assert report["created"] == 3
+        assert report["skipped"] == 1
+        assert report["invalid"] == 2
+        assert [e["row"] for e in report["errors"]] == [3, 4]
+        assert report["users_per_second"] > 0
+
+        ama = User.objects.get(email="ama@example.com")
+        assert ama.check_password("secret123")
+        assert ama.email_verified is True
+        assert not User.objects.get(email="kofi@example.com").has_usable_password()
+
+        fiat = ama.account.fiat()
+        assert fiat is not None
+        assert fiat.balance == 0
+        assert FiatAccount.objects.filter(owner__email__in=["ama@example.com", "kofi@example.com", "yaw@example.com"]).count() == 3
+        assert Account.objects.filter(owner=existing).count() == 0
+
+    def test_account_numbers_are_unique(self, cheap_hashing):
+        onboard(rows(), workers=1)
+        numbers = list(Account.objects.values_list("account_number", flat=True))
+        assert len(numbers) == len(set(numbers)) == 4
+
+    def test_emails_registered_during_the_import_are_skipped(self, cheap_hashing, monkeypatch):
+        insert = onboarding._insert
+
+        def signup_first(users, currency):
+            User.objects.create_user(email="kofi@example.com", password="secret123", phone_number="0240000009")
+            return insert(users, currency)
+
+        monkeypatch.setattr(onboarding, "_insert", signup_first)
+        report = onboard(rows(), workers=1)
+
+        assert report["created"] == 3
+        assert report["skipped"] == 1
+        assert FiatAccount.objects.count() == 3
+        assert not Account.objects.filter(owner__email="kofi@example.com").exists()
+
+    def test_hashes_in_a_process_pool(self, cheap_hashing):
+        report = onboard(rows(), workers=2)
+
+        assert report["created"] == 4
+        assert User.objects.get(email="yaw@example.com").check_password("secret456")
+
+    def test_unknown_currency(self, cheap_hashing):
+        with pytest.raises(ValueError):
+            onboard(rows(), currency="XXX")
+
+    def test_command(self, existing, tmp_path):
+        path = tmp_path / "users.csv"
+        path.write_text(CSV)
+        out = io.StringIO()
+
+        call_command("onboard_users", str(path), "--workers", "1", "--json", stdout=out)
+
+        assert json.loads(out.getvalue())["created"] == 3
+
+    def test_admin_endpoint(self, cheap_hashing):
+        admin = User.objects.create_superuser(email="admin@example.com", password="secret123", phone_number="0240000000")
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile("users.csv", CSV.encode(), content_type="text/csv")
+
+        response = client.post(reverse("superadmin:admin-user-onboard"), {"file": upload}, format="multipart")
+
+        assert response.status_code == 200
+        assert response.data["created"] == 4
+
+    def test_admin_endpoint_limits_rows(self, cheap_hashing, settings):
+        settings.ONBOARDING = {**settings.ONBOARDING, "max_upload_rows": 2}
+        admin = User.objects.create_superuser(email="admin@example.com", password="secret123", phone_number="0240000000")
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile("users.csv", CSV.encode(), content_type="text/csv")
+
+        response = client.post(reverse("superadmin:admin-user-onboard"), {"file": upload}, format="multipart")
+
+        assert response.status_code == 400
+        assert User.objects.filter(email="ama@example.com").exists() is False
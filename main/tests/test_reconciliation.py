@@ -0,0 +1,115 @@
+import threading
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from main import reconciliation
+from main.models import WebhookEvent
+from main.tests.test_account import setup_users_and_accounts  # noqa: F401
+from services import services
+from simulator.server import ProviderSimulator, SimulatorConfig, SimulatorHTTPServer
+
+
+@pytest.fixture
+def simulator(fake_redis, monkeypatch):
+    """Bulkclix stand-in that never delivers webhooks."""
+    sim = ProviderSimulator(SimulatorConfig(latency="fixed:0", callback_delay="fixed:0", callbacks=False))
+    server = SimulatorHTTPServer(("127.0.0.1", 0), sim)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(services, "BULKCLIX_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/api/v1")
+    yield sim
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def deposit(setup_users_and_accounts, simulator):
+    account = setup_users_and_accounts["user_account_a"]
+
+    def create(amount="100.00", charged=None):
+        tx = account.deposit(
+            amount=Decimal(amount),
+            performed_by=account.owner,
+            description="Mobile money deposit",
+            direction="mobile_money_to_account",
+            metadata={},
+        )
+        if charged is not False:
+            services.charge_mobile_money(
+                amount=charged or amount, phone_number="0240000000", provider="MTN",
+                transaction_id=tx.reference_id, dynamic_id=tx.id,
+            )
+        return tx
+
+    create.account = account
+    return create
+
+
+@pytest.mark.django_db
+class TestReconciliation:
+    def test_settled_deposit_is_confirmed_through_the_inbox(self, deposit, simulator):
+        tx = deposit()
+        initial_balance = deposit.account.balance
+
+        report = reconciliation.reconcile_pending(older_than=0)
+
+        assert report == {"checked": 1, "resolved": 1, "pending": 0, "discrepancies": []}
+        tx.refresh_from_db()
+        deposit.account.refresh_from_db()
+        assert tx.status == "success"
+        assert deposit.account.balance == initial_balance + Decimal("100.00")
+
+        # The late webhook is now a free duplicate.
+        event = WebhookEvent.objects.get()
+        assert event.ext_transaction_id in simulator.transactions
+        assert event.status == "processed"
+
+    def test_failed_deposit_is_marked_failed(self, deposit, simulator):
+        simulator.config.callback_failure_rate = 1.0
+        tx = deposit()
+
+        assert reconciliation.reconcile_pending(older_than=0)["resolved"] == 1
+        tx.refresh_from_db()
+        assert tx.status == "failed"
+
+    def test_unsettled_deposit_stays_pending(self, deposit, simulator):
+        simulator.config.callback_delay = lambda: 3600
+        tx = deposit()
+
+        report = reconciliation.reconcile_pending(older_than=0)
+
+        assert report["pending"] == 1
+        tx.refresh_from_db()
+        assert tx.status == "pending"
+
+    def test_discrepancies_are_reported(self, deposit):
+        unknown = deposit(charged=False)
+        short = deposit(amount="100.00", charged="60.00")
+
+        report = reconciliation.reconcile_pending(older_than=0, chunk_size=1)
+
+        issues = {d["transaction_id"]: d["issue"] for d in report["discrepancies"]}
+        assert issues == {str(unknown.id): "missing_at_provider", str(short.id): "amount_mismatch"}
+        assert report["checked"] == 2
+        short.refresh_from_db()
+        assert short.status == "pending"
+
+    def test_recent_transactions_are_left_alone(self, deposit):
+        deposit()
+        assert reconciliation.reconcile_pending(older_than=3600)["checked"] == 0
+
+    def test_dry_run_changes_nothing(self, deposit):
+        tx = deposit()
+
+        assert reconciliation.reconcile_pending(older_than=0, dry_run=True)["resolved"] == 1
+        tx.refresh_from_db()
+        assert tx.status == "pending"
+        assert WebhookEvent.objects.count() == 0
+
+    def test_command_prints_report(self, deposit, capsys):
+        deposit(charged=False)
+        call_command("reconcile_transactions", "--older-than", "0")
+        out = capsys.readouterr().out
+        assert "checked 1, resolved 0, still pending 0, discrepancies 1" in out
+        assert "missing_at_provider" in out
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from main import tasks, webhooks
+from main.models import WebhookEvent
+from main.tests.test_account import setup_users_and_accounts  # noqa: F401
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.process_webhook_events, "delay", calls.append)
+    return calls
+
+
+@pytest.fixture
+def pending_deposit(setup_users_and_accounts):
+    account = setup_users_and_accounts["user_account_a"]
+    tx = account.deposit(
+        amount=Decimal("100.00"),
+        performed_by=account.owner,
+        description="Mobile money deposit",
+        direction="mobile_money_to_account",
+        metadata={},
+    )
+    return account, tx
+
+
+def payload(ext_id="EXT-1", status="success", amount="100.00"):
+    return {"status": status, "amount": amount, "transaction_id": "REF-1", "ext_transaction_id": ext_id}
+
+
+@pytest.mark.django_db
+class TestDepositWebhookInbox:
+    @pytest.fixture(autouse=True)
+    def capture_on_commit(self, django_capture_on_commit_callbacks):
+        self.capture = django_capture_on_commit_callbacks
+
+    def post(self, tx_id, data):
+        url = reverse("main:confirm-deposit-wh", kwargs={"transaction_id": tx_id})
+        with self.capture(execute=True):
+            return APIClient().post(url, data, format="json", REMOTE_ADDR="127.0.0.1")
+
+    def test_webhook_is_stored_and_acknowledged_without_processing(self, pending_deposit, scheduled):
+        account, tx = pending_deposit
+
+        response = self.post(tx.id, payload())
+
+        assert response.status_code == 200
+        event = WebhookEvent.objects.get()
+        assert event.status == "pending"
+        assert event.payload["ext_transaction_id"] == "EXT-1"
+        assert scheduled == [str(tx.id)]
+        tx.refresh_from_db()
+        assert tx.status == "pending"
+
+    def test_replays_are_acknowledged_and_dropped(self, pending_deposit, scheduled):
+        _, tx = pending_deposit
+
+        for _ in range(3):
+            assert self.post(tx.id, payload()).status_code == 200
+
+        assert WebhookEvent.objects.count() == 1
+        assert len(scheduled) == 1
+
+    def test_missing_fields_are_rejected(self, pending_deposit, scheduled):
+        _, tx = pending_deposit
+        response = self.post(tx.id, {"status": "success"})
+        assert response.status_code == 400
+        assert WebhookEvent.objects.count() == 0
+
+    def test_worker_confirms_deposit_once(self, pending_deposit, scheduled):
+        account, tx = pending_deposit
+        initial_balance = account.balance
+        webhooks.record_webhook(tx.id, payload("EXT-1"))
+        webhooks.record_webhook(tx.id, payload("EXT-2"))
+
+        assert webhooks.process_transaction_events(tx.id) == {"processed": 1, "ignored": 1}
+
+        tx.refresh_from_db()
+        account.refresh_from_db()
+        assert tx.status == "success"
+        assert tx.metadata == {"ext_transaction_id": "EXT-1", "reference_id": "REF-1"}
+        assert account.balance == initial_balance + Decimal("100.00")
+        assert WebhookEvent.objects.get(ext_transaction_id="EXT-2").status == "ignored"
+
+    def test_rejected_deposit_marks_event_failed(self, pending_deposit, scheduled):
+        _, tx = pending_deposit
+        webhooks.record_webhook(tx.id, payload(amount="10.00"))
+
+        assert webhooks.process_transaction_events(tx.id) == {"failed": 1}
+        tx.refresh_from_db()
+        assert tx.status == "pending"
+
+    def test_malformed_amount_fails_without_retries(self, pending_deposit, scheduled):
+        _, tx = pending_deposit
+        webhooks.record_webhook(tx.id, payload(amount="1O0.00"))
+
+        assert webhooks.process_transaction_events(tx.id) == {"failed": 1}
+        assert WebhookEvent.objects.get().attempts == 1
+        tx.refresh_from_db()
+        assert tx.status == "pending"
+
+    def test_transient_errors_stay_pending_until_max_attempts(self, pending_deposit, scheduled, monkeypatch, settings):
+        account, tx = pending_deposit
+        webhooks.record_webhook(tx.id, payload())
+
+        def boom(self, **kwargs):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(type(account), "deposit_confirm", boom)
+
+        for _ in range(settings.WEBHOOK_INBOX["max_attempts"] - 1):
+            assert webhooks.process_transaction_events(tx.id) == {"pending": 1}
+        assert webhooks.process_transaction_events(tx.id) == {"failed": 1}
+        assert WebhookEvent.objects.get().attempts == settings.WEBHOOK_INBOX["max_attempts"]
+
+    def test_sweep_reschedules_stale_events(self, pending_deposit, scheduled):
+        _, tx = pending_deposit
+        webhooks.record_webhook(tx.id, payload())
+        scheduled.clear()
+
+        assert webhooks.requeue_pending(older_than=-1) == 1
+        assert scheduled == [str(tx.id)]
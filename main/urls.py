@@ -1,5 +1,5 @@
 from django.urls import path
-from main.views import DepositView, DepositWebHookView, TransactionView, WithdrawView
+from main.views import BeneficiaryListView, DepositView, DepositWebHookView, NameEnquiryView, TransactionView, WithdrawView
 from main.views.dashboard import DashboardView
 
 
@@ -10,6 +10,8 @@ urlpatterns = [
     path('assets', DashboardView.as_view(), name='dashboard'),
     path('accounts/deposit', DepositView.as_view(), name='deposit'),
     path('accounts/withdraw', WithdrawView.as_view(), name='withdraw'),
+    path('accounts/name-enquiry', NameEnquiryView.as_view(), name='name-enquiry'),
+    path('accounts/beneficiaries', BeneficiaryListView.as_view(), name='beneficiaries'),
     path('transactions/', TransactionView.as_view(), name='transactions'),
     
     
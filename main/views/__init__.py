@@ -1,2 +1,3 @@
 from .account import DepositView, DepositWebHookView, WithdrawView
+from .beneficiaries import BeneficiaryListView, NameEnquiryView
 from .transactions import TransactionView
\ No newline at end of file
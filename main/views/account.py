@@ -5,12 +5,14 @@ from main.serializers import DepositFundsSerializer, WithdrawFundsSerializer
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import APIException, ValidationError
-from django.shortcuts import get_object_or_404
-from main.models import AccountTransaction
+from main.beneficiaries import record_beneficiary, resolve_account_name
+from main.webhooks import REQUIRED_FIELDS, record_webhook
 from services.services import charge_mobile_money, send_mobile_money
+from services.resilience import ProviderUnavailableError
 from rest_framework.views import APIView
 from decouple import config
 import secrets
+import requests
 
 
 logger = logging.getLogger('error')
@@ -20,6 +22,7 @@ def generate_reference_number(length):
 
 class DepositView(StandardResponseView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "deposit"
     success_message = "Deposit Initiated successfully"
     
     def post(self, request):
@@ -48,31 +51,19 @@ class DepositWebHookView(IPBlockerMixin, APIView):
 
     def post(self, request, transaction_id):
         data = request.data
-        transaction_status = data['status']
-        amount = data['amount']
-        reference_id = data['transaction_id']
-        ext_transaction_id = data['ext_transaction_id']
-
-        # Find transaction
-        tx = get_object_or_404(
-            AccountTransaction, pk=transaction_id, transaction_type="deposit"
-        )
-
-        # Get related account
-        account = tx.account.fiataccount
+        missing = [field for field in REQUIRED_FIELDS if field not in data]
+        if missing:
+            raise ValidationError({field: "This field is required." for field in missing})
 
-        # Confirm deposit
-        tx = account.deposit_confirm(
-            transaction_id=transaction_id,
-            status=transaction_status,
-            amount=amount,
-            metadata= {'ext_transaction_id': ext_transaction_id, 'reference_id': reference_id},
-        )
+        # Store and acknowledge; the deposit is confirmed by a worker (see main.webhooks).
+        payload = data.dict() if hasattr(data, "dict") else dict(data)
+        record_webhook(transaction_id, payload)
 
         return Response(status=status.HTTP_200_OK)
     
 class WithdrawView(StandardResponseView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "withdraw"
     success_message = "Withdrawal successfull"
     
     def post(self, request):
@@ -92,10 +83,13 @@ class WithdrawView(StandardResponseView):
         amount = data["amount"]
         data["amount"] = str(amount)
 
+        if data['channel'] == 'mobile_money':
+            account_name, name_source = self.verify_account_name(request.user, data)
+
         try:
             if data['channel'] == 'mobile_money':
                 client_reference = generate_reference_number(15)
-                res = send_mobile_money(amount=data['amount'], phone_number=data['account_number'], provider=data['network'], account_name='doe', client_reference=client_reference)
+                res = send_mobile_money(amount=data['amount'], phone_number=data['account_number'], provider=data['network'], account_name=account_name, client_reference=client_reference)
 
                 tx = account.withdraw(
                     amount=amount,
@@ -107,13 +101,34 @@ class WithdrawView(StandardResponseView):
                         "client_reference": client_reference,
                         "external_ref_id": res.get('transaction_id', ''),
                         "account_number": data['account_number'],
-                        "account_name": "doe"
+                        "account_name": account_name
                     }
                 )
             else:
                 raise APIException("Withdrawal channel not supported.")
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error("Withdrawal failed for account %s: %s", account.account_number, str(e), exc_info=True)
             raise APIException("Withdrawal failed. Please try again later.")   
 
+        try:
+            record_beneficiary(request.user, data['network'], data['account_number'], account_name, verified=name_source == "provider")
+        except Exception as e:
+            logger.error("Could not save beneficiary for account %s: %s", account.account_number, str(e), exc_info=True)
+
         return Response(status=status.HTTP_201_CREATED)
+
+    def verify_account_name(self, user, data):
+        """Registered name of the destination wallet, from the user's beneficiaries, the cache or Bulkclix."""
+        try:
+            account_name, source = resolve_account_name(data['network'], data['account_number'], user=user)
+        except ProviderUnavailableError:
+            raise
+        except requests.RequestException as e:
+            logger.error("Name enquiry failed for %s: %s", data['account_number'], str(e))
+            raise APIException("Could not verify the account name. Please try again later.")
+
+        if not account_name:
+            raise ValidationError({"account_number": "No mobile money wallet is registered to this number on the selected network."})
+        return account_name, source
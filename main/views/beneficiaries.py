@@ -0,0 +1,49 @@
+import logging
+
+import requests
+from rest_framework import generics
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from common.mixins.response import StandardResponseView
+from main.beneficiaries import normalize_number, resolve_account_name
+from main.models import Beneficiary
+from main.serializers import BeneficiarySerializer, NameEnquirySerializer
+
+
+logger = logging.getLogger('error')
+
+
+class NameEnquiryView(StandardResponseView):
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "name_enquiry"
+    success_message = "Account name retrieved successfully"
+
+    def get(self, request):
+        serializer = NameEnquirySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            account_name, _ = resolve_account_name(data['network'], data['account_number'], user=request.user)
+        except requests.RequestException as e:
+            logger.error("Name enquiry failed for %s: %s", data['account_number'], str(e))
+            raise APIException("Could not verify the account name. Please try again later.")
+
+        if not account_name:
+            raise NotFound("No mobile money wallet is registered to this number on the selected network.")
+
+        return Response({
+            "network": data['network'],
+            "account_number": normalize_number(data['account_number']),
+            "account_name": account_name,
+        })
+
+
+class BeneficiaryListView(StandardResponseView, generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = BeneficiarySerializer
+
+    def get_queryset(self):
+        return Beneficiary.objects.filter(owner=self.request.user)[:20]
@@ -1,4 +1,4 @@
-from common.pagination import StandardResultsSetPagination
+from common.pagination import HistoryPagination
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from main.models import AccountTransaction
@@ -10,7 +10,7 @@ from common.mixins.response import StandardResponseView
 class TransactionView(StandardResponseView ,generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = TransactionSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = HistoryPagination
 
     def get_queryset(self):
         return AccountTransaction.objects.exclude(transaction_type='fee').filter(account__owner=self.request.user).order_by('-created_at')
@@ -0,0 +1,131 @@
+"""
+Deposit webhook inbox.
+
+The webhook view only stores the raw callback as a `WebhookEvent` and returns.
+The unique `ext_transaction_id` turns provider retries into a rejected insert,
+so replays cost nothing and never reach the transaction row lock. A worker on
+the financial queue then applies the pending events of one transaction in
+arrival order; `requeue_pending` picks up anything a lost task left behind.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from common import metrics
+from main.models import AccountTransaction, WebhookEvent
+
+
+logger = logging.getLogger("transactions")
+
+REQUIRED_FIELDS = ("status", "amount", "transaction_id", "ext_transaction_id")
+
+WEBHOOK_EVENTS = metrics.counter(
+    "webhook_events_total", "Provider webhooks received and their processing outcome.", ["provider", "status"]
+)
+
+
+def get_inbox_config():
+    return settings.WEBHOOK_INBOX
+
+
+def record_webhook(transaction_id, payload, provider="bulkclix", schedule=True) -> bool:
+    """
+    Stores a callback for `transaction_id` and, unless `schedule` is False,
+    schedules its processing. Returns False when the same `ext_transaction_id`
+    was already received.
+    """
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(
+                provider=provider,
+                ext_transaction_id=str(payload["ext_transaction_id"]),
+                transaction_id=transaction_id,
+                payload=payload,
+            )
+    except IntegrityError:
+        WEBHOOK_EVENTS.inc(provider=provider, status="duplicate")
+        return False
+
+    WEBHOOK_EVENTS.inc(provider=provider, status="received")
+    if schedule:
+        transaction.on_commit(lambda: schedule_processing(transaction_id))
+    return True
+
+
+def schedule_processing(transaction_id):
+    from main.tasks import process_webhook_events
+
+    try:
+        process_webhook_events.delay(str(transaction_id))
+    except Exception as e:
+        # The event is stored; the sweep will pick it up.
+        logger.warning("Could not schedule webhook processing for %s: %s", transaction_id, str(e))
+
+
+def process_transaction_events(transaction_id):
+    """Applies the pending events of one transaction in arrival order. Returns `{status: count}`."""
+    summary = defaultdict(int)
+    with transaction.atomic():
+        # Concurrent runs for the same transaction queue up here instead of on the account rows.
+        events = WebhookEvent.objects.select_for_update().filter(
+            transaction_id=transaction_id, status="pending"
+        ).order_by("created_at")
+        for event in events:
+            process_event(event)
+            summary[event.status] += 1
+    return dict(summary)
+
+
+def process_event(event):
+    """Confirms the deposit described by `event` and records the outcome on it."""
+    data = event.payload
+    event.attempts += 1
+
+    try:
+        tx = AccountTransaction.objects.select_related("account__fiataccount").get(
+            pk=event.transaction_id, transaction_type="deposit"
+        )
+        if tx.status != "pending":
+            event.status = "ignored"
+            event.error = f"Transaction already {tx.status}."
+        else:
+            tx.account.fiataccount.deposit_confirm(
+                transaction_id=event.transaction_id,
+                status=data["status"],
+                amount=data["amount"],
+                metadata={"ext_transaction_id": data["ext_transaction_id"], "reference_id": data["transaction_id"]},
+            )
+            event.status = "processed"
+            event.error = ""
+    except (AccountTransaction.DoesNotExist, Http404, ValidationError, KeyError, InvalidOperation, TypeError) as e:
+        logger.error("Webhook %s rejected: %s", event.ext_transaction_id, str(e))
+        event.status = "failed"
+        event.error = str(e)[:255]
+    except Exception as e:
+        logger.error("Webhook %s could not be processed: %s", event.ext_transaction_id, str(e), exc_info=True)
+        event.status = "failed" if event.attempts >= get_inbox_config()["max_attempts"] else "pending"
+        event.error = str(e)[:255]
+
+    if event.status != "pending":
+        event.processed_at = timezone.now()
+        WEBHOOK_EVENTS.inc(provider=event.provider, status=event.status)
+    event.save(update_fields=["status", "attempts", "error", "processed_at", "updated_at"])
+    return event
+
+
+def requeue_pending(older_than):
+    """Schedules processing for transactions whose events have been pending for `older_than` seconds."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    transaction_ids = set(
+        WebhookEvent.objects.filter(status="pending", updated_at__lt=cutoff).values_list("transaction_id", flat=True)[:1000]
+    )
+    for transaction_id in transaction_ids:
+        schedule_processing(transaction_id)
+    return len(transaction_ids)
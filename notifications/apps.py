@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'notifications'
+
+    def ready(self):
+        from celery.signals import worker_process_init
+        from notifications.rendering import precompile_on_worker_start
+
+        worker_process_init.connect(precompile_on_worker_start, weak=False)
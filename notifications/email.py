@@ -0,0 +1,244 @@
+"""
+Batched email delivery.
+
+`queue_email()` pushes a message onto a Redis list and schedules a flush. The
+flush task drains up to `batch_size` messages and sends them all over a single
+authenticated SMTP connection, reconnecting when the server drops it, so a
+fan-out costs one TLS handshake per batch instead of one per email.
+
+Draining moves the batch into the `email:processing` sorted set (scored by
+when it was claimed) instead of deleting it; messages leave the set once the
+batch is done. If a worker dies mid-batch, `requeue_stale()` puts messages
+claimed more than `stale_after` seconds ago back on the queue, so they may be
+sent twice but are never lost.
+
+Latency-sensitive mail (OTP, MFA) should keep using `services.services.send_email`.
+"""
+import json
+import logging
+import smtplib
+import time
+import uuid
+
+import redis
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+
+from common import metrics
+from common.redis_client import get_redis
+from notifications.rendering import render_email
+from services.services import send_email
+
+
+logger = logging.getLogger("error")
+
+QUEUE_KEY = "email:queue"
+PROCESSING_KEY = "email:processing"
+FLUSH_KEY = "email:flush_scheduled"
+
+# Moves up to ARGV[1] messages from the queue into the processing set, scored
+# with the claim time ARGV[2].
+CLAIM_SCRIPT = """
+local items = redis.call('LPOP', KEYS[1], ARGV[1])
+if not items then
+    return {}
+end
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[2], ARGV[2], item)
+end
+return items
+"""
+
+# Moves up to ARGV[2] messages claimed before ARGV[1] back onto the queue.
+REQUEUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(items) do
+    redis.call('ZREM', KEYS[1], item)
+    redis.call('RPUSH', KEYS[2], item)
+end
+return #items
+"""
+
+# Rejections that will not succeed on retry
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+
+EMAILS_SENT = metrics.counter("email_messages_total", "Emails processed by the batch sender.", ["status"])
+SMTP_CONNECTIONS = metrics.counter("email_smtp_connections_total", "SMTP connections opened by the batch sender.")
+
+
+def get_dispatch_config():
+    return settings.EMAIL_DISPATCH
+
+
+def is_permanent(error):
+    if isinstance(error, PERMANENT_ERRORS):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def build_message(subject, template_name, context, recipient_list, connection=None):
+    """Renders `template_name` and returns an HTML email ready to send."""
+    html_message = render_email(template_name, context)
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body="",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=recipient_list,
+        connection=connection,
+    )
+    message.attach_alternative(html_message, "text/html")
+    return message
+
+
+def queue_email(subject, template_name, context, recipient_list) -> str:
+    """
+    Queues an email for batched delivery and returns its id. The id appears in
+    the per-message results returned by the flush task.
+    """
+    payload = {
+        "id": uuid.uuid4().hex,
+        "subject": subject,
+        "template_name": template_name,
+        "context": context,
+        "recipient_list": recipient_list,
+        "attempts": 0,
+    }
+    enqueue([payload])
+    return payload["id"]
+
+
+def enqueue(payloads, countdown=None):
+    try:
+        get_redis().rpush(QUEUE_KEY, *[json.dumps(p, cls=DjangoJSONEncoder) for p in payloads])
+        schedule_flush(countdown)
+    except redis.RedisError as e:
+        logger.warning("Email queue unavailable, sending %d email(s) individually: %s", len(payloads), str(e))
+        for p in payloads:
+            send_email.delay(p["subject"], p["template_name"], p["context"], p["recipient_list"])
+
+
+def schedule_flush(countdown=None):
+    """Schedules at most one pending flush."""
+    from notifications.tasks import flush_email_queue
+
+    if countdown is None:
+        countdown = get_dispatch_config()["coalesce_window"]
+
+    if get_redis().set(FLUSH_KEY, 1, nx=True, ex=int(countdown) + 60):
+        flush_email_queue.apply_async(countdown=countdown)
+
+
+def drain_queue(limit):
+    """Claims up to `limit` queued messages. Returns them raw, as `ack()` needs them."""
+    r = get_redis()
+    r.delete(FLUSH_KEY)
+    return r.eval(CLAIM_SCRIPT, 2, QUEUE_KEY, PROCESSING_KEY, limit, time.time())
+
+
+def ack(raw_messages):
+    """Releases claimed messages once they are sent, failed or re-queued."""
+    if raw_messages:
+        get_redis().zrem(PROCESSING_KEY, *raw_messages)
+
+
+def flush_queue():
+    """Sends one batch of queued emails over a single connection. Returns per-message results."""
+    conf = get_dispatch_config()
+    claimed = drain_queue(conf["batch_size"])
+    results = deliver([json.loads(raw) for raw in claimed])
+    ack(claimed)
+
+    if get_redis().llen(QUEUE_KEY):
+        schedule_flush(countdown=0)
+
+    return results
+
+
+def requeue_stale(older_than):
+    """Puts back messages claimed `older_than` seconds ago by a flush that never finished."""
+    moved = get_redis().eval(REQUEUE_SCRIPT, 2, PROCESSING_KEY, QUEUE_KEY, time.time() - older_than, 10000)
+    if moved:
+        schedule_flush(countdown=0)
+    return moved
+
+
+class BatchSender:
+    """Owns one SMTP connection for a batch and re-opens it when the server drops it."""
+
+    def __init__(self):
+        self.connection = get_connection(fail_silently=False)
+
+    def open(self):
+        if self.connection.open():
+            SMTP_CONNECTIONS.inc()
+
+    def close(self):
+        try:
+            self.connection.close()
+        except (OSError, smtplib.SMTPException):
+            pass
+
+    def send(self, message):
+        """Sends one message, reconnecting once if the connection has gone away."""
+        try:
+            self.open()
+            self.connection.send_messages([message])
+        except OSError as e:  # smtplib errors are OSErrors too
+            if is_permanent(e):
+                raise
+            self.reconnect_and_send(message)
+
+    def reconnect_and_send(self, message):
+        self.close()
+        self.open()
+        self.connection.send_messages([message])
+
+
+def deliver(payloads):
+    """
+    Sends `payloads` over one SMTP connection.
+
+    Returns a list of `{"id", "status", "error"}` where status is "sent",
+    "failed" (permanent or out of attempts) or "retrying" (re-queued).
+    """
+    if not payloads:
+        return []
+
+    conf = get_dispatch_config()
+    sender = BatchSender()
+    results = []
+    retry = []
+
+    try:
+        for payload in payloads:
+            payload["attempts"] = payload.get("attempts", 0) + 1
+            try:
+                message = build_message(
+                    payload["subject"], payload["template_name"], payload["context"], payload["recipient_list"],
+                    connection=sender.connection,
+                )
+                sender.send(message)
+                results.append({"id": payload["id"], "status": "sent", "error": ""})
+            except OSError as e:
+                if not is_permanent(e) and payload["attempts"] < conf["max_attempts"]:
+                    retry.append(payload)
+                    results.append({"id": payload["id"], "status": "retrying", "error": str(e)})
+                else:
+                    results.append({"id": payload["id"], "status": "failed", "error": str(e)})
+            except Exception as e:
+                # Broken template or context: retrying will not help.
+                logger.error("Could not build email %s: %s", payload["id"], str(e), exc_info=True)
+                results.append({"id": payload["id"], "status": "failed", "error": str(e)})
+    finally:
+        sender.close()
+
+    if retry:
+        enqueue(retry, countdown=conf["coalesce_window"])
+
+    for result in results:
+        EMAILS_SENT.inc(status=result["status"])
+        if result["status"] == "failed":
+            logger.error("Email %s failed: %s", result["id"], result["error"])
+
+    return results
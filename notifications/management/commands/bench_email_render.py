@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+
+from notifications.rendering import get_compiled_template
+
+
+SAMPLE_CONTEXTS = {
+    "emails/email_verification.html": {"name": "Ama", "otp_code": "482913"},
+    "emails/mfa_verification.html": {"name": "Ama", "otp_code": "482913"},
+    "emails/welcome.html": {"name": "Ama", "dashboard_url": "https://reachvault.io/dashboard", "year": 2025},
+    "emails/giftcard_redemption_order_placed.html": {"order_id": "9c1d0d8e", "type": "Amazon", "amount_claim": 50},
+    "emails/admin_giftcardredemption.html": {"order_id": "9c1d0d8e", "type": "Amazon"},
+}
+
+
+class Command(BaseCommand):
+    help = "Compare the per-message cost of Django template rendering against the compiled email renderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--iterations", type=int, default=20000)
+
+    def timeit(self, fn, context, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn(context)
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        self.stdout.write(f"{'template':48} {'get_template':>14} {'compiled':>10} {'speedup':>8}  path")
+
+        for name, context in SAMPLE_CONTEXTS.items():
+            compiled = get_compiled_template(name)
+            assert compiled.render(context) == get_template(name).render(context)
+
+            baseline = self.timeit(lambda c: get_template(name).render(c), context, iterations)
+            fast = self.timeit(compiled.render, context, iterations)
+            self.stdout.write(
+                f"{name:48} {baseline:>11.1f} us {fast:>7.1f} us {baseline / fast:>7.1f}x  "
+                f"{'compiled' if compiled.is_fast else 'django'}"
+            )
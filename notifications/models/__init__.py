@@ -0,0 +1 @@
+from .sms import SMSMessage
@@ -0,0 +1,36 @@
+import uuid
+from django.db import models
+
+from common.models.common import TimeStampedModel
+
+
+class SMSMessage(TimeStampedModel):
+    PRIORITY_CHOICES = [
+        ('otp', 'OTP'),  # latency sensitive, always dispatched first
+        ('bulk', 'Bulk'),  # notifications and campaigns
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),  # claimed by a flush
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.CharField(max_length=20)
+    message = models.TextField()
+    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='bulk')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.recipient} ({self.status})"
@@ -0,0 +1,239 @@
+"""
+Coalescing SMS dispatcher.
+
+`queue_sms()` stores one `SMSMessage` row per recipient and pushes the ids onto a
+Redis list per priority. A flush task then drains the lists (OTP first), groups
+messages with identical bodies into single Arkesel calls of up to
+`max_recipients_per_call` recipients, spaces the calls with a shared token bucket
+and writes every message's delivery status back in one `bulk_update`.
+
+Bulk messages wait `coalesce_window` seconds before a flush so that identical
+notifications are batched together. OTP messages trigger a flush immediately.
+
+A flush claims its messages (`queued` -> `sending`) before calling Arkesel, so
+an id that is in the queue twice, or two overlapping flushes, can't send a
+message twice. Messages claimed by a flush that died are put back by the sweep.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+import redis
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from common import metrics
+from common.ratelimit import TokenBucket
+from common.redis_client import get_redis
+from notifications.models import SMSMessage
+from services.resilience import ProviderUnavailableError
+from services.services import send_sms_batch
+
+
+logger = logging.getLogger("bulkclix")
+
+PRIORITIES = ("otp", "bulk")  # dispatch order
+
+SMS_DISPATCHED = metrics.counter(
+    "sms_messages_total", "SMS messages by priority and final dispatch outcome.", ["priority", "status"]
+)
+SMS_PROVIDER_CALLS = metrics.counter(
+    "sms_provider_calls_total", "Arkesel send calls made by the dispatcher.", ["priority"]
+)
+
+
+def get_dispatch_config():
+    return settings.SMS_DISPATCH
+
+
+def queue_key(priority):
+    return f"sms:queue:{priority}"
+
+
+def flush_key(priority):
+    return f"sms:flush_scheduled:{priority}"
+
+
+def queue_sms(recipients: list, message: str, priority: str = "bulk") -> list:
+    """
+    Queues `message` for every recipient and returns the created `SMSMessage` rows.
+    Delivery happens asynchronously; inspect the rows' `status` for the outcome.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown SMS priority '{priority}'.")
+
+    messages = SMSMessage.objects.bulk_create([
+        SMSMessage(recipient=recipient, message=message, priority=priority)
+        for recipient in recipients
+    ])
+    transaction.on_commit(lambda: enqueue(messages, priority))
+    return messages
+
+
+def enqueue(messages, priority, countdown=None):
+    """Pushes messages onto the Redis queue and makes sure a flush is scheduled."""
+    if not messages:
+        return
+    try:
+        get_redis().rpush(queue_key(priority), *[str(m.id) for m in messages])
+        schedule_flush(priority, countdown)
+    except redis.RedisError as e:
+        # Without the queue we lose coalescing but not the messages.
+        logger.warning("SMS queue unavailable, dispatching %d message(s) directly: %s", len(messages), str(e))
+        dispatch_messages(claim([m.id for m in messages]))
+
+
+def schedule_flush(priority, countdown=None):
+    """Schedules at most one pending flush per priority."""
+    from notifications.tasks import flush_sms_queue
+
+    if countdown is None:
+        countdown = 0 if priority == "otp" else get_dispatch_config()["coalesce_window"]
+
+    if get_redis().set(flush_key(priority), 1, nx=True, ex=int(countdown) + 60):
+        flush_sms_queue.apply_async(countdown=countdown)
+
+
+def drain_queue(limit):
+    """Pops up to `limit` message ids, OTP first."""
+    r = get_redis()
+    r.delete(*[flush_key(priority) for priority in PRIORITIES])
+
+    ids = []
+    for priority in PRIORITIES:
+        while len(ids) < limit:
+            chunk = r.lpop(queue_key(priority), limit - len(ids))
+            if not chunk:
+                break
+            ids.extend(chunk)
+    return ids
+
+
+def claim(ids):
+    """Marks the queued messages among `ids` as sending and returns them. Messages claimed elsewhere are left out."""
+    with transaction.atomic():
+        messages = list(SMSMessage.objects.select_for_update(skip_locked=True).filter(id__in=ids, status="queued"))
+        SMSMessage.objects.filter(pk__in=[m.pk for m in messages]).update(status="sending", updated_at=timezone.now())
+    for message in messages:
+        message.status = "sending"
+    return messages
+
+
+def flush_queue():
+    """Drains one batch from the queue and dispatches it. Returns `{status: count}`."""
+    conf = get_dispatch_config()
+    ids = drain_queue(conf["batch_size"])
+    result = dispatch_messages(claim(set(ids)))
+
+    # More work left behind than one batch: keep going straight away.
+    r = get_redis()
+    for priority in PRIORITIES:
+        if r.llen(queue_key(priority)):
+            schedule_flush(priority, countdown=0)
+            break
+
+    return result
+
+
+def dispatch_messages(messages):
+    """
+    Sends claimed `messages` grouped by priority and body, and records each
+    message's status in a single `bulk_update`. Returns `{status: count}`.
+    """
+    conf = get_dispatch_config()
+    bucket = TokenBucket("arkesel:sms", conf["rate"], conf["burst"])
+
+    groups = defaultdict(list)
+    for message in messages:
+        groups[(PRIORITIES.index(message.priority), message.message)].append(message)
+
+    processed = []
+    deferred = []
+    requeue = defaultdict(list)
+    for (rank, body), group in sorted(groups.items(), key=lambda item: item[0][0]):
+        size = conf["max_recipients_per_call"]
+        for start in range(0, len(group), size):
+            chunk = group[start:start + size]
+            if not bucket.acquire(timeout=conf["rate_limit_wait"]):
+                for message in chunk:
+                    message.status = "queued"
+                deferred.extend(chunk)
+                requeue[PRIORITIES[rank]].extend(chunk)
+                continue
+            send_chunk(body, chunk, conf["max_attempts"])
+            processed.extend(chunk)
+            for message in chunk:
+                if message.status == "queued":
+                    requeue[message.priority].append(message)
+
+    SMSMessage.objects.bulk_update(
+        processed + deferred, ["status", "provider_message_id", "attempts", "error", "sent_at", "updated_at"], batch_size=500
+    )
+
+    for priority, pending in requeue.items():
+        enqueue(pending, priority, countdown=conf["coalesce_window"])
+
+    summary = defaultdict(int)
+    for message in processed:
+        summary[message.status] += 1
+        if message.status != "queued":
+            SMS_DISPATCHED.inc(priority=message.priority, status=message.status)
+    return dict(summary)
+
+
+def send_chunk(body, chunk, max_attempts):
+    """Sends one Arkesel call for `chunk` and updates the messages in place."""
+    now = timezone.now()
+    SMS_PROVIDER_CALLS.inc(priority=chunk[0].priority)
+    for message in chunk:
+        message.attempts += 1
+        message.updated_at = now
+
+    try:
+        data = send_sms_batch(list(dict.fromkeys(m.recipient for m in chunk)), body)
+    except (requests.RequestException, ProviderUnavailableError) as e:
+        logger.error("SMS batch of %d failed: %s", len(chunk), str(e))
+        for message in chunk:
+            message.error = str(e)[:255]
+            message.status = "failed" if message.attempts >= max_attempts else "queued"
+        return
+
+    accepted = data.get("status") == "success"
+    provider_ids = {item.get("recipient"): item.get("id") for item in data.get("data") or [] if isinstance(item, dict)}
+    for message in chunk:
+        if accepted:
+            message.status = "sent"
+            message.provider_message_id = provider_ids.get(message.recipient) or ""
+            message.sent_at = now
+            message.error = ""
+        else:
+            message.status = "failed"
+            message.error = str(data.get("message") or "Rejected by provider")[:255]
+
+
+def requeue_stale(older_than):
+    """
+    Re-queues messages that were queued `older_than` seconds ago but never
+    dispatched, and those claimed that long ago by a flush that never finished.
+    Ids still waiting in the queue are not pushed again.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    # Doesn't touch updated_at, so the rows are picked up below.
+    SMSMessage.objects.filter(status="sending", updated_at__lt=cutoff).update(status="queued")
+
+    try:
+        r = get_redis()
+        waiting = {raw for priority in PRIORITIES for raw in r.lrange(queue_key(priority), 0, -1)}
+    except redis.RedisError:
+        waiting = set()
+
+    stale = defaultdict(list)
+    for message in SMSMessage.objects.filter(status="queued", updated_at__lt=cutoff).only("id", "priority")[:10000]:
+        if str(message.id) not in waiting:
+            stale[message.priority].append(message)
+
+    for priority, messages in stale.items():
+        enqueue(messages, priority, countdown=0)
+    return sum(len(m) for m in stale.values())
@@ -0,0 +1,28 @@
+from celery import shared_task
+from django.conf import settings
+
+from notifications import email, sms
+
+
+@shared_task
+def flush_sms_queue():
+    """Dispatches queued SMS messages in coalesced, rate-limited batches."""
+    return sms.flush_queue()
+
+
+@shared_task
+def sweep_sms_queue():
+    """Re-queues SMS messages that were never picked up (e.g. lost on a worker crash)."""
+    return sms.requeue_stale(settings.SMS_DISPATCH["stale_after"])
+
+
+@shared_task
+def flush_email_queue():
+    """Sends queued emails in batches over a single SMTP connection."""
+    return email.flush_queue()
+
+
+@shared_task
+def sweep_email_queue():
+    """Re-queues emails claimed by a flush that never finished (e.g. a worker crash)."""
+    return email.requeue_stale(settings.EMAIL_DISPATCH["stale_after"])
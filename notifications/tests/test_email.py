@@ -0,0 +1,148 @@
+import smtplib
+import threading
+
+import pytest
+from django.core.mail.backends.base import BaseEmailBackend
+
+from notifications import email, tasks
+from simulator.server import ProviderSimulator, SimulatorConfig, SMTPSinkServer
+
+
+class FlakyBackend(BaseEmailBackend):
+    """Records opens and sends, and can drop the connection or reject recipients on demand."""
+    opens = 0
+    sent = []
+    disconnect_on = set()
+    refuse = set()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connected = False
+
+    def open(self):
+        if self.connected:
+            return False
+        FlakyBackend.opens += 1
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0] in FlakyBackend.refuse:
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b"No such user")})
+            if message.to[0] in FlakyBackend.disconnect_on:
+                FlakyBackend.disconnect_on.discard(message.to[0])
+                self.connected = False
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            FlakyBackend.sent.append(message)
+        return len(messages)
+
+
+def payload(n, recipient=None):
+    return {
+        "id": f"msg-{n}",
+        "subject": "Processing Order",
+        "template_name": "emails/giftcard_redemption_order_placed.html",
+        "context": {"order_id": n, "type": "Amazon", "amount_claim": 50},
+        "recipient_list": [recipient or f"user{n}@example.com"],
+    }
+
+
+@pytest.fixture
+def flaky_backend(settings):
+    settings.EMAIL_BACKEND = "notifications.tests.test_email.FlakyBackend"
+    FlakyBackend.opens = 0
+    FlakyBackend.sent = []
+    FlakyBackend.disconnect_on = set()
+    FlakyBackend.refuse = set()
+    return FlakyBackend
+
+
+@pytest.fixture
+def scheduled(fake_redis, monkeypatch):
+    flushes = []
+    monkeypatch.setattr(tasks.flush_email_queue, "apply_async", lambda countdown=0: flushes.append(countdown))
+    return flushes
+
+
+class TestBatchedEmail:
+    def test_batch_reuses_one_connection(self, flaky_backend, scheduled):
+        results = email.deliver([payload(n) for n in range(10)])
+
+        assert [r["status"] for r in results] == ["sent"] * 10
+        assert flaky_backend.opens == 1
+        assert len(flaky_backend.sent) == 10
+        assert "text/html" in flaky_backend.sent[0].alternatives[0][1]
+
+    def test_reconnects_when_server_drops_connection(self, flaky_backend, scheduled):
+        flaky_backend.disconnect_on = {"user3@example.com"}
+        results = email.deliver([payload(n) for n in range(5)])
+
+        assert [r["status"] for r in results] == ["sent"] * 5
+        assert flaky_backend.opens == 2
+
+    def test_permanent_failures_are_reported_per_message(self, flaky_backend, scheduled, fake_redis):
+        flaky_backend.refuse = {"user1@example.com"}
+        results = email.deliver([payload(n) for n in range(3)])
+
+        assert [r["status"] for r in results] == ["sent", "failed", "sent"]
+        assert "No such user" in results[1]["error"]
+        assert fake_redis.llen(email.QUEUE_KEY) == 0  # not retried
+
+    def test_queue_and_flush(self, flaky_backend, scheduled):
+        ids = [email.queue_email("Hi", "emails/welcome.html", {"name": "Ama", "year": 2025}, [f"u{n}@example.com"]) for n in range(3)]
+
+        assert scheduled == [5]  # a single flush per coalescing window
+        results = email.flush_queue()
+        assert [r["id"] for r in results] == ids
+        assert flaky_backend.opens == 1
+
+    def test_claimed_batch_is_released_after_sending(self, flaky_backend, scheduled, fake_redis):
+        email.queue_email("Hi", "emails/welcome.html", {"name": "Ama", "year": 2025}, ["u@example.com"])
+
+        email.flush_queue()
+
+        assert fake_redis.llen(email.QUEUE_KEY) == 0
+        assert fake_redis.zcard(email.PROCESSING_KEY) == 0
+
+    def test_batches_of_crashed_flushes_are_requeued(self, flaky_backend, scheduled, fake_redis, monkeypatch):
+        email.queue_email("Hi", "emails/welcome.html", {"name": "Ama", "year": 2025}, ["u@example.com"])
+
+        deliver = email.deliver
+
+        def crash(payloads):
+            raise SystemExit("worker killed")
+
+        monkeypatch.setattr(email, "deliver", crash)
+        with pytest.raises(SystemExit):
+            email.flush_queue()
+        monkeypatch.setattr(email, "deliver", deliver)
+
+        assert fake_redis.zcard(email.PROCESSING_KEY) == 1
+        assert email.requeue_stale(older_than=60) == 0  # still within its lease
+        assert email.requeue_stale(older_than=-1) == 1
+
+        results = email.flush_queue()
+        assert [r["status"] for r in results] == ["sent"]
+        assert fake_redis.zcard(email.PROCESSING_KEY) == 0
+
+    def test_smtp_sink_sees_a_single_connection(self, settings, scheduled):
+        sim = ProviderSimulator(SimulatorConfig(latency="fixed:0"))
+        server = SMTPSinkServer(("127.0.0.1", 0), sim)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+        settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+        settings.EMAIL_USE_SSL = False
+
+        try:
+            results = email.deliver([payload(n) for n in range(25)])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert all(r["status"] == "sent" for r in results)
+        assert sim.stats["smtp_connection"] == 1
+        assert sim.stats["smtp_message"] == 25
@@ -0,0 +1,35 @@
+import pytest
+from django.template import engines
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from notifications.management.commands.bench_email_render import SAMPLE_CONTEXTS
+from notifications.rendering import CompiledEmailTemplate, get_compiled_template, render_email
+
+
+@pytest.mark.parametrize("template_name,context", SAMPLE_CONTEXTS.items())
+def test_matches_django_rendering(template_name, context):
+    assert get_compiled_template(template_name).is_fast
+    assert render_email(template_name, context) == get_template(template_name).render(context)
+
+
+def test_templates_are_compiled_once_per_process():
+    assert get_compiled_template("emails/email_verification.html") is get_compiled_template("emails/email_verification.html")
+
+
+def test_values_are_escaped():
+    html = render_email("emails/email_verification.html", {"name": "<script>", "otp_code": mark_safe("<b>1</b>")})
+    assert "&lt;script&gt;" in html
+    assert "<b>1</b>" in html
+
+
+def test_missing_and_non_string_values():
+    compiled = CompiledEmailTemplate(engines["django"].from_string("{{ a }}|{{ b.c }}|{{ n }}|{{ none }}"))
+    assert compiled.render({"b": {}, "n": 5, "none": None}) == "||5|None"
+
+
+def test_templates_with_tags_or_filters_fall_back_to_django():
+    for source in ["{% if a %}yes{% endif %}", "{{ a|upper }}"]:
+        compiled = CompiledEmailTemplate(engines["django"].from_string(source))
+        assert not compiled.is_fast
+        assert compiled.render({"a": "yes"}).lower() == "yes"
@@ -0,0 +1,130 @@
+import pytest
+import requests
+
+from notifications import sms, tasks
+from notifications.models import SMSMessage
+
+
+@pytest.fixture
+def dispatch(settings, fake_redis, monkeypatch, django_capture_on_commit_callbacks):
+    """Captures Arkesel calls and scheduled flushes instead of hitting Celery and the provider."""
+    settings.SMS_DISPATCH = {
+        **settings.SMS_DISPATCH,
+        "max_recipients_per_call": 2,
+        "rate": 1000,
+        "burst": 1000,
+    }
+    state = {"calls": [], "flushes": [], "response": None}
+
+    def fake_send(recipients, message):
+        state["calls"].append((recipients, message))
+        if isinstance(state["response"], Exception):
+            raise state["response"]
+        return state["response"] or {
+            "status": "success",
+            "data": [{"recipient": r, "id": f"id-{r}"} for r in recipients],
+        }
+
+    monkeypatch.setattr(sms, "send_sms_batch", fake_send)
+    monkeypatch.setattr(tasks.flush_sms_queue, "apply_async", lambda countdown=0: state["flushes"].append(countdown))
+
+    def queue(*args, **kwargs):
+        with django_capture_on_commit_callbacks(execute=True):
+            return sms.queue_sms(*args, **kwargs)
+
+    state["queue"] = queue
+    return state
+
+
+@pytest.mark.django_db
+class TestSMSDispatcher:
+    def test_identical_bodies_are_coalesced(self, dispatch):
+        dispatch["queue"](["233200000001"], "Your statement is ready")
+        dispatch["queue"](["233200000002"], "Your statement is ready")
+        dispatch["queue"](["233200000003"], "Maintenance tonight")
+
+        # one flush scheduled for the whole coalescing window
+        assert len(dispatch["flushes"]) == 1
+
+        assert sms.flush_queue() == {"sent": 3}
+        assert sorted(dispatch["calls"]) == [
+            (["233200000001", "233200000002"], "Your statement is ready"),
+            (["233200000003"], "Maintenance tonight"),
+        ]
+
+    def test_batches_are_capped_per_call(self, dispatch):
+        dispatch["queue"](["1", "2", "3", "4", "5"], "hello")
+        sms.flush_queue()
+        assert [len(recipients) for recipients, _ in dispatch["calls"]] == [2, 2, 1]
+
+    def test_otp_is_sent_before_bulk(self, dispatch):
+        dispatch["queue"](["233200000001"], "Big sale!")
+        dispatch["queue"](["233200000002"], "Your code is 123456", priority="otp")
+
+        assert dispatch["flushes"] == [2, 0]  # OTP flushes immediately
+
+        sms.flush_queue()
+        assert [message for _, message in dispatch["calls"]] == ["Your code is 123456", "Big sale!"]
+
+    def test_delivery_status_is_recorded_per_message(self, dispatch):
+        messages = dispatch["queue"](["233200000001", "233200000002"], "hello")
+        sms.flush_queue()
+
+        for message in messages:
+            message.refresh_from_db()
+            assert message.status == "sent"
+            assert message.provider_message_id == f"id-{message.recipient}"
+            assert message.attempts == 1
+            assert message.sent_at is not None
+
+    def test_rejected_batch_marks_messages_failed(self, dispatch):
+        dispatch["response"] = {"status": "error", "message": "Insufficient balance"}
+        messages = dispatch["queue"](["233200000001"], "hello")
+        sms.flush_queue()
+
+        messages[0].refresh_from_db()
+        assert messages[0].status == "failed"
+        assert messages[0].error == "Insufficient balance"
+
+    def test_transport_errors_are_retried_then_failed(self, dispatch, settings):
+        dispatch["response"] = requests.ConnectionError("down")
+        messages = dispatch["queue"](["233200000001"], "hello")
+
+        for _ in range(settings.SMS_DISPATCH["max_attempts"]):
+            sms.flush_queue()
+
+        messages[0].refresh_from_db()
+        assert messages[0].status == "failed"
+        assert messages[0].attempts == settings.SMS_DISPATCH["max_attempts"]
+        assert len(dispatch["calls"]) == settings.SMS_DISPATCH["max_attempts"]
+
+    def test_unknown_priority_is_rejected(self, dispatch):
+        with pytest.raises(ValueError):
+            sms.queue_sms(["233200000001"], "hello", priority="urgent")
+        assert SMSMessage.objects.count() == 0
+
+    def test_duplicate_queue_entries_send_once(self, dispatch, fake_redis):
+        messages = dispatch["queue"](["233200000001"], "hello")
+        fake_redis.rpush(sms.queue_key("bulk"), str(messages[0].id))
+
+        assert sms.flush_queue() == {"sent": 1}
+        assert sms.flush_queue() == {}
+        assert len(dispatch["calls"]) == 1
+
+    def test_claimed_messages_are_skipped_by_other_flushes(self, dispatch):
+        messages = dispatch["queue"](["233200000001"], "hello")
+        assert sms.claim([messages[0].id]) == messages
+
+        assert sms.flush_queue() == {}
+        assert dispatch["calls"] == []
+
+    def test_sweep_requeues_lost_messages_once(self, dispatch, fake_redis):
+        lost, claimed = dispatch["queue"](["233200000001", "233200000002"], "hello")
+        fake_redis.delete(sms.queue_key("bulk"))  # lost with a worker
+        sms.claim([claimed.id])  # a flush that died mid-send
+
+        assert sms.requeue_stale(older_than=-1) == 2
+        assert sms.requeue_stale(older_than=-1) == 0  # already waiting in the queue
+        assert sorted(fake_redis.lrange(sms.queue_key("bulk"), 0, -1)) == sorted([str(lost.id), str(claimed.id)])
+
+        assert sms.flush_queue() == {"sent": 2}
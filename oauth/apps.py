@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class OauthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'oauth'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+        from oauth.tokens import on_token_blacklisted
+        from oauth.user_cache import invalidate_user
+
+        post_save.connect(invalidate_user, sender=get_user_model(), dispatch_uid="oauth.user_cache.save")
+        post_delete.connect(invalidate_user, sender=get_user_model(), dispatch_uid="oauth.user_cache.delete")
+        post_save.connect(on_token_blacklisted, sender=BlacklistedToken, dispatch_uid="oauth.tokens.blacklisted")
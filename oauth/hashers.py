@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from common import metrics
+
+
+PASSWORD_HASH_SECONDS = metrics.histogram(
+    "password_hash_seconds", "Time spent computing one password hash.", ["iterations"]
+)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the cost taken from
+    `PASSWORD_HASHING["iterations"]`. Hashes made with a different cost are
+    re-hashed the next time their owner logs in.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING["iterations"]
+
+    def encode(self, password, salt, iterations=None):
+        started = time.perf_counter()
+        encoded = super().encode(password, salt, iterations)
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, iterations=iterations or self.iterations)
+        return encoded
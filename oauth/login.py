@@ -0,0 +1,95 @@
+"""
+Password login shared by the user and admin login views.
+
+The account is fetched once, by email and role, and the password is checked
+against that row. A missing account still costs one hash, so both failures take
+equally long. `User.check_password` re-hashes the password when the configured
+cost has changed.
+
+`aauthenticate()` is the async variant. It runs the hash in a bounded thread
+pool (`PASSWORD_HASHING["max_workers"]`), so a burst of logins neither blocks
+the event loop nor queues behind the single thread ASGI uses for sync code.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from oauth.models.user import User
+from oauth.otp import create_otp
+from oauth.serializers import UserSerializer
+from oauth.tokens import RefreshToken
+from services.services import send_email
+
+
+logger = logging.getLogger("error")
+
+_pool = None
+
+
+def get_hash_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING["max_workers"], thread_name_prefix="password-hash"
+        )
+    return _pool
+
+
+def _check(user, password):
+    if user is None:
+        User().set_password(password)
+        return None
+    if not user.check_password(password) or not user.is_active:
+        return None
+    return user
+
+
+def authenticate(email, password, role):
+    """Returns the active user with `email`, `role` and `password`, or None."""
+    if not email or not password:
+        return None
+    return _check(User.objects.filter(email=email, role=role).first(), password)
+
+
+async def aauthenticate(email, password, role):
+    """Async `authenticate()`; the password hash runs in the hash pool."""
+    if not email or not password:
+        return None
+    user = await User.objects.filter(email=email, role=role).afirst()
+    return await asyncio.get_running_loop().run_in_executor(get_hash_pool(), _check, user, password)
+
+
+def complete_login(user):
+    """
+    Returns the login payload for an authenticated user: JWTs, or an MFA token
+    once the OTP has been emailed.
+    """
+    if not user.email_verified:
+        raise PermissionDenied("Please verify your account to continue.")
+
+    if user.mfa_enabled:
+        code, otp_obj = create_otp(user=user.email, purpose='mfa')
+
+        try:
+            send_email.delay(
+                subject="MFA Verification",
+                template_name="emails/mfa_verification.html",
+                context={"name": user.first_name, "otp_code": code},
+                recipient_list=[user.email],
+            )
+        except Exception as e:
+            logger.error(f"Error sending MFA email: {e}", exc_info=True)
+            raise ValidationError({'detail': 'Failed to send MFA email. Please try again later.'})
+
+        return {'mfa_required': user.mfa_enabled, 'token': otp_obj.id}
+
+    refresh = RefreshToken.for_user(user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': UserSerializer(user).data,
+        'mfa_required': user.mfa_enabled
+    }
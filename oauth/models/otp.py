@@ -47,6 +47,11 @@ class OTP(models.Model):
         self.save(update_fields=["is_used"])
         return True
 
+    def set_code(self, code: str):
+        """Replaces the code and restarts the validity window."""
+        self.code_hash = hash_otp(code)
+        self.save()
+
     
 def generate_otp(length=6):
     return ''.join(secrets.choice('0123456789') for _ in range(length))
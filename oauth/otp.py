@@ -0,0 +1,194 @@
+"""
+OTP storage.
+
+With `OTP_BACKEND = "redis"` (the default) an OTP is a Redis hash that expires on
+its own after `OTP_TTL` seconds, and verification is a single Lua script that
+checks the code and counts the attempt atomically, so signup and login OTPs
+never touch Postgres. The `OTP` model is the "database" backend and is also used
+whenever Redis is unreachable; lookups fall back to it for codes created that way.
+
+Both backends hand out objects with the same interface: `id`, `user`, `purpose`,
+`meta`, `attempts`, `is_used`, `updated_at`, `is_valid()`, `verify(code)` and
+`set_code(code)`.
+"""
+import json
+import logging
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from common.redis_client import get_redis
+from oauth.models.otp import OTP, create_otp as create_db_otp, generate_otp, hash_otp
+
+
+logger = logging.getLogger("error")
+
+MAX_ATTEMPTS = 5
+
+# Returns 1 when the code matches (the OTP is consumed), 0 on a wrong code and
+# -1 when the OTP is unknown, expired or out of attempts.
+VERIFY_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'code_hash', 'attempts')
+if not state[1] then
+    return -1
+end
+if tonumber(state[2]) >= tonumber(ARGV[2]) then
+    return -1
+end
+if state[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return 0
+"""
+
+# Replaces the code of a live OTP and restarts its TTL, leaving `attempts` as it
+# is. Returns 0 if the OTP was consumed or has expired in the meantime.
+SET_CODE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'code_hash', ARGV[1], 'updated_at', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('SET', KEYS[2], ARGV[4], 'EX', ARGV[3])
+return 1
+"""
+
+
+def otp_key(otp_id):
+    return f"otp:{otp_id}"
+
+
+def latest_key(user, purpose):
+    return f"otp:latest:{purpose}:{user}"
+
+
+def get_backend():
+    return getattr(settings, "OTP_BACKEND", "redis")
+
+
+def get_ttl():
+    return getattr(settings, "OTP_TTL", 300)
+
+
+class RedisOTP:
+    """An OTP held in Redis. Mirrors the `OTP` model's interface."""
+
+    def __init__(self, id, user, purpose, code_hash, meta=None, attempts=0, updated_at=None, is_used=False):
+        self.id = id
+        self.user = user
+        self.purpose = purpose
+        self.code_hash = code_hash
+        self.meta = meta or {}
+        self.attempts = attempts
+        self.updated_at = updated_at or timezone.now()
+        self.is_used = is_used
+
+    @classmethod
+    def from_hash(cls, otp_id, data):
+        return cls(
+            id=uuid.UUID(otp_id),
+            user=data["user"],
+            purpose=data["purpose"],
+            code_hash=data["code_hash"],
+            meta=json.loads(data.get("meta") or "{}"),
+            attempts=int(data.get("attempts") or 0),
+            updated_at=datetime.fromtimestamp(float(data["updated_at"]), tz=dt_timezone.utc),
+        )
+
+    def save(self):
+        ttl = get_ttl()
+        pipe = get_redis().pipeline()
+        pipe.hset(otp_key(self.id), mapping={
+            "user": self.user,
+            "purpose": self.purpose,
+            "code_hash": self.code_hash,
+            "meta": json.dumps(self.meta),
+            "attempts": self.attempts,
+            "updated_at": self.updated_at.timestamp(),
+        })
+        pipe.expire(otp_key(self.id), ttl)
+        pipe.set(latest_key(self.user, self.purpose), str(self.id), ex=ttl)
+        pipe.execute()
+
+    def is_valid(self):
+        return not self.is_used and self.attempts < MAX_ATTEMPTS
+
+    def verify(self, code: str):
+        try:
+            result = get_redis().eval(VERIFY_SCRIPT, 1, otp_key(self.id), hash_otp(code), MAX_ATTEMPTS)
+        except redis.RedisError as e:
+            logger.error("OTP store unavailable, rejecting verification: %s", str(e))
+            return False
+
+        if result == 1:
+            self.is_used = True
+            return True
+        if result == 0:
+            self.attempts += 1
+        return False
+
+    def set_code(self, code: str):
+        """
+        Replaces the code and restarts the validity window. If the OTP is gone
+        (consumed or expired) it is marked used instead of being recreated.
+        """
+        self.code_hash = hash_otp(code)
+        self.updated_at = timezone.now()
+        replaced = get_redis().eval(
+            SET_CODE_SCRIPT, 2, otp_key(self.id), latest_key(self.user, self.purpose),
+            self.code_hash, self.updated_at.timestamp(), get_ttl(), str(self.id),
+        )
+        if not replaced:
+            self.is_used = True
+
+
+def create_otp(user, purpose: str, meta=None):
+    """Creates an OTP for `user` and returns `(code, otp)`."""
+    if get_backend() == "redis":
+        code = generate_otp()
+        otp = RedisOTP(id=uuid.uuid4(), user=user, purpose=purpose, code_hash=hash_otp(code), meta=meta)
+        try:
+            otp.save()
+            return code, otp
+        except redis.RedisError as e:
+            logger.warning("OTP store unavailable, falling back to the database: %s", str(e))
+    return create_db_otp(user, purpose, meta=meta)
+
+
+def get_otp(otp_id):
+    """Returns the unused OTP with id `otp_id`, or None."""
+    try:
+        otp_id = str(uuid.UUID(str(otp_id)))
+    except ValueError:
+        return None
+
+    if get_backend() == "redis":
+        try:
+            data = get_redis().hgetall(otp_key(otp_id))
+        except redis.RedisError as e:
+            logger.warning("OTP store unavailable, reading from the database: %s", str(e))
+            data = None
+        if data:
+            return RedisOTP.from_hash(otp_id, data)
+
+    return OTP.objects.filter(id=otp_id, is_used=False).first()
+
+
+def find_otp(user, purpose):
+    """Returns the most recent unused OTP issued to `user` for `purpose`, or None."""
+    if get_backend() == "redis":
+        try:
+            otp_id = get_redis().get(latest_key(user, purpose))
+        except redis.RedisError as e:
+            logger.warning("OTP store unavailable, reading from the database: %s", str(e))
+            otp_id = None
+        otp = get_otp(otp_id) if otp_id else None
+        if otp:
+            return otp
+
+    return OTP.objects.filter(user=user, purpose=purpose, is_used=False).order_by("-created_at").first()
@@ -0,0 +1,126 @@
+import pytest
+import redis
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from oauth import user_cache
+from oauth.models.user import User
+
+
+@pytest.fixture
+def user(fake_redis):
+    user_cache.clear_local_cache()
+    yield User.objects.create_user(email="cached@example.com", password="secret123", phone_number="0240000000")
+    user_cache.clear_local_cache()
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
+
+
+def user_table_queries(queries):
+    return [q["sql"] for q in queries if '"oauth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    def test_repeat_requests_do_not_query_the_user_table(self, user):
+        client = client_for(user)
+        url = reverse("main:transactions")
+        assert client.get(url).status_code == 200
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(url).status_code == 200
+
+        assert user_table_queries(ctx.captured_queries) == []
+
+    def test_other_workers_use_the_redis_copy(self, user):
+        client = client_for(user)
+        url = reverse("main:transactions")
+        client.get(url)
+        user_cache.clear_local_cache()  # as seen from another worker
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(url).status_code == 200
+
+        assert user_table_queries(ctx.captured_queries) == []
+
+    def test_deactivation_takes_effect_immediately(self, user):
+        client = client_for(user)
+        url = reverse("main:transactions")
+        assert client.get(url).status_code == 200
+
+        user.is_active = False
+        user.save()
+
+        assert client.get(url).status_code == 401
+
+    def test_role_change_is_picked_up(self, user):
+        user_cache.get_user(user.pk)
+        user.role = "manager"
+        user.save(update_fields=["role"])
+
+        user_cache.clear_local_cache()
+        assert user_cache.get_user(user.pk).role == "manager"
+
+    def test_cached_user_round_trips_every_field(self, user):
+        user_cache.get_user(user.pk)
+        user_cache.clear_local_cache()
+
+        cached = user_cache.get_user(user.pk)
+        for field in User._meta.concrete_fields:
+            if field.name != "password":
+                assert field.value_from_object(cached) == field.value_from_object(user), field.name
+        assert cached._state.adding is False
+        assert cached.get_deferred_fields() == {"password"}
+
+    def test_password_hash_is_not_cached(self, user, fake_redis, settings):
+        client_for(user).get(reverse("main:transactions"))
+
+        version = int(fake_redis.get(user_cache.version_key(user.pk)) or 0)
+        raw = fake_redis.get(user_cache.user_key(user.pk, version))
+        assert raw is not None and user.password not in raw
+        assert user_cache.password_fingerprint(user_cache.get_user(user.pk)) == user_cache.password_fingerprint(user)
+
+        user.save()
+        assert 0 < fake_redis.ttl(user_cache.version_key(user.pk)) <= settings.AUTH_USER_CACHE["version_ttl"]
+
+    def test_password_change_revokes_cached_tokens(self, user, monkeypatch):
+        monkeypatch.setattr(api_settings, "CHECK_REVOKE_TOKEN", True)
+        client = client_for(user)
+        url = reverse("main:transactions")
+        assert client.get(url).status_code == 200
+
+        user.set_password("changed123")
+        user.save()
+
+        assert client.get(url).status_code == 401
+
+    def test_falls_back_to_the_database_without_redis(self, user, monkeypatch):
+        def unavailable():
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(user_cache, "get_redis", unavailable)
+        assert user_cache.get_user(user.pk) == user
+
+    def test_local_cache_evicts_the_least_recently_used(self, user, settings):
+        settings.AUTH_USER_CACHE = {**settings.AUTH_USER_CACHE, "max_entries": 2}
+        other = User.objects.create_user(email="other@example.com", password="secret123", phone_number="0240000001")
+        third = User.objects.create_user(email="third@example.com", password="secret123", phone_number="0240000002")
+
+        user_cache.get_user(user.pk)
+        user_cache.get_user(other.pk)
+        user_cache.get_user(user.pk)  # now the most recently used
+        user_cache.get_user(third.pk)
+
+        assert list(user_cache._local) == [str(user.pk), str(third.pk)]
+
+    def test_unknown_user(self, user):
+        with pytest.raises(User.DoesNotExist):
+            user_cache.get_user(user.pk + 1000)
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from oauth.hashers import PASSWORD_HASH_SECONDS
+from oauth.models.user import User
+
+
+@pytest.fixture
+def cheap_hashing(settings, fake_redis):
+    settings.PASSWORD_HASHING = {**settings.PASSWORD_HASHING, "iterations": 1000}
+    PASSWORD_HASH_SECONDS.clear()
+    return settings
+
+
+@pytest.fixture
+def user(cheap_hashing):
+    return User.objects.create_user(
+        email="login@example.com", password="secret123", phone_number="0240000000", email_verified=True,
+    )
+
+
+def user_selects(queries):
+    return [q["sql"] for q in queries if q["sql"].startswith("SELECT") and 'FROM "oauth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestLogin:
+    def test_fetches_the_user_once(self, user):
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().post(
+                reverse("oauth:login"), {"email": user.email, "password": "secret123"}, format="json"
+            )
+
+        assert response.status_code == 200
+        assert "access" in response.json()["data"]
+        assert len(user_selects(ctx.captured_queries)) == 1
+
+    def test_wrong_role_is_rejected(self, user):
+        response = APIClient().post(
+            reverse("superadmin:admin-login"), {"email": user.email, "password": "secret123"}, format="json"
+        )
+        assert response.status_code == 401
+
+    def test_password_is_rehashed_when_the_cost_changes(self, user, cheap_hashing):
+        assert user.password.startswith("pbkdf2_sha256$1000$")
+        cheap_hashing.PASSWORD_HASHING = {**cheap_hashing.PASSWORD_HASHING, "iterations": 1200}
+
+        response = APIClient().post(reverse("oauth:login"), {"email": user.email, "password": "secret123"}, format="json")
+
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.password.startswith("pbkdf2_sha256$1200$")
+        assert user.check_password("secret123")
+
+    def test_hash_time_is_recorded(self, user):
+        APIClient().post(reverse("oauth:login"), {"email": user.email, "password": "wrong"}, format="json")
+        assert PASSWORD_HASH_SECONDS.count(iterations=1000) >= 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncLogin:
+    def test_login(self, user, client):
+        response = client.post(
+            reverse("oauth:login-async"), {"email": user.email, "password": "secret123"}, content_type="application/json"
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] is True
+        assert body["message"] == "User logged in successfully"
+        assert "access" in body["data"]
+
+    def test_invalid_credentials(self, user, client):
+        response = client.post(
+            reverse("oauth:login-async"), {"email": user.email, "password": "wrong"}, content_type="application/json"
+        )
+
+        assert response.status_code == 401
+        assert response.json() == {"status": False, "message": "Invalid credentials", "data": None}
+
+    def test_is_throttled(self, user, client):
+        url = reverse("superadmin:admin-login-async")
+        statuses = [
+            client.post(url, {"email": user.email, "password": "x"}, content_type="application/json").status_code
+            for _ in range(6)
+        ]
+
+        assert statuses[-1] == 429
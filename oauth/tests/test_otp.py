@@ -0,0 +1,132 @@
+import pytest
+import redis
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from oauth import otp as otp_store
+from oauth import views
+from oauth.models.otp import OTP
+from oauth.models.user import User
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    def unavailable():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(otp_store, "get_redis", unavailable)
+
+
+@pytest.mark.django_db
+class TestRedisOTPStore:
+    def test_create_otp_does_not_touch_the_database(self, fake_redis, settings):
+        code, otp = otp_store.create_otp("test@example.com", "signup")
+
+        assert isinstance(otp, otp_store.RedisOTP)
+        assert OTP.objects.count() == 0
+        assert 0 < fake_redis.ttl(f"otp:{otp.id}") <= settings.OTP_TTL
+        assert otp_store.get_otp(otp.id).user == "test@example.com"
+        assert otp_store.find_otp("test@example.com", "signup").id == otp.id
+
+    def test_verify_consumes_the_otp(self, fake_redis):
+        code, otp = otp_store.create_otp("test@example.com", "mfa")
+
+        assert otp.verify(code) is True
+        assert otp.verify(code) is False
+        assert otp_store.get_otp(otp.id) is None
+
+    def test_attempts_are_counted_atomically(self, fake_redis):
+        code, otp = otp_store.create_otp("test@example.com", "mfa")
+
+        for _ in range(otp_store.MAX_ATTEMPTS):
+            assert otp.verify("000000" if code != "000000" else "111111") is False
+
+        assert otp_store.get_otp(otp.id).attempts == otp_store.MAX_ATTEMPTS
+        # Locked out, even with the right code
+        assert otp.verify(code) is False
+
+    def test_set_code_replaces_the_code(self, fake_redis):
+        old_code, otp = otp_store.create_otp("test@example.com", "signup")
+        otp.set_code("123456")
+
+        otp = otp_store.get_otp(otp.id)
+        assert otp.verify("123456") is True
+
+    def test_set_code_keeps_concurrent_attempts(self, fake_redis, settings):
+        code, otp = otp_store.create_otp("test@example.com", "signup")
+        stale = otp_store.get_otp(otp.id)
+        otp.verify("000000" if code != "000000" else "111111")
+
+        stale.set_code("123456")
+
+        assert otp_store.get_otp(otp.id).attempts == 1
+        assert 0 < fake_redis.ttl(f"otp:{otp.id}") <= settings.OTP_TTL
+
+    def test_set_code_does_not_revive_a_consumed_otp(self, fake_redis):
+        code, otp = otp_store.create_otp("test@example.com", "signup")
+        stale = otp_store.get_otp(otp.id)
+        otp.verify(code)
+
+        stale.set_code("123456")
+
+        assert stale.is_used is True
+        assert otp_store.get_otp(otp.id) is None
+
+    def test_unknown_or_malformed_tokens(self, fake_redis):
+        assert otp_store.get_otp("not-a-uuid") is None
+        assert otp_store.find_otp("nobody@example.com", "signup") is None
+
+    def test_falls_back_to_the_database_without_redis(self, redis_down):
+        code, otp = otp_store.create_otp("test@example.com", "signup")
+
+        assert isinstance(otp, OTP)
+        assert otp_store.get_otp(otp.id) == otp
+        assert otp_store.find_otp("test@example.com", "signup").verify(code) is True
+
+    def test_database_backend(self, fake_redis, settings):
+        settings.OTP_BACKEND = "database"
+        code, otp = otp_store.create_otp("test@example.com", "signup")
+
+        assert isinstance(otp, OTP)
+        assert fake_redis.keys("otp:*") == []
+
+
+@pytest.mark.django_db
+class TestOTPViews:
+    @pytest.fixture
+    def sent(self, fake_redis, monkeypatch):
+        """OTP codes sent by email, newest last."""
+        codes = []
+        monkeypatch.setattr(views.send_email, "delay", lambda **kwargs: codes.append(kwargs["context"]["otp_code"]))
+        monkeypatch.setattr(views, "queue_email", lambda **kwargs: None)
+        return codes
+
+    def test_signup_verification(self, sent):
+        client = APIClient()
+        response = client.post(reverse("oauth:register"), {
+            "email": "new@example.com", "password": "secret123", "phone_number": "0240000000", "first_name": "Ama",
+        }, format="json")
+        assert response.status_code == 201
+
+        response = client.post(reverse("oauth:verify-otp"), {"email": "new@example.com", "code": sent[-1]}, format="json")
+
+        assert response.status_code == 200
+        assert User.objects.get(email="new@example.com").email_verified is True
+        assert OTP.objects.count() == 0
+
+    def test_mfa_login(self, sent):
+        User.objects.create_user(
+            email="mfa@example.com", password="secret123", phone_number="0240000000",
+            email_verified=True, mfa_enabled=True,
+        )
+        client = APIClient()
+        response = client.post(reverse("oauth:login"), {"email": "mfa@example.com", "password": "secret123"}, format="json")
+        token = response.json()["data"]["token"]
+
+        bad = client.post(reverse("oauth:login-mfa"), {"email": "mfa@example.com", "code": "xxxxxx", "token": str(token)}, format="json")
+        assert bad.status_code == 400
+
+        response = client.post(reverse("oauth:login-mfa"), {"email": "mfa@example.com", "code": sent[-1], "token": str(token)}, format="json")
+        assert response.status_code == 200
+        assert "access" in response.json()["data"]
+        assert OTP.objects.count() == 0
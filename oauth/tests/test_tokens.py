@@ -0,0 +1,100 @@
+import pytest
+import redis
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import TokenError
+
+from common.bloom import BloomFilter
+from oauth import tokens
+from oauth.models.user import User
+from oauth.tokens import RefreshToken
+
+
+@pytest.fixture
+def user(fake_redis):
+    tokens._filter = tokens.BlacklistFilter()
+    yield User.objects.create_user(email="tokens@example.com", password="secret123", phone_number="0240000001")
+    tokens._filter = tokens.BlacklistFilter()
+
+
+def blacklist_queries(queries):
+    return [q["sql"] for q in queries if "token_blacklist_blacklistedtoken" in q["sql"]]
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+class TestRefreshTokenBlacklist:
+    def test_valid_token_skips_the_blacklist_table(self, user):
+        raw = str(RefreshToken.for_user(user))
+        RefreshToken(raw)  # first check builds the filter
+
+        with CaptureQueriesContext(connection) as ctx:
+            RefreshToken(raw)
+
+        assert blacklist_queries(ctx.captured_queries) == []
+
+    def test_blacklisted_token_is_rejected(self, user):
+        token = RefreshToken.for_user(user)
+        RefreshToken(str(token))
+        token.blacklist()
+
+        with pytest.raises(TokenError):
+            RefreshToken(str(token))
+
+    def test_other_workers_see_the_blacklist_immediately(self, user):
+        token = RefreshToken.for_user(user)
+        RefreshToken(str(token))
+
+        other_worker = tokens.BlacklistFilter()
+        other_worker.rebuild()
+        token.blacklist()
+
+        assert other_worker.might_contain(str(token["jti"]))
+        tokens._filter = other_worker
+        with pytest.raises(TokenError):
+            RefreshToken(str(token))
+
+    def test_rebuild_loads_existing_blacklist(self, user, fake_redis):
+        token = RefreshToken.for_user(user)
+        token.blacklist()
+        fake_redis.flushall()
+
+        tokens._filter = tokens.BlacklistFilter()
+        with pytest.raises(TokenError):
+            RefreshToken(str(token))
+
+    def test_falls_back_to_the_database_without_redis(self, user, monkeypatch):
+        token = RefreshToken.for_user(user)
+        RefreshToken(str(token))
+
+        def unavailable():
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(tokens, "get_redis", unavailable)
+        token.blacklist()
+
+        other_worker = tokens.BlacklistFilter()
+        other_worker.rebuild()
+        tokens._filter = other_worker
+        fresh = RefreshToken.for_user(user)
+        with CaptureQueriesContext(connection) as ctx:
+            RefreshToken(str(fresh))
+        assert blacklist_queries(ctx.captured_queries)
+
+        with pytest.raises(TokenError):
+            RefreshToken(str(token))
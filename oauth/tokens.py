@@ -0,0 +1,127 @@
+"""
+Refresh tokens with a Bloom-filtered blacklist check.
+
+simplejwt checks every refresh token against `BlacklistedToken` with a join on
+`OutstandingToken`. Here each worker keeps a Bloom filter of the JTIs that are
+blacklisted and not yet expired, rebuilt from the database every
+`rebuild_interval` seconds. Only JTIs the filter may contain are checked in the
+database. A token that is definitely not blacklisted costs no query.
+
+New blacklist entries are also pushed to a Redis sorted set. Before every check,
+a worker pulls the entries added since its last sync into its filter, so a
+logout takes effect on every worker straight away. If Redis is unreachable,
+every check goes to the database.
+"""
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from common import metrics
+from common.bloom import BloomFilter
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("error")
+
+RECENT_KEY = "jwt:blacklist:recent"
+
+BLACKLIST_CHECKS = metrics.counter(
+    "jwt_blacklist_checks_total", "Refresh token blacklist checks by how they were answered.", ["result"]
+)
+
+
+def get_filter_config():
+    return settings.JWT_BLACKLIST_FILTER
+
+
+class BlacklistFilter:
+    """Per-worker Bloom filter of blacklisted JTIs, kept in sync through Redis."""
+
+    def __init__(self):
+        self.bloom = None
+        self.built_at = 0.0
+        self.cursor = 0.0
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        conf = get_filter_config()
+        # Anything published while we read the table is pulled on the next sync.
+        cursor = time.time() - conf["clock_skew"]
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list("token__jti", flat=True)
+        )
+        bloom = BloomFilter(max(conf["capacity"], 2 * len(jtis)), conf["error_rate"])
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom, self.cursor, self.built_at = bloom, cursor, time.monotonic()
+
+    def sync(self):
+        """Adds JTIs other workers blacklisted since the last sync. Returns False if Redis is unavailable."""
+        try:
+            recent = get_redis().zrangebyscore(RECENT_KEY, f"({self.cursor}", "+inf", withscores=True)
+        except redis.RedisError as e:
+            logger.warning("Token blacklist feed unavailable, checking the database: %s", str(e))
+            return False
+        for jti, score in recent:
+            self.bloom.add(jti)
+            self.cursor = max(self.cursor, score)
+        return True
+
+    def might_contain(self, jti):
+        with self._lock:
+            if self.bloom is None or time.monotonic() - self.built_at > get_filter_config()["rebuild_interval"]:
+                self.rebuild()
+            if not self.sync():
+                return True
+            return jti in self.bloom
+
+
+_filter = BlacklistFilter()
+
+
+def get_blacklist_filter():
+    return _filter
+
+
+def publish_blacklisted(jti):
+    """Makes `jti` visible to every worker's filter."""
+    conf = get_filter_config()
+    now = time.time()
+    if _filter.bloom is not None:
+        _filter.bloom.add(jti)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.zadd(RECENT_KEY, {jti: now})
+        # Entries older than a rebuild are already in every worker's filter.
+        pipe.zremrangebyscore(RECENT_KEY, "-inf", now - conf["rebuild_interval"] - 60)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Could not publish blacklisted token %s: %s", jti, str(e))
+
+
+def on_token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        publish_blacklisted(instance.token.jti)
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not get_blacklist_filter().might_contain(jti):
+            BLACKLIST_CHECKS.inc(result="filtered")
+            return
+
+        try:
+            super().check_blacklist()
+        except TokenError:
+            BLACKLIST_CHECKS.inc(result="blacklisted")
+            raise
+        BLACKLIST_CHECKS.inc(result="false_positive")
@@ -0,0 +1,162 @@
+"""
+Two-level cache of `User` rows for token authentication.
+
+A user is cached per worker process for `local_ttl` seconds (the
+`max_entries` most recently used users at most) and in Redis under
+`auth:cached_user:<id>:v<version>` for `redis_ttl` seconds. The version stamp
+(`auth:user_version:<id>`, kept for `version_ttl` seconds after its last bump)
+is bumped whenever the user is saved or deleted, which covers deactivation,
+role and password changes. After a bump, other workers pick up the change
+within `local_ttl` seconds.
+
+The password hash is never cached: cached users have it deferred (reading it
+queries the database) and carry only the fingerprint simplejwt's
+`CHECK_REVOKE_TOKEN` compares tokens against, see `password_fingerprint()`.
+
+Anything that changes users without `save()` (e.g. `QuerySet.update()`) must
+call `bump_user_version()` itself.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from common import metrics
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("error")
+
+USER_LOOKUPS = metrics.counter(
+    "auth_user_cache_lookups_total", "Authenticated user resolutions by where the user came from.", ["source"]
+)
+
+# user id -> (version, (field values, password fingerprint), expires at), least recently used first
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def get_cache_config():
+    return settings.AUTH_USER_CACHE
+
+
+def version_key(user_id):
+    return f"auth:user_version:{user_id}"
+
+
+def user_key(user_id, version):
+    return f"auth:cached_user:{user_id}:v{version}"
+
+
+def _fields():
+    return [f for f in get_user_model()._meta.concrete_fields if f.attname != "password"]
+
+
+def password_fingerprint(user):
+    """The digest of `user`'s password hash that simplejwt's revoke-token claim holds."""
+    fingerprint = getattr(user, "_password_fingerprint", None)
+    return fingerprint if fingerprint is not None else get_md5_hash_password(user.password)
+
+
+def _snapshot(user):
+    return [f.value_from_object(user) for f in _fields()], get_md5_hash_password(user.password)
+
+
+def _build(snapshot):
+    values, fingerprint = snapshot
+    # Fields missing from `from_db()` are deferred: the password is only loaded if read.
+    user = get_user_model().from_db("default", [f.attname for f in _fields()], values)
+    user._password_fingerprint = fingerprint
+    return user
+
+
+def _encode(value):
+    # Full precision; DjangoJSONEncoder truncates datetimes to milliseconds.
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _serialize(snapshot):
+    values, fingerprint = snapshot
+    return json.dumps({"values": values, "password_md5": fingerprint}, default=_encode)
+
+
+def _deserialize(raw):
+    data = json.loads(raw)
+    return [f.to_python(value) for f, value in zip(_fields(), data["values"])], data["password_md5"]
+
+
+def get_user(user_id):
+    """Returns the user with primary key `user_id` or raises `DoesNotExist`."""
+    conf = get_cache_config()
+    now = time.monotonic()
+    user_id = str(user_id)
+
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry and entry[2] > now:
+            _local.move_to_end(user_id)
+        else:
+            entry = None
+    if entry:
+        USER_LOOKUPS.inc(source="local")
+        return _build(entry[1])
+
+    try:
+        r = get_redis()
+        version = int(r.get(version_key(user_id)) or 0)
+        raw = r.get(user_key(user_id, version))
+    except redis.RedisError as e:
+        logger.warning("User cache unavailable, loading user %s from the database: %s", user_id, str(e))
+        USER_LOOKUPS.inc(source="db")
+        return get_user_model().objects.get(pk=user_id)
+
+    if raw is not None:
+        snapshot = _deserialize(raw)
+        USER_LOOKUPS.inc(source="redis")
+    else:
+        snapshot = _snapshot(get_user_model().objects.get(pk=user_id))
+        USER_LOOKUPS.inc(source="db")
+        try:
+            r.set(user_key(user_id, version), _serialize(snapshot), ex=conf["redis_ttl"])
+        except redis.RedisError:
+            pass
+
+    with _local_lock:
+        _local[user_id] = (version, snapshot, now + conf["local_ttl"])
+        _local.move_to_end(user_id)
+        while len(_local) > conf["max_entries"]:
+            _local.popitem(last=False)
+    return _build(snapshot)
+
+
+def bump_user_version(user_id):
+    """Invalidates every cached copy of the user."""
+    user_id = str(user_id)
+    with _local_lock:
+        _local.pop(user_id, None)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.incr(version_key(user_id))
+        pipe.expire(version_key(user_id), get_cache_config()["version_ttl"])
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Could not invalidate cached user %s: %s", user_id, str(e))
+
+
+def invalidate_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+    # Again once the change is visible to other connections, so that nobody
+    # caches the pre-commit row under the new version.
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
+
+
+def clear_local_cache():
+    with _local_lock:
+        _local.clear()
@@ -1,21 +1,32 @@
 from main.models.account import Account, FiatAccount, CryptoAccount
-from oauth.models.otp import OTP, create_otp, generate_otp, hash_otp
+from oauth.models.otp import generate_otp
+from oauth.otp import create_otp, find_otp, get_otp
 from rest_framework import status, permissions, filters, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.exceptions import NotFound, ValidationError, AuthenticationFailed
-from django.shortcuts import get_object_or_404
-from django.contrib.auth import authenticate
+from oauth.tokens import RefreshToken
+from rest_framework.exceptions import APIException, NotFound, ParseError, Throttled, ValidationError, AuthenticationFailed
+from rest_framework.request import Request
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
 from datetime import timedelta
 
 from services.services import send_email
+from notifications.email import queue_email
 from .models.user import User
 from .serializers import EmailOTPSerializer, ResendOTPSerializer, UserSerializer
 from common.mixins.response import StandardResponseView
+from common.throttling import AnonRateThrottle, ScopedRateThrottle
+from oauth import login
+import json
 import logging
+import math
 
 logger = logging.getLogger("error")
 
@@ -40,7 +51,6 @@ class RegisterView(StandardResponseView):
             password=data['password'],
             first_name=data.get('first_name', ''),
             last_name=data.get('last_name', ''),
-            email_otp = otp_obj
         )
 
         # Send OTP to email
@@ -60,6 +70,7 @@ class RegisterView(StandardResponseView):
 class EmailOTPVerificationView(StandardResponseView, generics.CreateAPIView):
     serializer_class = EmailOTPSerializer
     permission_classes = []
+    throttle_scope = "otp_verify"
 
     def post(self, request):
         self.success_message = "OTP confirmed successfully"
@@ -75,7 +86,8 @@ class EmailOTPVerificationView(StandardResponseView, generics.CreateAPIView):
             user = get_user_model().objects.get(email=email)
 
             # Verify the OTP code
-            if user and not user.email_verified and user.email_otp.verify(code):
+            otp = find_otp(user.email, 'signup') if not user.email_verified else None
+            if otp and otp.verify(code):
                 user.email_verified = True
                 user.save()
 
@@ -85,7 +97,7 @@ class EmailOTPVerificationView(StandardResponseView, generics.CreateAPIView):
                 )
 
                 try:
-                    send_email.delay(
+                    queue_email(
                         subject="Welcome to Reach",
                         template_name="emails/welcome.html",
                         context={
@@ -109,6 +121,7 @@ class EmailOTPVerificationView(StandardResponseView, generics.CreateAPIView):
 #Unauthenticated OTP Resend View
 class ResendOTPView(StandardResponseView):
     permission_classes = []
+    throttle_scope = "otp_resend"
     serializer_class = ResendOTPSerializer
 
     def post(self, request):
@@ -118,7 +131,9 @@ class ResendOTPView(StandardResponseView):
             raise ValidationError({'detail': serializer.errors})
         
         token = serializer.validated_data.get('token')
-        otp = get_object_or_404(OTP, id=token, is_used=False)
+        otp = get_otp(token)
+        if otp is None:
+            raise NotFound({'detail': 'Not found.'})
         
         # limit resend interval
         if (timezone.now() - otp.updated_at) < timedelta(minutes=1):
@@ -126,8 +141,10 @@ class ResendOTPView(StandardResponseView):
         
         # Generate new OTP code
         code = generate_otp(6)
-        otp.code_hash = hash_otp(code)
-        otp.save()
+        otp.set_code(code)
+        if otp.is_used:
+            # Verified or expired since it was read
+            raise NotFound({'detail': 'Not found.'})
 
         # Send OTP to email
         try:
@@ -147,52 +164,66 @@ class ResendOTPView(StandardResponseView):
 
 class LoginView( StandardResponseView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "login"
     success_message = "User logged in successfully"
+    role = 'user'
 
     def post(self, request):
-        email = request.data.get('email')
-        password = request.data.get('password')
+        user = login.authenticate(request.data.get('email'), request.data.get('password'), self.role)
 
-        if User.objects.filter(email=email, role='user').count() == 0:
+        if not user:
             raise AuthenticationFailed({'detail': 'Invalid credentials'})
-        
-        user = authenticate(request, email=email, password=password)
 
-        if not user or not user.is_active:
-            raise AuthenticationFailed({'detail': 'Invalid credentials'})
-        
-        if not user.email_verified:
-            raise PermissionDenied("Please verify your account to continue.")
-        
-        if user.mfa_enabled:
-            code, otp_obj = create_otp(user=user.email, purpose='mfa')
-            user.email_otp = otp_obj
-            user.save(update_fields=['email_otp'])
+        return Response(login.complete_login(user))
+
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """
+    Async counterpart of `LoginView` for ASGI workers. The password hash runs in
+    a bounded thread pool so concurrent logins don't hold up other requests.
+    """
+    throttle_scope = "login"
+    success_message = "User logged in successfully"
+    role = 'user'
+
+    def check_throttles(self, request):
+        request = Request(request, authenticators=())
+        for throttle in (AnonRateThrottle(), ScopedRateThrottle()):
+            if not throttle.allow_request(request, self):
+                raise Throttled(throttle.wait())
+
+    def error_response(self, exc):
+        detail = exc.detail
+        message = detail.get('detail', detail) if isinstance(detail, dict) else detail
+        response = JsonResponse({"status": False, "message": message, "data": None}, status=exc.status_code)
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = str(math.ceil(exc.wait))
+        return response
+
+    async def post(self, request):
+        try:
+            await sync_to_async(self.check_throttles)(request)
             try:
-                send_email.delay(
-                    subject="MFA Verification",
-                    template_name="emails/mfa_verification.html",
-                    context={"name": user.first_name, "otp_code": code},
-                    recipient_list=[user.email],
-                )
-            except Exception as e:
-                logger.error(f"Error sending MFA email: {e}", exc_info=True)
-                raise ValidationError({'detail': 'Failed to send MFA email. Please try again later.'})
-            
-            return Response({'mfa_required': user.mfa_enabled, 'token': otp_obj.id}, status=200)
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                raise ParseError('Malformed JSON.')
 
+            user = await login.aauthenticate(data.get('email'), data.get('password'), self.role)
+            if not user:
+                raise AuthenticationFailed({'detail': 'Invalid credentials'})
+
+            payload = await sync_to_async(login.complete_login)(user)
+        except APIException as exc:
+            return self.error_response(exc)
+
+        return JsonResponse(
+            {"status": True, "message": self.success_message, "data": payload}, encoder=DjangoJSONEncoder
+        )
 
-        refresh = RefreshToken.for_user(user)
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': UserSerializer(user).data,
-            'mfa_required': user.mfa_enabled
-        })
-    
 class LoginMFAView(StandardResponseView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = "otp_verify"
     success_message = "MFA verified and user logged in successfully"
 
     def post(self, request):
@@ -208,10 +239,11 @@ class LoginMFAView(StandardResponseView):
             if not user.email_verified:
                 raise PermissionDenied("Please verify your account to continue.")
             
-            if not user.mfa_enabled or not user.email_otp or str(user.email_otp.id) != token:
+            otp = get_otp(token) if token else None
+            if not user.mfa_enabled or not otp or otp.user != user.email or otp.purpose != 'mfa':
                 raise ValidationError({'detail': 'MFA not enabled or invalid token'})
             
-            if not user.email_otp.verify(code):
+            if not otp.verify(code):
                 raise ValidationError({'detail': 'Invalid or expired MFA code'})
 
             # MFA successful, issue tokens
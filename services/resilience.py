@@ -0,0 +1,316 @@
+"""
+Circuit breakers and bulkheads for calls to external providers.
+
+Breaker and bulkhead state is kept in Redis so that every gunicorn/celery worker
+sees the same view of a provider. If Redis itself is unreachable the guards fail
+open and the call goes through, so a Redis outage never blocks payments.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+import redis
+import requests
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from common import metrics
+from common.redis_client import get_redis
+
+
+logger = logging.getLogger("bulkclix")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = metrics.gauge(
+    "provider_circuit_state",
+    "Circuit breaker state per provider endpoint (0=closed, 1=half_open, 2=open).",
+    ["provider", "endpoint"],
+    multiprocess_mode="max",
+)
+BREAKER_TRANSITIONS = metrics.counter(
+    "provider_circuit_transitions_total",
+    "Circuit breaker state changes.",
+    ["provider", "endpoint", "state"],
+)
+PROVIDER_REJECTIONS = metrics.counter(
+    "provider_rejections_total",
+    "Calls rejected before reaching the provider.",
+    ["provider", "endpoint", "reason"],
+)
+PROVIDER_IN_FLIGHT = metrics.gauge(
+    "provider_in_flight_calls",
+    "Calls currently in flight from this process.",
+    ["provider"],
+)
+PROVIDER_LATENCY = metrics.histogram(
+    "provider_request_duration_seconds",
+    "Time spent waiting on a provider's HTTP response.",
+    ["provider", "endpoint", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0),
+)
+
+
+class ProviderUnavailableError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Payment provider is temporarily unavailable. Please try again later."
+    default_code = "provider_unavailable"
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    default_code = "circuit_open"
+
+
+class BulkheadFullError(ProviderUnavailableError):
+    default_code = "bulkhead_full"
+
+
+# Returns {previous_state, new_state, allowed}
+ALLOW_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local now = tonumber(ARGV[1])
+local reset_timeout = tonumber(ARGV[2])
+if state == 'closed' then
+    return {state, state, 1}
+end
+if state == 'open' then
+    local opened_at = tonumber(redis.call('HGET', KEYS[1], 'opened_at') or 0)
+    if now - opened_at < reset_timeout then
+        return {state, state, 0}
+    end
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_at', now)
+    return {state, 'half_open', 1}
+end
+local probe_at = tonumber(redis.call('HGET', KEYS[1], 'probe_at') or 0)
+if now - probe_at >= reset_timeout then
+    redis.call('HSET', KEYS[1], 'probe_at', now)
+    return {state, state, 1}
+end
+return {state, state, 0}
+"""
+
+# Returns {previous_state, new_state}
+FAILURE_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local now = tonumber(ARGV[1])
+local threshold = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if state == 'open' then
+    return {state, state}
+end
+if state == 'half_open' then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now, 'failures', 0)
+    return {state, 'open'}
+end
+local window_start = tonumber(redis.call('HGET', KEYS[1], 'window_start') or 0)
+if now - window_start > window then
+    redis.call('HSET', KEYS[1], 'window_start', now, 'failures', 0)
+end
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+if failures >= threshold then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now, 'failures', 0)
+    return {state, 'open'}
+end
+return {state, state}
+"""
+
+# Returns {previous_state, new_state}
+SUCCESS_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' then
+    redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0)
+    return {state, 'closed'}
+end
+return {state, state}
+"""
+
+# Returns 1 if a slot was acquired, 0 otherwise.
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - lease)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(lease))
+return 1
+"""
+
+STATE_TTL = 24 * 60 * 60
+
+
+class CircuitBreaker:
+    """
+    Redis-backed circuit breaker for one provider endpoint.
+
+    closed    -> calls flow; `failure_threshold` failures within `failure_window` opens the circuit.
+    open      -> calls are rejected until `reset_timeout` has elapsed.
+    half_open -> a single probe call is let through; success closes, failure re-opens.
+    """
+
+    def __init__(self, provider, endpoint, failure_threshold=5, failure_window=60, reset_timeout=30, **kwargs):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.key = f"circuit:{provider}:{endpoint}"
+
+    def _run(self, script, *args):
+        return get_redis().eval(script, 1, self.key, *args)
+
+    def _transition(self, previous, new):
+        BREAKER_STATE.set(STATE_VALUES.get(new, 0), provider=self.provider, endpoint=self.endpoint)
+        if previous != new:
+            BREAKER_TRANSITIONS.inc(provider=self.provider, endpoint=self.endpoint, state=new)
+            logger.warning("Circuit %s changed from %s to %s", self.key, previous, new)
+
+    def allow(self) -> bool:
+        try:
+            previous, new, allowed = self._run(ALLOW_SCRIPT, time.time(), self.reset_timeout)
+        except redis.RedisError as e:
+            logger.warning("Circuit %s unavailable, failing open: %s", self.key, str(e))
+            return True
+
+        self._transition(previous, new)
+        return bool(allowed)
+
+    def record_success(self):
+        try:
+            previous, new = self._run(SUCCESS_SCRIPT)
+        except redis.RedisError:
+            return
+        self._transition(previous, new)
+
+    def record_failure(self):
+        try:
+            previous, new = self._run(
+                FAILURE_SCRIPT, time.time(), self.failure_threshold, self.failure_window, STATE_TTL
+            )
+        except redis.RedisError:
+            return
+        self._transition(previous, new)
+
+    def state(self):
+        try:
+            return get_redis().hget(self.key, "state") or CLOSED
+        except redis.RedisError:
+            return CLOSED
+
+
+class Bulkhead:
+    """
+    Caps the number of concurrent in-flight calls to a provider across all workers.
+    Each slot is a lease in a Redis sorted set, so slots held by a crashed worker
+    are reclaimed once `lease_timeout` has passed.
+    """
+
+    def __init__(self, provider, max_concurrent=20, lease_timeout=60, **kwargs):
+        self.provider = provider
+        self.max_concurrent = max_concurrent
+        self.lease_timeout = lease_timeout
+        self.key = f"bulkhead:{provider}"
+
+    def acquire(self):
+        """Returns a slot token, `None` when Redis is unreachable, or raises BulkheadFullError."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = get_redis().eval(
+                ACQUIRE_SCRIPT, 1, self.key, time.time(), self.lease_timeout, self.max_concurrent, token
+            )
+        except redis.RedisError as e:
+            logger.warning("Bulkhead %s unavailable, failing open: %s", self.key, str(e))
+            return None
+
+        if not acquired:
+            raise BulkheadFullError()
+        return token
+
+    def release(self, token):
+        if token is None:
+            return
+        try:
+            get_redis().zrem(self.key, token)
+        except redis.RedisError:
+            pass  # the lease expires on its own
+
+    @contextmanager
+    def slot(self):
+        token = self.acquire()
+        PROVIDER_IN_FLIGHT.inc(provider=self.provider)
+        try:
+            yield
+        finally:
+            PROVIDER_IN_FLIGHT.dec(provider=self.provider)
+            self.release(token)
+
+
+def get_provider_config(provider):
+    return settings.PROVIDER_RESILIENCE.get(provider, {})
+
+
+def get_circuit_breaker(provider, endpoint):
+    return CircuitBreaker(provider, endpoint, **get_provider_config(provider))
+
+
+def get_bulkhead(provider):
+    conf = get_provider_config(provider)
+    return Bulkhead(provider, lease_timeout=conf.get("timeout", 30) * 2, **conf)
+
+
+def guarded_request(method, provider, endpoint, url, **kwargs) -> requests.Response:
+    """
+    Performs an HTTP request to a provider behind its circuit breaker and bulkhead.
+
+    Timeouts, connection errors and 5xx responses count as failures. 4xx responses
+    are the caller's problem and leave the breaker untouched. The response (or the
+    original `requests` exception) is handed back so callers keep their own error handling.
+
+    Raises:
+        CircuitOpenError: The endpoint's circuit is open.
+        BulkheadFullError: Too many calls to the provider are already in flight.
+    """
+    breaker = get_circuit_breaker(provider, endpoint)
+    if not breaker.allow():
+        PROVIDER_REJECTIONS.inc(provider=provider, endpoint=endpoint, reason="circuit_open")
+        logger.error("Rejected %s %s call: circuit open", provider, endpoint)
+        raise CircuitOpenError()
+
+    kwargs.setdefault("timeout", get_provider_config(provider).get("timeout", 30))
+
+    try:
+        with get_bulkhead(provider).slot():
+            started = time.perf_counter()
+            try:
+                response = requests.request(method, url, **kwargs)
+            except requests.exceptions.Timeout:
+                PROVIDER_LATENCY.observe(time.perf_counter() - started, provider=provider, endpoint=endpoint, outcome="timeout")
+                breaker.record_failure()
+                raise
+            except requests.exceptions.ConnectionError:
+                PROVIDER_LATENCY.observe(time.perf_counter() - started, provider=provider, endpoint=endpoint, outcome="connection_error")
+                breaker.record_failure()
+                raise
+            PROVIDER_LATENCY.observe(
+                time.perf_counter() - started, provider=provider, endpoint=endpoint,
+                outcome="server_error" if response.status_code >= 500 else "ok",
+            )
+    except BulkheadFullError:
+        PROVIDER_REJECTIONS.inc(provider=provider, endpoint=endpoint, reason="bulkhead_full")
+        logger.error("Rejected %s %s call: bulkhead full", provider, endpoint)
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return response
@@ -6,27 +6,41 @@ from rest_framework.exceptions import (
 )
 import logging
 from django.core.mail import send_mail
-from django.template.loader import get_template
 from django.conf import settings
 from celery import shared_task
+from services.resilience import ProviderUnavailableError, guarded_request
+from notifications.rendering import render_email
 
 
 logger = logging.getLogger("bulkclix")
 
-proxies = {"http": "http://127.0.0.1:8080", "https": "http://127.0.0.1:8080"}
+# Point these at `python manage.py simulate_providers` to run without the real providers
+BULKCLIX_BASE_URL = config("BULKCLIX_BASE_URL", default="https://api.bulkclix.com/api/v1")
+ARKESEL_BASE_URL = config("ARKESEL_BASE_URL", default="https://sms.arkesel.com/api/v2")
+CALLBACK_BASE_URL = config("CALLBACK_BASE_URL", default="https://88f5651fff71.ngrok-free.app")
+BULKCLIX_STATUS_PATH = config("BULKCLIX_STATUS_PATH", default="/payment-api/transaction/status")
+BULKCLIX_NAME_ENQUIRY_PATH = config("BULKCLIX_NAME_ENQUIRY_PATH", default="/payment-api/name-enquiry")
 
-def send_sms(recipients: list, message: str) -> bool:
+# Optional debugging proxy (e.g. mitmproxy) for outgoing Bulkclix payouts
+BULKCLIX_PROXY = config("BULKCLIX_PROXY", default="")
+proxies = {"http": BULKCLIX_PROXY, "https": BULKCLIX_PROXY} if BULKCLIX_PROXY else None
+
+def send_sms_batch(recipients: list, message: str) -> dict:
     """
-    Send an SMS to the specified phone number with the given message.
-    
+    Send one message to many recipients in a single Arkesel call.
+
     Args:
-        phone_number (str): The recipient's phone number.
+        recipients (list): The recipients' phone numbers.
         message (str): The message content to be sent.
-        
+
     Returns:
-        bool: True if the SMS was sent successfully, False otherwise.
+        dict: Arkesel's response, including a per-recipient message id under "data".
+
+    Raises:
+        requests.RequestException: The call failed or Arkesel returned an error status.
+        ProviderUnavailableError: Arkesel's circuit is open or too many calls are in flight.
     """
-    url = "https://sms.arkesel.com/api/v2/sms/send"
+    url = f"{ARKESEL_BASE_URL}/sms/send"
     api_key = config("SMS_API_KEY")
     
     headers = {
@@ -40,14 +54,28 @@ def send_sms(recipients: list, message: str) -> bool:
         "recipients": recipients,
         "sandbox": True
     }
+
+    response = guarded_request("POST", "arkesel", "sms_send", url=url, headers=headers, json=body)
+    response.raise_for_status()
+    return response.json()
+
+def send_sms(recipients: list, message: str) -> bool:
+    """
+    Send an SMS to the specified phone number with the given message.
     
+    Args:
+        phone_number (str): The recipient's phone number.
+        message (str): The message content to be sent.
+        
+    Returns:
+        bool: True if the SMS was sent successfully, False otherwise.
+    """
     try:
-        response = requests.post(url=url,headers=headers, json=body)
-        response.raise_for_status()
-        print(response.json())
-        return response.json().get("status", False)
-    except requests.RequestException as e:
-        print(f"Error sending SMS: {e}")
+        data = send_sms_batch(recipients, message)
+        logger.info("SMS sent to %s recipients: %s", len(recipients), data.get("status"))
+        return data.get("status", False)
+    except (requests.RequestException, ProviderUnavailableError) as e:
+        logger.error("Error sending SMS: %s", str(e), exc_info=True)
         return False
     
 def check_sms_balance():
@@ -57,7 +85,7 @@ def check_sms_balance():
     Returns:
         dict: A dictionary containing balance details if successful, None otherwise.
     """
-    api_url = "https://sms.arkesel.com/api/v2/clients/balance-details"
+    api_url = f"{ARKESEL_BASE_URL}/clients/balance-details"
     api_key = config("SMS_API_KEY")
     
     headers = {
@@ -66,11 +94,11 @@ def check_sms_balance():
     }
 
     try:
-        response = requests.get(api_url, headers=headers) 
+        response = guarded_request("GET", "arkesel", "sms_balance", api_url, headers=headers)
         response.raise_for_status()
         print(response.json())
         return response.json().get("status", None)
-    except requests.RequestException as e:
+    except (requests.RequestException, ProviderUnavailableError) as e:
         print(f"Error sending SMS: {e}")
         return False
     
@@ -86,7 +114,7 @@ def charge_mobile_money(amount:int, phone_number:str, provider:str, transaction_
     Returns:
         dict: Response data from the Bulkclix API.
     """
-    url = "https://api.bulkclix.com/api/v1/payment-api/momopay"
+    url = f"{BULKCLIX_BASE_URL}/payment-api/momopay"
     api_key = config("BULKCLIX_API_KEY")
 
     headers = {
@@ -100,12 +128,12 @@ def charge_mobile_money(amount:int, phone_number:str, provider:str, transaction_
         "phone_number":phone_number,
         "network":provider, # MTN , TELECEL, AIRTELTIGO
         "transaction_id": transaction_id, # Unique transaction ID from your system
-        "callback_url": f"https://88f5651fff71.ngrok-free.app/api/v1/webhooks/bulkclix/gc/{dynamic_id}", # Your callback URL to receive transaction status
+        "callback_url": f"{CALLBACK_BASE_URL}/api/v1/webhooks/bulkclix/gc/{dynamic_id}", # Your callback URL to receive transaction status
         "reference":"reach test"
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = guarded_request("POST", "bulkclix", "momopay", url, json=payload, headers=headers)
         response.raise_for_status()
     except requests.exceptions.HTTPError:
         if response.status_code == 401:
@@ -120,6 +148,8 @@ def charge_mobile_money(amount:int, phone_number:str, provider:str, transaction_
     except requests.exceptions.ConnectionError:
         logger.error("Failed to connect to Bulkclix.")
         raise APIException("internal error")
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         logger.error("Unexpected error: %s", str(e), exc_info=True)
         raise APIException("An unexpected error occured.")
@@ -146,7 +176,7 @@ def send_mobile_money(amount:int, phone_number:str, provider:str, account_name:
         dict: Response data from the Bulkclix API.
     """
 
-    url = "https://api.bulkclix.com/api/v1/payment-api/send/mobilemoney"
+    url = f"{BULKCLIX_BASE_URL}/payment-api/send/mobilemoney"
     api_key = config("BULKCLIX_API_KEY")
 
     headers = {
@@ -164,7 +194,7 @@ def send_mobile_money(amount:int, phone_number:str, provider:str, account_name:
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, proxies=proxies, verify=False)
+        response = guarded_request("POST", "bulkclix", "send_mobilemoney", url, json=payload, headers=headers, proxies=proxies, verify=not proxies)
         response.raise_for_status()
     except requests.exceptions.HTTPError:
         if response.status_code == 401:
@@ -179,6 +209,8 @@ def send_mobile_money(amount:int, phone_number:str, provider:str, account_name:
     except requests.exceptions.ConnectionError:
         logger.error("Failed to connect to Bulkclix.")
         raise APIException("internal error")
+    except ProviderUnavailableError:
+        raise
     except Exception as e:
         logger.error("Unexpected error: %s", str(e), exc_info=True)
         raise APIException("An unexpected error occured.")
@@ -192,13 +224,72 @@ def send_mobile_money(amount:int, phone_number:str, provider:str, account_name:
 
     return data
 
+def check_transaction_status(reference: str, reference_type: str = "transaction_id"):
+    """
+    Look up a collection or payout at Bulkclix.
+
+    Args:
+        reference (str): The reference we sent with the request.
+        reference_type (str): "transaction_id" for collections, "client_reference" for payouts.
+
+    Returns:
+        dict: The provider's record (status, amount, ext_transaction_id), or None if Bulkclix doesn't know it.
+
+    Raises:
+        requests.RequestException: The lookup failed.
+        ProviderUnavailableError: Bulkclix's circuit is open or too many calls are in flight.
+    """
+    url = f"{BULKCLIX_BASE_URL}{BULKCLIX_STATUS_PATH}"
+    api_key = config("BULKCLIX_API_KEY")
+
+    headers = {
+        "x-api-key": api_key,
+        "Accept": "application/json",
+    }
+
+    response = guarded_request("GET", "bulkclix", "transaction_status", url, params={reference_type: reference}, headers=headers)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json().get("data") or None
+
+def get_account_name(phone_number: str, provider: str):
+    """
+    Resolve a mobile-money wallet to its registered name.
+
+    Args:
+        phone_number (str): The wallet's phone number.
+        provider (str): The mobile money provider (e.g., MTN, TELECEL, AIRTELTIGO).
+
+    Returns:
+        str: The registered account name, or None if the number has no wallet on that network.
+
+    Raises:
+        requests.RequestException: The lookup failed.
+        ProviderUnavailableError: Bulkclix's circuit is open or too many calls are in flight.
+    """
+    url = f"{BULKCLIX_BASE_URL}{BULKCLIX_NAME_ENQUIRY_PATH}"
+    api_key = config("BULKCLIX_API_KEY")
+
+    headers = {
+        "x-api-key": api_key,
+        "Accept": "application/json",
+    }
+
+    params = {"account_number": phone_number, "channel": provider}
+    response = guarded_request("GET", "bulkclix", "name_enquiry", url, params=params, headers=headers)
+    if response.status_code in (404, 422):
+        return None
+    response.raise_for_status()
+    return (response.json().get("data") or {}).get("account_name") or None
+
 @shared_task
 def send_email(subject, template_name, context, recipient_list):
     """
     Generic function to send templated HTML emails.
     """
     
-    html_message = get_template(template_name).render(context)
+    html_message = render_email(template_name, context)
     send_mail(
         subject=subject,
         message="",
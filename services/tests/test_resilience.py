@@ -0,0 +1,128 @@
+import pytest
+import redis
+import requests
+
+from services import resilience
+from services.resilience import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    guarded_request,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def provider_settings(settings):
+    settings.PROVIDER_RESILIENCE = {
+        "testpay": {
+            "timeout": 5,
+            "failure_threshold": 2,
+            "failure_window": 60,
+            "reset_timeout": 30,
+            "max_concurrent": 1,
+        }
+    }
+    return settings
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_failures(self, fake_redis):
+        breaker = CircuitBreaker("testpay", "charge", failure_threshold=2)
+        breaker.record_failure()
+        assert breaker.state() == "closed"
+        breaker.record_failure()
+        assert breaker.state() == "open"
+        assert breaker.allow() is False
+
+    def test_half_open_probe_closes_on_success(self, fake_redis, monkeypatch):
+        breaker = CircuitBreaker("testpay", "charge", failure_threshold=1, reset_timeout=30)
+        now = 1_000_000.0
+        monkeypatch.setattr(resilience.time, "time", lambda: now)
+        breaker.record_failure()
+        assert breaker.allow() is False
+
+        now += 31
+        assert breaker.allow() is True  # the probe
+        assert breaker.state() == "half_open"
+        assert breaker.allow() is False  # only one probe at a time
+
+        breaker.record_success()
+        assert breaker.state() == "closed"
+        assert breaker.allow() is True
+
+    def test_half_open_probe_reopens_on_failure(self, fake_redis, monkeypatch):
+        breaker = CircuitBreaker("testpay", "charge", failure_threshold=1, reset_timeout=30)
+        now = 1_000_000.0
+        monkeypatch.setattr(resilience.time, "time", lambda: now)
+        breaker.record_failure()
+        now += 31
+        assert breaker.allow() is True
+        breaker.record_failure()
+        assert breaker.state() == "open"
+        assert breaker.allow() is False
+
+    def test_state_is_shared_between_instances(self, fake_redis):
+        CircuitBreaker("testpay", "charge", failure_threshold=1).record_failure()
+        assert CircuitBreaker("testpay", "charge").allow() is False
+        assert CircuitBreaker("testpay", "payout").allow() is True
+
+    def test_fails_open_when_redis_is_down(self, monkeypatch):
+        class BrokenRedis:
+            def eval(self, *args):
+                raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(resilience, "get_redis", lambda: BrokenRedis())
+        assert CircuitBreaker("testpay", "charge").allow() is True
+
+
+class TestBulkhead:
+    def test_rejects_when_full_and_releases(self, fake_redis):
+        bulkhead = Bulkhead("testpay", max_concurrent=1)
+        with bulkhead.slot():
+            with pytest.raises(BulkheadFullError):
+                bulkhead.acquire()
+        token = bulkhead.acquire()
+        assert token is not None
+        bulkhead.release(token)
+
+
+class TestGuardedRequest:
+    def test_server_errors_open_circuit_then_fail_fast(self, fake_redis, provider_settings, monkeypatch):
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append(kwargs["timeout"])
+            return FakeResponse(502)
+
+        monkeypatch.setattr(resilience.requests, "request", fake_request)
+
+        for _ in range(2):
+            assert guarded_request("POST", "testpay", "charge", "http://provider").status_code == 502
+
+        with pytest.raises(CircuitOpenError):
+            guarded_request("POST", "testpay", "charge", "http://provider")
+
+        assert calls == [5, 5]
+        assert resilience.PROVIDER_REJECTIONS.value(provider="testpay", endpoint="charge", reason="circuit_open") >= 1
+
+    def test_client_errors_do_not_trip_circuit(self, fake_redis, provider_settings, monkeypatch):
+        monkeypatch.setattr(resilience.requests, "request", lambda method, url, **kwargs: FakeResponse(400))
+        for _ in range(3):
+            guarded_request("POST", "testpay", "charge", "http://provider")
+        assert CircuitBreaker("testpay", "charge").state() == "closed"
+
+    def test_timeouts_count_as_failures(self, fake_redis, provider_settings, monkeypatch):
+        def timeout(method, url, **kwargs):
+            raise requests.exceptions.Timeout()
+
+        monkeypatch.setattr(resilience.requests, "request", timeout)
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.Timeout):
+                guarded_request("POST", "testpay", "charge", "http://provider")
+        assert CircuitBreaker("testpay", "charge").state() == "open"
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class SimulatorConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'simulator'
+    verbose_name = 'Provider simulator'
@@ -0,0 +1,65 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.server import ProviderSimulator, SimulatorConfig, SimulatorHTTPServer, SMTPSinkServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for Bulkclix, Arkesel and SMTP. Point the app at it with "
+        "BULKCLIX_BASE_URL=http://HOST:PORT/api/v1, ARKESEL_BASE_URL=http://HOST:PORT/api/v2, "
+        "EMAIL_HOST=HOST EMAIL_PORT=SMTP_PORT EMAIL_USE_SSL=False and CALLBACK_BASE_URL=<this API's URL>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8090, help="HTTP port for Bulkclix and Arkesel.")
+        parser.add_argument("--smtp-port", type=int, default=8025, help="SMTP sink port, 0 to disable.")
+        parser.add_argument("--latency", default="lognormal:0.3,0.5", help="Response latency distribution, e.g. fixed:0.1, uniform:0.1,0.5, lognormal:0.3,0.5.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with a 5xx.")
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of calls that hang for --timeout-after seconds.")
+        parser.add_argument("--timeout-after", type=float, default=60.0)
+        parser.add_argument("--callback-delay", default="uniform:1,5", help="Delay distribution before the deposit webhook fires.")
+        parser.add_argument("--callback-failure-rate", type=float, default=0.0, help="Fraction of deposits reported as failed.")
+        parser.add_argument("--duplicate-callback-rate", type=float, default=0.0, help="Fraction of deposits whose webhook is delivered twice.")
+        parser.add_argument("--no-callbacks", action="store_true", help="Never call the deposit webhook.")
+
+    def handle(self, *args, **options):
+        try:
+            config = SimulatorConfig(
+                latency=options["latency"],
+                error_rate=options["error_rate"],
+                timeout_rate=options["timeout_rate"],
+                timeout_after=options["timeout_after"],
+                callback_delay=options["callback_delay"],
+                callback_failure_rate=options["callback_failure_rate"],
+                duplicate_callback_rate=options["duplicate_callback_rate"],
+                callbacks=not options["no_callbacks"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        simulator = ProviderSimulator(config)
+        http_server = SimulatorHTTPServer((options["host"], options["port"]), simulator)
+        self.stdout.write(f"Provider simulator listening on http://{options['host']}:{options['port']}")
+
+        smtp_server = None
+        if options["smtp_port"]:
+            smtp_server = SMTPSinkServer((options["host"], options["smtp_port"]), simulator)
+            threading.Thread(target=smtp_server.serve_forever, daemon=True).start()
+            self.stdout.write(f"SMTP sink listening on {options['host']}:{options['smtp_port']}")
+
+        try:
+            http_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            http_server.server_close()
+            if smtp_server:
+                smtp_server.shutdown()
+                smtp_server.server_close()
+
+            self.stdout.write("\nRequests handled:")
+            for key, value in sorted(simulator.stats.items()):
+                self.stdout.write(f"  {key}: {value}")
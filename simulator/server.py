@@ -0,0 +1,365 @@
+"""
+Local stand-in for the Bulkclix, Arkesel and SMTP providers.
+
+Implements just enough of each provider's API for end-to-end and throughput tests
+to run offline:
+
+    Bulkclix  POST /api/v1/payment-api/momopay            (+ async webhook callback)
+              POST /api/v1/payment-api/send/mobilemoney
+              GET  /api/v1/payment-api/transaction/status
+              GET  /api/v1/payment-api/name-enquiry
+    Arkesel   POST /api/v2/sms/send
+              GET  /api/v2/clients/balance-details
+    SMTP      plain-text sink that accepts and discards every message
+
+Latency, error rates and callback behaviour are driven by `SimulatorConfig`.
+"""
+import json
+import logging
+import math
+import random
+import secrets
+import socketserver
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import requests
+
+
+logger = logging.getLogger("simulator")
+
+
+def parse_distribution(spec):
+    """
+    Parses a latency distribution spec into a callable returning seconds.
+
+    Supported specs:
+        fixed:0.2             always 200ms
+        uniform:0.1,0.5       uniformly between 100ms and 500ms
+        normal:0.3,0.1        mean 300ms, stddev 100ms (clamped at 0)
+        lognormal:0.3,0.6     median 300ms, sigma 0.6 (long tail, closest to real providers)
+        exp:0.2               exponential with a 200ms mean
+    """
+    name, _, raw_args = spec.partition(":")
+    try:
+        args = [float(a) for a in raw_args.split(",")] if raw_args else []
+    except ValueError:
+        raise ValueError(f"Invalid distribution arguments: {spec}")
+
+    distributions = {
+        "fixed": (1, lambda v: v),
+        "uniform": (2, lambda lo, hi: random.uniform(lo, hi)),
+        "normal": (2, lambda mean, std: max(0.0, random.gauss(mean, std))),
+        "lognormal": (2, lambda median, sigma: random.lognormvariate(math.log(median), sigma)),
+        "exp": (1, lambda mean: random.expovariate(1 / mean)),
+    }
+    if name not in distributions:
+        raise ValueError(f"Unknown distribution '{name}'. Choose from {', '.join(distributions)}.")
+
+    arity, sample = distributions[name]
+    if len(args) != arity:
+        raise ValueError(f"Distribution '{name}' takes {arity} argument(s), got {len(args)}.")
+    return lambda: sample(*args)
+
+
+class SimulatorConfig:
+    def __init__(
+        self,
+        latency="lognormal:0.3,0.5",
+        error_rate=0.0,
+        timeout_rate=0.0,
+        timeout_after=60.0,
+        callback_delay="uniform:1,5",
+        callback_failure_rate=0.0,
+        duplicate_callback_rate=0.0,
+        callbacks=True,
+    ):
+        self.latency = parse_distribution(latency)
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_after = timeout_after
+        self.callback_delay = parse_distribution(callback_delay)
+        self.callback_failure_rate = callback_failure_rate
+        self.duplicate_callback_rate = duplicate_callback_rate
+        self.callbacks = callbacks
+
+
+class ProviderSimulator:
+    """Holds simulator configuration, the transactions it has seen and request stats."""
+
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.stats = Counter()
+        self.transactions = {}
+        self.references = {}
+        # Registered wallet names by number; other numbers get a generated name,
+        # numbers starting with "000" have no wallet.
+        self.account_names = {}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def remember(self, ext_transaction_id, record):
+        with self._lock:
+            self.transactions[ext_transaction_id] = record
+            self.references[record.get("transaction_id") or record.get("client_reference")] = ext_transaction_id
+
+    # --- Bulkclix ---
+
+    def momopay(self, payload):
+        missing = [f for f in ("amount", "phone_number", "network", "transaction_id", "callback_url") if not payload.get(f)]
+        if missing:
+            return 400, {"message": f"The {missing[0]} field is required."}
+
+        ext_transaction_id = uuid.uuid4().hex
+        final_status = "failed" if random.random() < self.config.callback_failure_rate else "success"
+        # The collection settles after the callback delay whether or not the callback is delivered.
+        delay = self.config.callback_delay()
+        self.remember(ext_transaction_id, {
+            "type": "collection",
+            "transaction_id": payload["transaction_id"],
+            "amount": payload["amount"],
+            "status": "pending",
+            "final_status": final_status,
+            "settles_at": time.time() + delay,
+        })
+
+        if self.config.callbacks:
+            self.schedule_callback(payload, ext_transaction_id, final_status, delay)
+
+        return 200, {
+            "message": "Payment request sent successfully",
+            "data": {
+                "transaction_id": ext_transaction_id,
+                "amount": payload["amount"],
+                "phone_number": payload["phone_number"],
+                "network": payload["network"],
+            },
+        }
+
+    def send_mobilemoney(self, payload):
+        missing = [f for f in ("amount", "account_number", "channel", "account_name", "client_reference") if not payload.get(f)]
+        if missing:
+            return 400, {"message": f"The {missing[0]} field is required."}
+
+        ext_transaction_id = uuid.uuid4().hex
+        self.remember(ext_transaction_id, {
+            "type": "payout",
+            "client_reference": payload["client_reference"],
+            "amount": payload["amount"],
+            "status": "success",
+        })
+        return 200, {
+            "message": "Transfer initiated successfully",
+            "transaction_id": ext_transaction_id,
+            "data": {
+                "transaction_id": ext_transaction_id,
+                "amount": payload["amount"],
+                "account_number": payload["account_number"],
+                "channel": payload["channel"],
+            },
+        }
+
+    def transaction_status(self, payload):
+        reference = payload.get("transaction_id") or payload.get("client_reference")
+        with self._lock:
+            ext_transaction_id = self.references.get(reference)
+            record = self.transactions.get(ext_transaction_id)
+            if record is None:
+                return 404, {"message": "Transaction not found"}
+            if record["status"] == "pending" and time.time() >= record.get("settles_at", 0):
+                record["status"] = record["final_status"]
+            status = record["status"]
+
+        return 200, {
+            "message": "Transaction status retrieved",
+            "data": {
+                "transaction_id": reference,
+                "ext_transaction_id": ext_transaction_id,
+                "amount": record["amount"],
+                "status": status,
+            },
+        }
+
+    def name_enquiry(self, payload):
+        number = payload.get("account_number") or ""
+        if not number or not payload.get("channel"):
+            return 422, {"message": "The account_number and channel fields are required."}
+        if number.startswith("000"):
+            return 404, {"message": "Account not found"}
+        name = self.account_names.get(number) or f"MOMO USER {number[-4:]}"
+        return 200, {"message": "Account name retrieved", "data": {"account_number": number, "account_name": name}}
+
+    def schedule_callback(self, payload, ext_transaction_id, final_status, delay=None):
+        body = {
+            "amount": payload["amount"],
+            "status": final_status,
+            "transaction_id": payload["transaction_id"],
+            "ext_transaction_id": ext_transaction_id,
+            "phone_number": payload["phone_number"],
+        }
+        delays = [delay if delay is not None else self.config.callback_delay()]
+        if random.random() < self.config.duplicate_callback_rate:
+            delays.append(self.config.callback_delay())
+        for seconds in delays:
+            timer = threading.Timer(seconds, self.deliver_callback, args=(payload["callback_url"], body, ext_transaction_id))
+            timer.daemon = True
+            timer.start()
+
+    def deliver_callback(self, url, body, ext_transaction_id):
+        with self._lock:
+            record = self.transactions.get(ext_transaction_id)
+            if record:
+                record["status"] = body["status"]
+        try:
+            response = self._session.post(url, json=body, timeout=10)
+            self.count(f"callback_{response.status_code}")
+        except requests.RequestException as e:
+            self.count("callback_error")
+            logger.warning("Callback to %s failed: %s", url, str(e))
+
+    # --- Arkesel ---
+
+    def sms_send(self, payload):
+        recipients = payload.get("recipients") or []
+        if not payload.get("message") or not recipients:
+            return 422, {"status": "error", "message": "message and recipients are required"}
+        return 200, {
+            "status": "success",
+            "data": [{"recipient": r, "id": str(uuid.uuid4())} for r in recipients],
+        }
+
+    def sms_balance(self, payload):
+        return 200, {"status": "success", "data": {"sms_balance": 100000, "main_balance": "1000.00"}}
+
+
+ROUTES = {
+    ("POST", "/api/v1/payment-api/momopay"): ("bulkclix", ProviderSimulator.momopay),
+    ("POST", "/api/v1/payment-api/send/mobilemoney"): ("bulkclix", ProviderSimulator.send_mobilemoney),
+    ("GET", "/api/v1/payment-api/transaction/status"): ("bulkclix", ProviderSimulator.transaction_status),
+    ("GET", "/api/v1/payment-api/name-enquiry"): ("bulkclix", ProviderSimulator.name_enquiry),
+    ("POST", "/api/v2/sms/send"): ("arkesel", ProviderSimulator.sms_send),
+    ("GET", "/api/v2/clients/balance-details"): ("arkesel", ProviderSimulator.sms_balance),
+}
+
+AUTH_HEADERS = {"bulkclix": "x-api-key", "arkesel": "api-key"}
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ProviderSimulator/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        simulator = self.server.simulator
+        path, _, query = self.path.partition("?")
+        path = path.rstrip("/")
+        route = ROUTES.get((method, path))
+
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        if route is None:
+            return self.respond(404, {"message": "Not found"})
+
+        provider, handler = route
+        simulator.count(f"{provider}{path}")
+
+        time.sleep(simulator.config.latency())
+
+        if not self.headers.get(AUTH_HEADERS[provider]):
+            return self.respond(401, {"message": "Unauthenticated."})
+
+        if random.random() < simulator.config.timeout_rate:
+            simulator.count("injected_timeout")
+            time.sleep(simulator.config.timeout_after)
+        if random.random() < simulator.config.error_rate:
+            simulator.count("injected_error")
+            return self.respond(500, {"message": "Server Error"})
+
+        try:
+            payload = json.loads(raw) if raw else dict(parse_qsl(query))
+        except ValueError:
+            return self.respond(400, {"message": "Invalid JSON"})
+
+        status, body = handler(simulator, payload)
+        self.respond(status, body)
+
+    def respond(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SimulatorHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, simulator: ProviderSimulator):
+        super().__init__(address, SimulatorRequestHandler)
+        self.simulator = simulator
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal plain SMTP server that accepts every message and throws it away."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        simulator = self.server.simulator
+        simulator.count("smtp_connection")
+        self.reply("220 simulator ESMTP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250-simulator\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                time.sleep(simulator.config.latency())
+                if random.random() < simulator.config.error_rate:
+                    simulator.count("smtp_injected_error")
+                    self.reply("451 Temporary failure")
+                else:
+                    simulator.count("smtp_message")
+                    self.reply(f"250 OK queued as {secrets.token_hex(6)}")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, simulator: ProviderSimulator):
+        super().__init__(address, SMTPSinkHandler)
+        self.simulator = simulator
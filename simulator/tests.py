@@ -0,0 +1,121 @@
+import smtplib
+import threading
+from email.message import EmailMessage
+
+import pytest
+import requests
+
+from services import services
+from simulator.server import ProviderSimulator, SimulatorConfig, SimulatorHTTPServer, SMTPSinkServer, parse_distribution
+
+
+@pytest.fixture
+def simulator():
+    """Runs a zero-latency simulator on a free port for the duration of a test."""
+    sim = ProviderSimulator(SimulatorConfig(latency="fixed:0", callback_delay="fixed:0"))
+    server = SimulatorHTTPServer(("127.0.0.1", 0), sim)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sim.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield sim
+    server.shutdown()
+    server.server_close()
+
+
+class TestParseDistribution:
+    def test_fixed(self):
+        assert parse_distribution("fixed:0.25")() == 0.25
+
+    def test_uniform_within_bounds(self):
+        sample = parse_distribution("uniform:0.1,0.2")
+        assert all(0.1 <= sample() <= 0.2 for _ in range(100))
+
+    @pytest.mark.parametrize("spec", ["gamma:1", "fixed", "uniform:1", "normal:a,b"])
+    def test_invalid_specs(self, spec):
+        with pytest.raises(ValueError):
+            parse_distribution(spec)
+
+
+class TestBulkclixSimulator:
+    def test_charge_mobile_money_triggers_callback(self, simulator, fake_redis, monkeypatch):
+        received = threading.Event()
+        callbacks = []
+
+        def capture(self, url, body, ext_transaction_id):
+            callbacks.append((url, body))
+            received.set()
+
+        monkeypatch.setattr(ProviderSimulator, "deliver_callback", capture)
+        monkeypatch.setattr(services, "BULKCLIX_BASE_URL", f"{simulator.url}/api/v1")
+        monkeypatch.setattr(services, "CALLBACK_BASE_URL", "http://testserver")
+
+        data = services.charge_mobile_money(
+            amount=10, phone_number="0240000000", provider="MTN", transaction_id="1234567890123", dynamic_id="abc"
+        )
+
+        assert received.wait(timeout=5)
+        url, body = callbacks[0]
+        assert url == "http://testserver/api/v1/webhooks/bulkclix/gc/abc"
+        assert body["status"] == "success"
+        assert body["transaction_id"] == "1234567890123"
+        assert body["ext_transaction_id"] == data["data"]["transaction_id"]
+
+    def test_send_mobile_money(self, simulator, fake_redis, monkeypatch):
+        monkeypatch.setattr(services, "BULKCLIX_BASE_URL", f"{simulator.url}/api/v1")
+        data = services.send_mobile_money(
+            amount=10, phone_number="0240000000", provider="MTN", account_name="Jane Doe", client_reference="123"
+        )
+        assert data["transaction_id"] in simulator.transactions
+
+    def test_transaction_status(self, simulator, fake_redis, monkeypatch):
+        simulator.config.callbacks = False
+        monkeypatch.setattr(services, "BULKCLIX_BASE_URL", f"{simulator.url}/api/v1")
+        data = services.charge_mobile_money(
+            amount=10, phone_number="0240000000", provider="MTN", transaction_id="1234567890123", dynamic_id="abc"
+        )
+
+        record = services.check_transaction_status("1234567890123")
+        assert record["status"] == "success"
+        assert record["ext_transaction_id"] == data["data"]["transaction_id"]
+        assert services.check_transaction_status("unknown") is None
+
+    def test_name_enquiry(self, simulator, fake_redis, monkeypatch):
+        simulator.account_names["0241234567"] = "AMA MENSAH"
+        monkeypatch.setattr(services, "BULKCLIX_BASE_URL", f"{simulator.url}/api/v1")
+        assert services.get_account_name("0241234567", "MTN") == "AMA MENSAH"
+        assert services.get_account_name("0001234567", "MTN") is None
+
+    def test_missing_api_key_is_rejected(self, simulator):
+        response = requests.post(f"{simulator.url}/api/v1/payment-api/momopay", json={})
+        assert response.status_code == 401
+
+    def test_injected_errors(self, simulator):
+        simulator.config.error_rate = 1.0
+        response = requests.post(f"{simulator.url}/api/v2/sms/send", headers={"api-key": "x"}, json={})
+        assert response.status_code == 500
+
+
+class TestArkeselSimulator:
+    def test_send_sms(self, simulator, fake_redis, monkeypatch):
+        monkeypatch.setattr(services, "ARKESEL_BASE_URL", f"{simulator.url}/api/v2")
+        assert services.send_sms(["233240000000", "233250000000"], "hello") == "success"
+
+
+def test_smtp_sink_accepts_messages():
+    sim = ProviderSimulator(SimulatorConfig(latency="fixed:0"))
+    server = SMTPSinkServer(("127.0.0.1", 0), sim)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    message = EmailMessage()
+    message["From"] = "no-reply@reachvault.io"
+    message["To"] = "user@example.com"
+    message["Subject"] = "Hello"
+    message.set_content("Hi")
+
+    with smtplib.SMTP(*server.server_address) as smtp:
+        smtp.login("user", "password")
+        smtp.send_message(message)
+        smtp.send_message(message)
+
+    server.shutdown()
+    server.server_close()
+    assert sim.stats["smtp_message"] == 2
@@ -8,13 +8,20 @@ class GiftCardTypeSerializer(serializers.ModelSerializer):
     codes_available = serializers.SerializerMethodField(read_only=True)
     codes_redeemed = serializers.SerializerMethodField(read_only=True)
 
+    # The viewset annotates these; instances that weren't loaded through it (create/update) fall back to a query.
     def get_revenue(self, obj):
+        if hasattr(obj, 'revenue'):
+            return obj.revenue or 0
         return obj.giftcards.filter(is_redeemed=True).aggregate(total=models.Sum('amount'))['total'] or 0
     
     def get_codes_available(self, obj):
+        if hasattr(obj, 'codes_available'):
+            return obj.codes_available
         return obj.giftcards.filter(is_redeemed=False).count()
     
     def get_codes_redeemed(self, obj):
+        if hasattr(obj, 'codes_redeemed'):
+            return obj.codes_redeemed
         return obj.giftcards.filter(is_redeemed=True).count()
 
     class Meta:
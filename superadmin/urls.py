@@ -1,7 +1,7 @@
 from django.urls import path
 from django.urls import include
 from rest_framework.routers import DefaultRouter
-from superadmin.views import LoginView, GiftCardTypeViewSet, GiftCardViewSet
+from superadmin.views import AsyncLoginView, LoginView, GiftCardTypeViewSet, GiftCardViewSet
 from superadmin.views.giftcard import RedeemedGiftCardView
 from superadmin.views.user import AdminUserViewSet
 from superadmin.views.account import AdminAccountTransactionView, AdminAllCryptoAccountViewSet, AdminAllFiatAccountViewSet
@@ -20,6 +20,7 @@ router.register(r'cryptoaccounts', AdminAllCryptoAccountViewSet, basename='admin
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='admin-login'),
+    path('login/async', AsyncLoginView.as_view(), name='admin-login-async'),
     path('', include(router.urls)),
 
     path('dashboard/', AdminDashboardView.as_view(), name='admin-dashboard'),
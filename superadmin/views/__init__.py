@@ -1,2 +1,2 @@
-from superadmin.views.login import LoginView
+from superadmin.views.login import AsyncLoginView, LoginView
 from superadmin.views.giftcard import GiftCardTypeViewSet, GiftCardViewSet
\ No newline at end of file
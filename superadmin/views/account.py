@@ -3,7 +3,8 @@ from main.models.account import AccountTransaction, CryptoAccount
 from rest_framework import viewsets, filters, generics
 from main.models import FiatAccount
 from superadmin.filters import AdminAccountFilter, TransactionFilter
-from common.pagination import StandardResultsSetPagination
+from common.pagination import EstimatedCountPagination, HistoryPagination
+from common.queryinspector import query_budget
 from superadmin.serializers.account import AdminCryptoAccountSerializer, AdminFiatAccountSerializer
 from oauth.permissions import IsAdmin
 import django_filters.rest_framework
@@ -11,8 +12,9 @@ from superadmin.serializers.transactions import AdminTransactionSerializer
 
 
 
+@query_budget(3)
 class AdminAllFiatAccountViewSet(StandardResponseView, viewsets.ModelViewSet):
-    queryset = FiatAccount.objects.all()
+    queryset = FiatAccount.objects.select_related('owner').order_by('-created_at')
     permission_classes = [IsAdmin]
     serializer_class = AdminFiatAccountSerializer
     filterset_fields = ['currency', 'is_active', 'transfer_allowed', 'owner__email']
@@ -29,18 +31,20 @@ class AdminAllFiatAccountViewSet(StandardResponseView, viewsets.ModelViewSet):
         'account_number',
     ]
 
-    pagination_class = StandardResultsSetPagination
+    pagination_class = EstimatedCountPagination
 
     def destroy(self, request, *args, **kwargs):
         raise NotImplementedError("Fiat accounts cannot be deleted via this viewset.")
 
 
+@query_budget(3)
 class AdminAllCryptoAccountViewSet(StandardResponseView, viewsets.ModelViewSet):
-    queryset = CryptoAccount.objects.all()
+    queryset = CryptoAccount.objects.select_related('owner').order_by('-created_at')
     permission_classes = [IsAdmin]
     serializer_class = AdminCryptoAccountSerializer
     filterset_fields = ['currency', 'is_active', 'transfer_allowed', 'owner__email']
     lookup_field = 'account_number'
+    pagination_class = EstimatedCountPagination
     
     def destroy(self, request, *args, **kwargs):
         raise NotImplementedError("Crypto accounts cannot be deleted via this viewset.")
@@ -61,7 +65,7 @@ class AdminAccountTransactionView(StandardResponseView ,generics.ListAPIView):
         'destination_account__account_number',
     ]
 
-    pagination_class = StandardResultsSetPagination
+    pagination_class = HistoryPagination
 
     def get_queryset(self):
         return AccountTransaction.objects.filter(account__account_number=self.kwargs.get('account_number'))
@@ -7,28 +7,37 @@ from giftcards.models import GiftCard, GiftCardType
 from superadmin.serializers import GiftCardSerializer, GiftCardTypeSerializer
 from oauth.permissions import IsAdmin, IsAdminOrReadOnly
 from common.mixins.response import StandardResponseView
+from common.queryinspector import query_budget
 from django.db import transaction
+from django.db.models import Count, Q, Sum
 import logging
 from rest_framework.exceptions import ValidationError
-from common.pagination import StandardResultsSetPagination
+from common.pagination import HistoryPagination
 import django_filters.rest_framework
 
 
 logger = logging.getLogger('transactions')
 
+@query_budget(3)
 class GiftCardTypeViewSet(viewsets.ModelViewSet):
-    queryset = GiftCardType.objects.all()
+    # Totals for GiftCardTypeSerializer, computed in the list query instead of three queries per type.
+    queryset = GiftCardType.objects.annotate(
+        revenue=Sum('giftcards__amount', filter=Q(giftcards__is_redeemed=True)),
+        codes_available=Count('giftcards', filter=Q(giftcards__is_redeemed=False)),
+        codes_redeemed=Count('giftcards', filter=Q(giftcards__is_redeemed=True)),
+    )
     serializer_class = GiftCardTypeSerializer
     permission_classes = [IsAdmin]
 
+@query_budget(3)
 class GiftCardViewSet(viewsets.ModelViewSet):
-    queryset = GiftCard.objects.all()
+    queryset = GiftCard.objects.select_related('giftcard_type')
     serializer_class = GiftCardSerializer
     permission_classes = [IsAdminOrReadOnly]
     filterset_fields = ['giftcard_type', 'redeemed_by']
 
 class RedeemedGiftCardView(StandardResponseView, generics.ListAPIView, generics.UpdateAPIView):
-    queryset = RedeemedGiftCard.objects.all()
+    queryset = RedeemedGiftCard.objects.select_related('redeemed_by', 'giftcard_type')
     serializer_class = RedeemedGiftCardSerializer
     permission_classes = [IsAdmin]
     filterset_fields = ['giftcard_type', 'status', 'redeemed_by']
@@ -43,7 +52,8 @@ class RedeemedGiftCardView(StandardResponseView, generics.ListAPIView, generics.
         'redeemed_by__email', 
     ]
 
-    pagination_class = StandardResultsSetPagination
+    pagination_class = HistoryPagination
+    keyset_ordering = ('-redeemed_at', '-id')
 
     def perform_update(self, serializer):
         amount_confirmed = serializer.validated_data.get('amount_confirmed', 0)
@@ -1,7 +1,7 @@
 from rest_framework import generics, filters
 from main.models import AccountTransaction
 from superadmin.filters import TransactionFilter
-from common.pagination import StandardResultsSetPagination
+from common.pagination import EstimatedHistoryPagination
 from superadmin.serializers import AdminTransactionSerializer
 from common.mixins.response import StandardResponseView
 from oauth.permissions import IsAdmin
@@ -24,7 +24,7 @@ class AdminTransactionView(StandardResponseView ,generics.ListAPIView):
         'destination_account__account_number',
     ]
 
-    pagination_class = StandardResultsSetPagination
+    pagination_class = EstimatedHistoryPagination
 
     def get_queryset(self):
         return AccountTransaction.objects.all()
@@ -1,13 +1,49 @@
+import codecs
+import csv
+from itertools import islice
+
+from django.conf import settings
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from common.pagination import EstimatedCountPagination
+from main.onboarding import onboard
 from superadmin.serializers.user import AdminUserSerializer
 from oauth.permissions import IsAdmin
 
 class AdminUserViewSet(viewsets.ModelViewSet):
-    queryset = get_user_model().objects.all()
+    queryset = get_user_model().objects.order_by('-created_at')
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdmin]
     filterset_fields = ['email', 'is_active', 'role', 'phone_number']
+    pagination_class = EstimatedCountPagination
 
     def destroy(self, request, *args, **kwargs):
         raise NotImplementedError("Users cannot be deleted via this viewset.")
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def onboard(self, request):
+        """
+        Creates verified users with fiat accounts from a small uploaded CSV (`file`).
+        Passwords are hashed within the request, so uploads are capped at
+        `ONBOARDING['max_upload_rows']`; larger imports go through `manage.py onboard_users`.
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            raise ValidationError({'detail': 'A CSV file is required.'})
+
+        conf = settings.ONBOARDING
+        rows = list(islice(csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig')), conf['max_upload_rows'] + 1))
+        if len(rows) > conf['max_upload_rows']:
+            raise ValidationError({
+                'detail': f"At most {conf['max_upload_rows']} rows can be uploaded; use `manage.py onboard_users` for larger imports."
+            })
+
+        try:
+            report = onboard(rows, workers=conf['endpoint_workers'], currency=request.data.get('currency', 'USD'))
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(report)
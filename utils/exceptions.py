@@ -1,12 +1,10 @@
 from rest_framework.views import exception_handler
+from common.errorlog import log_exception
 from utils.response import standard_response
-import logging
-
-logger = logging.getLogger('error')
 
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
-    logger.error("Exception: %s, Context: %s", str(exc), str(context))
+    log_exception(exc, context, response.status_code if response is not None else 500)
 
     if response is not None:
         data = response.data
@@ -26,12 +24,16 @@ def custom_exception_handler(exc, context):
         else:
             message = "An error occurred"
 
-        return standard_response(
+        wrapped = standard_response(
             data=None,
             message=message,
             status=False,
             status_code=response.status_code
         )
+        # Keep headers such as Retry-After (throttling) and WWW-Authenticate
+        for header, value in response.items():
+            wrapped.setdefault(header, value)
+        return wrapped
 
     # Unhandled exceptions (non-DRF)
     # print(f"Unhandled exception: {exc}")